@@ -0,0 +1,58 @@
+"""批量导出图表的多进程扩展性
+
+用合成数据构造 --countries 个国家 × 3 个指标的 Panel，分别用不同的进程数
+调用 render.render_panel 导出 combined 图表，报告耗时和相对单进程的加速比。
+
+    python bench/bench_batch_render.py --countries 217 --workers 1 2 4 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.indicators import INDICATORS
+from api.series import Panel, year_range
+from render import RenderJob, render_panel
+
+
+def make_panel(countries, start_year=1990, end_year=2022):
+    rng = np.random.default_rng(0)
+    codes = [f"C{i:03d}" for i in range(countries)]
+    indicators = [indicator.code for indicator in INDICATORS.values()]
+    years = year_range(start_year, end_year)
+    data = np.cumsum(rng.normal(1.0, 0.5, (len(codes), len(indicators), len(years))), axis=2)
+    return Panel(codes, indicators, years, data)
+
+
+def run(panel, workers, formats):
+    names = {code: f"Country {code}" for code in panel.countries}
+    with tempfile.TemporaryDirectory() as out_dir:
+        started = time.perf_counter()
+        written, _ = render_panel(panel, names, [RenderJob.preset("combined")], formats, out_dir, workers)
+        return time.perf_counter() - started, len(written)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=217)
+    parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4, os.cpu_count()])
+    parser.add_argument("--formats", nargs="*", default=["png"])
+    args = parser.parse_args()
+
+    panel = make_panel(args.countries)
+    print(f"{args.countries} countries, {os.cpu_count()} cpus")
+    baseline = None
+    for workers in dict.fromkeys(args.workers):
+        elapsed, files = run(panel, workers, args.formats)
+        baseline = baseline or elapsed
+        print(f"  workers {workers:3d}: {elapsed:7.2f} s  {files / elapsed:7.1f} files/s  "
+              f"speedup {baseline / elapsed:5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""每次查询重建图表与复用 ChartView 的重绘耗时，以及连续查询的内存泄漏检查
+
+原来的做法是每次查询新建 Figure、tight_layout 再绘制；ChartView 复用同一个
+Figure，只更新折线数据。查询在单国家/双国家/"全部"指标之间轮换，
+使子图布局也会发生变化。泄漏检查连续执行 --queries 次查询，预热后
+Python 堆的增长超过 --max-growth KB 或图中对象数量持续增加时以非零状态退出。
+
+    python bench/bench_chart_redraw.py --queries 1000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from api.indicators import INDICATORS
+from ui.charts import AxesSpec, ChartView, LineSpec
+
+COUNTRIES = ["China", "United States", "Japan", "Germany", "India", "France"]
+
+
+def make_query(n, rng):
+    """第 n 次查询的 AxesSpec 列表，年份区间和国家数量随 n 变化"""
+    indicators = list(INDICATORS.values()) if n % 10 == 0 else [INDICATORS["GDP"]]
+    start = 1960 + n % 30
+    end = 2022
+    countries = COUNTRIES[:1 + n % 2] if n % 5 else COUNTRIES
+    specs = []
+    for indicator in indicators:
+        lines = []
+        for i, name in enumerate(countries):
+            years = np.arange(start, end + 1)
+            values = np.cumsum(rng.normal(1.0, 0.3, len(years)))
+            if len(countries) <= len(indicator.styles):
+                fmt, marker = indicator.style(i)
+                lines.append(LineSpec(f"{name} {indicator.label}", years, values, fmt, marker=marker))
+            else:
+                lines.append(LineSpec(name, years, values, '-', linewidth=1.2, color=f'C{i % 10}'))
+        specs.append(AxesSpec(indicator, f"{indicator.title} ({start}-{end})", lines,
+                              legend_outside=len(countries) > 4))
+    return specs
+
+
+def rebuild(specs):
+    """原来的做法：每次查询一个新的 Figure 和画布"""
+    fig = Figure(figsize=(10, 6), dpi=100)
+    canvas = FigureCanvasAgg(fig)
+    for position, spec in enumerate(specs, 1):
+        ax = fig.add_subplot(len(specs), 1, position)
+        for line in spec.lines:
+            kwargs = {name: getattr(line, name) for name in ('marker', 'linewidth', 'color')
+                      if getattr(line, name) is not None}
+            ax.plot(line.years, line.values, line.fmt, label=line.label, **kwargs)
+        ax.set_title(spec.title)
+        ax.legend()
+    fig.tight_layout()
+    canvas.draw()
+
+
+def time_redraws(queries):
+    rng = np.random.default_rng(0)
+    specs = [make_query(n, rng) for n in range(queries)]
+
+    started = time.perf_counter()
+    for query in specs:
+        rebuild(query)
+    rebuilt = (time.perf_counter() - started) / queries
+
+    view = ChartView()
+    started = time.perf_counter()
+    for query in specs:
+        view.show(query)  # 无界面时 draw_idle 会立即绘制
+    reused = (time.perf_counter() - started) / queries
+    return rebuilt, reused, view.rebuilds
+
+
+def count_artists(view):
+    return sum(1 for _ in view.figure.findobj())
+
+
+def check_leak(queries, warmup=50):
+    """连续查询，返回 (预热后的堆增长字节数, 预热后与结束时的图中对象数)"""
+    rng = np.random.default_rng(1)
+    view = ChartView()
+    tracemalloc.start()
+    baseline = artists_before = None
+    for n in range(queries):
+        view.show(make_query(n, rng))
+        if n + 1 == warmup:
+            gc.collect()
+            baseline = tracemalloc.get_traced_memory()[0]
+            artists_before = count_artists(view)
+    # 与预热结束时处于同一种布局，对象数才有可比性
+    view.show(make_query(warmup - 1, rng))
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    return growth, artists_before, count_artists(view)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=1000, help="泄漏检查的连续查询次数")
+    parser.add_argument("--timing-queries", type=int, default=60, help="计时用的查询次数")
+    parser.add_argument("--max-growth", type=int, default=512, help="允许的堆增长（KB）")
+    args = parser.parse_args()
+    # 没有中文字体的环境下每次绘制都会对缺失的字形发出警告
+    warnings.filterwarnings("ignore", message="Glyph .* missing")
+
+    rebuilt, reused, rebuilds = time_redraws(args.timing_queries)
+    print(f"rebuild figure: {rebuilt * 1000:8.1f} ms/query")
+    print(f"ChartView:      {reused * 1000:8.1f} ms/query  ({rebuilds} axes rebuilds "
+          f"in {args.timing_queries} queries)")
+
+    growth, artists_before, artists_after = check_leak(args.queries)
+    print(f"{args.queries} queries: heap growth {growth / 1024:.1f} KB, "
+          f"artists {artists_before} -> {artists_after}")
+    if growth > args.max_growth * 1024 or artists_after > artists_before:
+        print("possible leak")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""并发重复请求的合并效果：逻辑请求数与实际HTTP请求数
+
+模拟界面和批处理同时发出的查询：--threads 个线程同时请求同一国家的同一指标，
+年份区间部分相同、部分重叠，另有若干线程同时加载国家列表。每个请求在本地
+模拟服务器上延迟 --delay 秒，保证这些请求在时间上确实重叠。
+
+    python bench/bench_coalesce.py --threads 16 --delay 0.2
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer
+
+# 相同、被覆盖和相互重叠的年份区间
+RANGES = [(1990, 2022), (1990, 2022), (2000, 2010), (2015, 2023), (1980, 1995)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--delay", type=float, default=0.2, help="模拟的单请求延迟（秒）")
+    args = parser.parse_args()
+
+    with StubWorldBankServer(delay=args.delay) as server:
+        client = GdpClient(transport=HttpTransport())
+        client.base_url = server.base_url
+        barrier = threading.Barrier(args.threads * 2)
+        errors = []
+
+        def series(i):
+            start_year, end_year = RANGES[i % len(RANGES)]
+            barrier.wait()
+            # 错开一点，让较晚的请求看到进行中的下载
+            time.sleep(0.002 * i)
+            try:
+                client.get_series("CHN", "GDP", start_year, end_year)
+            except Exception as e:
+                errors.append(e)
+
+        def countries(i):
+            barrier.wait()
+            client.get_country_index()
+
+        threads = [threading.Thread(target=series, args=(i,)) for i in range(args.threads)]
+        threads += [threading.Thread(target=countries, args=(i,)) for i in range(args.threads)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        client.close()
+
+    assert not errors, errors
+    stats = client.request_stats()
+    print(f"logical requests: {args.threads * 2} ({args.threads} series, {args.threads} country list)")
+    print(f"HTTP requests:    {server.request_count}")
+    print(f"issued {stats['issued']}  coalesced {stats['coalesced']}  widened {stats['widened']}  "
+          f"hits {stats['hits']}")
+    print(f"elapsed:          {elapsed * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
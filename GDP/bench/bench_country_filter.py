@@ -0,0 +1,96 @@
+"""国家下拉框每次按键的过滤耗时
+
+对比原来的线性扫描（每次按键把所有名称转小写再查找）、CountryIndex.search
+和 IncrementalFilter 的增量过滤，报告每次按键的平均、p99 和最大耗时。
+列表规模可以扩大到包含地区汇总项和地方行政区的情况。
+
+    python bench/bench_country_filter.py --sizes 300 5000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.countries import CountryIndex, IncrementalFilter, FILTER_LIMIT
+from stub_server import COUNTRIES
+
+WORDS = ["north", "south", "east", "west", "central", "upper", "lower", "new", "greater",
+         "province", "region", "district", "state", "islands", "republic", "coast", "valley"]
+
+
+def make_countries(size):
+    """真实格式的国家列表，不足的部分用合成的地方行政区名称补足"""
+    countries = list(COUNTRIES[:size])
+    rng = random.Random(42)
+    i = 0
+    while len(countries) < size:
+        base = COUNTRIES[i % len(COUNTRIES)]["name"]
+        name = f"{rng.choice(WORDS).title()} {base} {rng.choice(WORDS).title()} {i}"
+        countries.append({"id": f"S{i:05d}", "iso2Code": "", "name": name})
+        i += 1
+    return countries
+
+
+def keystrokes(word):
+    return [word[:n] for n in range(1, len(word) + 1)]
+
+
+def linear_filter(names, value):
+    value = value.lower()
+    return [name for name in names if value in name.lower()][:FILTER_LIMIT]
+
+
+def measure(fn, queries, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            started = time.perf_counter()
+            fn(query)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    return (sum(timings) / len(timings), timings[int(len(timings) * 0.99) - 1], timings[-1])
+
+
+def run(size):
+    countries = make_countries(size)
+    names = [c["name"] for c in countries]
+
+    started = time.perf_counter()
+    index = CountryIndex(countries)
+    build = time.perf_counter() - started
+
+    words = ["united states", "country 1", "north", "islands", "korea", "central"]
+    queries = [q for word in words for q in keystrokes(word)]
+
+    results = {
+        "linear scan": measure(lambda q: linear_filter(names, q), queries),
+        "index search": measure(lambda q: index.search(q, limit=FILTER_LIMIT), queries),
+    }
+
+    def incremental(q, state={}):
+        # 每个单词重新开始输入，模拟真实的按键序列
+        if len(q) == 1:
+            state["filter"] = IncrementalFilter(index)
+        state["filter"].update(q)
+
+    results["incremental"] = measure(incremental, queries)
+    return build, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="*", default=[300, 5000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        build, results = run(size)
+        print(f"{size} entries (index build {build * 1000:.1f} ms)")
+        for name, (mean, p99, worst) in results.items():
+            print(f"  {name:13s} mean {mean * 1e6:8.1f} us   p99 {p99 * 1e6:8.1f} us   max {worst * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""对比顺序获取与 GdpClient.fetch_many 并发获取的耗时
+
+模拟"全部"+双国家比较视图：3个指标 × 2个国家，顺序获取需要6个请求，每个
+请求在本地模拟服务器上延迟 --delay 秒。fetch_many 把同一国家的指标合并为
+批量请求并发执行，总耗时应接近单个最慢请求。
+
+    python bench/bench_fetch_many.py --delay 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.gdp_client import GdpClient, GDP_INDICATOR, GDP_PER_CAPITA_INDICATOR, CPI_INDICATOR
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer
+
+INDICATORS = [GDP_INDICATOR, GDP_PER_CAPITA_INDICATOR, CPI_INDICATOR]
+COUNTRIES = ["CHN", "USA"]
+
+
+def run(delay, max_workers, start_year=1990, end_year=2022):
+    pairs = [(c, i) for c in COUNTRIES for i in INDICATORS]
+
+    with StubWorldBankServer(delay=delay) as server:
+        client = GdpClient(transport=HttpTransport(), max_workers=max_workers)
+        client.base_url = server.base_url
+
+        t0 = time.perf_counter()
+        for country, indicator in pairs:
+            client._get_series(country, indicator, start_year, end_year)
+        sequential = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        results = list(client.fetch_many(pairs, start_year, end_year))
+        concurrent = time.perf_counter() - t0
+        client.close()
+
+    assert all(r.ok for r in results), [r.error for r in results if not r.ok]
+    return sequential, concurrent
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.2, help="模拟的单请求延迟（秒）")
+    parser.add_argument("--workers", type=int, default=6, help="并发上限")
+    args = parser.parse_args()
+
+    sequential, concurrent = run(args.delay, args.workers)
+    print(f"requests:   {len(COUNTRIES) * len(INDICATORS)} x {args.delay * 1000:.0f} ms")
+    print(f"sequential: {sequential * 1000:8.1f} ms")
+    print(f"fetch_many: {concurrent * 1000:8.1f} ms  (workers={args.workers})")
+    print(f"speedup:    {sequential / concurrent:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
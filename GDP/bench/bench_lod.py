@@ -0,0 +1,88 @@
+"""降采样（LOD）对重绘耗时的影响
+
+用合成的月度序列（随机游走）在 ChartView 上比较关闭和打开降采样时
+show + draw 的耗时和实际绘制的点数，序列长度和叠加的线数逐级增加；
+最后测量放大到 --zoom 年时按完整数据重新截取的耗时，markers 列为放大后
+是否恢复了标记。
+
+    python bench/bench_lod.py --lengths 1000 10000 100000 --lines 1 20
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+
+from api.indicators import get_indicator
+from ui.charts import AxesSpec, ChartView, LineSpec
+
+
+def make_specs(length, lines, seed=0):
+    rng = np.random.default_rng(seed)
+    years = 1960 + np.arange(length) / 12
+    indicator = get_indicator("GDP")
+    specs = [LineSpec(f"C{i}", years, 1e12 + np.cumsum(rng.normal(0, 1e9, length)), '-', marker='o')
+             for i in range(lines)]
+    return [AxesSpec(indicator, "bench", specs, legend_outside=lines > 4)]
+
+
+def redraw(chart, specs, repeat):
+    """返回 show + draw 的最短耗时（毫秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        chart.show(specs)
+        chart.canvas.draw()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def zoom(chart, years, repeat):
+    """放大到最后 years 年并重绘的最短耗时（毫秒）"""
+    ax = chart.axes[0]
+    full = ax.get_xlim()
+    best = float("inf")
+    for _ in range(repeat):
+        ax.set_xlim(full)
+        started = time.perf_counter()
+        ax.set_xlim(full[1] - years, full[1])
+        chart.canvas.draw()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lengths", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1, 20])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--zoom", type=float, default=5, help="放大后的可见年数")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", "Glyph .* missing")
+
+    print(f"{'points':>8s} {'lines':>5s} {'full ms':>9s} {'drawn':>9s} {'lod ms':>8s} {'drawn':>7s} "
+          f"{'zoom ms':>8s} {'markers':>8s}")
+    for lines in args.lines:
+        for length in args.lengths:
+            specs = make_specs(length, lines)
+            full = ChartView(figsize=(10, 4), lod=False)
+            full_ms = redraw(full, specs, args.repeat)
+            lod = ChartView(figsize=(10, 4))
+            lod_ms = redraw(lod, specs, args.repeat)
+            drawn = lod.drawn_points
+            zoom_ms = zoom(lod, args.zoom, args.repeat)
+            marker = lod.axes[0].lines[0].get_marker()
+            print(f"{length:8d} {lines:5d} {full_ms:9.1f} {full.drawn_points:9d} {lod_ms:8.1f} {drawn:7d} "
+                  f"{zoom_ms:8.1f} {marker:>8s}")
+
+
+if __name__ == "__main__":
+    main()
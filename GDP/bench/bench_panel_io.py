@@ -0,0 +1,140 @@
+"""面板导出/读取：NPZ、压缩 NPZ、Arrow 与 JSON 列表的耗时和文件大小
+
+构造 217 个国家 × --indicators 个指标 × 1963-2022 的合成面板（数值与模拟
+服务器相同），对每种格式测量写入耗时、文件大小、读取耗时，以及读取后对
+整个面板求一次 nansum 的耗时（内存映射的数据在这时才真正从磁盘载入）。
+JSON 为对照：{(国家, 指标): (years, values)} 列表，即 fetch_data 之前
+结果的形式。没有安装 pyarrow 时跳过 Arrow。
+
+最后用模拟服务器比较：重新从 API 获取同样的面板，与把导出的文件作为
+PanelStore 数据源时 GdpClient.fetch_panel 的请求数和耗时。
+
+    python bench/bench_panel_io.py --indicators 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import numpy as np
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.panel_io import PanelStore, load_panel, save_panel
+from api.series import Panel, year_range
+from api.transport import HttpTransport
+from stub_server import COUNTRIES, StubWorldBankServer, synthetic_value
+
+
+def synthetic_panel(countries, indicators, start_year, end_year):
+    years = year_range(start_year, end_year)
+    data = np.array([[[np.nan if (value := synthetic_value(country, indicator, int(year))) is None else value
+                       for year in years] for indicator in indicators] for country in countries])
+    return Panel(countries, indicators, years, data)
+
+
+def save_json(panel, path):
+    results = {}
+    for country in panel.countries:
+        for indicator in panel.indicators:
+            years, values = panel.series(country, indicator).to_lists()
+            results[f"{country}|{indicator}"] = [years, values]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f)
+    return os.path.getsize(path)
+
+
+def load_json(panel, path):
+    with open(path, encoding="utf-8") as f:
+        results = json.load(f)
+    results = {tuple(key.split("|")): tuple(series) for key, series in results.items()}
+    return Panel.from_results(results, panel.start_year, panel.end_year,
+                              countries=panel.countries, indicators=panel.indicators)
+
+
+def measure(label, save, load, repeat):
+    """返回 (格式, 写入毫秒, 大小, 读取毫秒, 首次求和毫秒)，取 repeat 次中最快的一次"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = save()
+        saved = time.perf_counter()
+        panel = load()
+        loaded = time.perf_counter()
+        np.nansum(panel.data)
+        summed = time.perf_counter()
+        row = (label, (saved - started) * 1000, size, (loaded - saved) * 1000, (summed - loaded) * 1000)
+        best = row if best is None or row[1] + row[3] < best[1] + best[3] else best
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--indicators", type=int, default=10, help="指标数（不足的用合成代码补齐）")
+    parser.add_argument("--start", type=int, default=1963)
+    parser.add_argument("--end", type=int, default=2022)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.02, help="模拟的网络延迟（秒）")
+    args = parser.parse_args()
+
+    countries = [c["id"] for c in COUNTRIES if c["region"]["value"] != "Aggregates"]
+    indicators = [indicator.code for indicator in INDICATORS.values()]
+    indicators += [f"SYN.IND.{i}.ZG" if i % 2 else f"SYN.IND.{i}.CD"
+                   for i in range(args.indicators - len(indicators))]
+    indicators = indicators[:args.indicators]
+    panel = synthetic_panel(countries, indicators, args.start, args.end)
+    print(f"{panel!r}，{panel.data.nbytes / 1024 / 1024:.2f} MB 数值")
+
+    try:
+        import pyarrow  # noqa: F401
+        has_arrow = True
+    except ImportError:
+        has_arrow = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def path(name):
+            return os.path.join(tmp, name)
+
+        cases = [
+            measure("npz", lambda: save_panel(panel, path("p.npz")), lambda: load_panel(path("p.npz")), args.repeat),
+            measure("npz（压缩）", lambda: save_panel(panel, path("c.npz"), compress=True),
+                    lambda: load_panel(path("c.npz")), args.repeat),
+        ]
+        if has_arrow:
+            cases.append(measure("arrow", lambda: save_panel(panel, path("p.arrow")),
+                                 lambda: load_panel(path("p.arrow")), args.repeat))
+            cases.append(measure("arrow（zstd）", lambda: save_panel(panel, path("c.arrow"), compress=True),
+                                 lambda: load_panel(path("c.arrow")), args.repeat))
+        cases.append(measure("json 列表", lambda: save_json(panel, path("p.json")),
+                             lambda: load_json(panel, path("p.json")), max(1, args.repeat // 2)))
+
+        print(f"\n{'格式':12s} {'写入':>9s} {'大小':>10s} {'读取':>9s} {'首次求和':>9s}")
+        for label, saved, size, loaded, summed in cases:
+            print(f"{label:12s} {saved:7.1f}ms {size / 1024 / 1024:8.2f}MB {loaded:7.2f}ms {summed:7.2f}ms")
+        if not has_arrow:
+            print("（未安装 pyarrow，跳过 Arrow）")
+        assert np.array_equal(load_panel(path("p.npz")).data, panel.data, equal_nan=True)
+
+        # 只用已注册的指标：模拟服务器按指标代码分组到数据源
+        codes = [indicator.code for indicator in INDICATORS.values()]
+        with StubWorldBankServer(delay=args.delay) as server:
+            for label, store in (("从 API 获取", None), ("PanelStore", PanelStore(path("p.npz")))):
+                client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport(), store=store)
+                client.base_url = server.base_url
+                before = server.request_count
+                started = time.perf_counter()
+                client.fetch_panel(countries, codes, args.start, args.end)
+                elapsed = time.perf_counter() - started
+                print(f"\n{label}: {len(countries)} 个国家 × {len(codes)} 个指标，"
+                      f"{server.request_count - before} 个请求，{elapsed * 1000:.1f} ms", end="")
+                client.close()
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""指标响应解析：response.json() 与流式逐行解析的耗时和峰值内存对比
+
+用模拟服务器的数据生成录制好的响应体（--countries 个国家 × 3 个指标 ×
+1960-2022 年，一页返回），分别按真实API的紧凑格式和带空格的格式：
+
+  json     json.loads 整页后逐行取出 (国家, 指标, 年份, 数值)，即原来的做法
+  stream   api.stream.PageParser 按 64KB 的块逐行解析
+
+峰值内存用 tracemalloc 测量，包含响应体本身之外的所有分配。最后经模拟服务器
+端到端下载同一请求（分页），对比 _fetch_rows + 取值与 _download_panel。
+
+    python bench/bench_parse.py --countries 217
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.stream import CHUNK_SIZE, PageParser
+from api.transport import HttpTransport
+from stub_server import COUNTRIES, StubWorldBankServer, _Handler
+
+START_YEAR, END_YEAR = 1960, 2022
+FORMATS = {"compact": (",", ":"), "spaced": (", ", ": ")}
+
+
+def record_payload(codes, indicators, separators):
+    handler = _Handler.__new__(_Handler)
+    body = handler._indicator(";".join(codes), ";".join(indicators),
+                              {"per_page": "100000", "date": f"{START_YEAR}:{END_YEAR}"})
+    return json.dumps(body, separators=separators).encode()
+
+
+def parse_json(payload):
+    data = json.loads(payload)
+    return [(row["countryiso3code"], row["indicator"]["id"], int(row["date"]), float(row["value"]))
+            for row in data[1] if row["value"] is not None]
+
+
+def parse_stream(payload):
+    chunks = (payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE))
+    return [(row.iso3, row.indicator, int(row.date), row.value) for row in PageParser(chunks)]
+
+
+def measure(func, *args, repeat=5):
+    """返回 (结果, 最短耗时秒, 峰值内存字节)"""
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - started)
+        del result
+    gc.collect()
+    tracemalloc.start()
+    result = func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, best, peak
+
+
+def download_json(client, url):
+    rows, _ = client._fetch_rows(url)
+    return [(row["countryiso3code"], row["indicator"]["id"], int(row["date"]), float(row["value"]))
+            for row in rows if row["value"] is not None]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--countries", type=int, default=217)
+    args = parser.parse_args()
+
+    codes = [c["id"] for c in COUNTRIES if c["region"]["value"] != "Aggregates"][:args.countries]
+    indicators = [indicator.code for indicator in INDICATORS.values()]
+    for name, separators in FORMATS.items():
+        payload = record_payload(codes, indicators, separators)
+        print(f"{name}: {len(payload) / 1024:.0f} KB, {len(codes)} countries x {len(indicators)} indicators")
+        expected, json_time, json_peak = measure(parse_json, payload)
+        streamed, stream_time, stream_peak = measure(parse_stream, payload)
+        assert streamed == expected, "流式解析结果与 json.loads 不一致"
+        print(f"  json    {json_time * 1000:8.1f} ms   peak {json_peak / 2 ** 20:7.1f} MB")
+        print(f"  stream  {stream_time * 1000:8.1f} ms   peak {stream_peak / 2 ** 20:7.1f} MB   "
+              f"({len(streamed)} values)")
+
+    # 端到端：经模拟服务器分页下载，约50个国家一批（与 get_panel 相同）
+    batch = codes[:50]
+    with StubWorldBankServer() as server:
+        client = GdpClient(transport=HttpTransport())
+        client.base_url = server.base_url
+        url = (f"{server.base_url}country/{';'.join(batch)}/indicator/{';'.join(indicators)}"
+               f"?format=json&source=2&date={START_YEAR}:{END_YEAR}")
+        _, json_time, json_peak = measure(download_json, client, url)
+        _, stream_time, stream_peak = measure(client._download_panel, batch, indicators, 2, START_YEAR, END_YEAR)
+        client.transport.close()
+    print(f"download {len(batch)} countries via stub (paged, {server.request_count} requests):")
+    print(f"  json    {json_time * 1000:8.1f} ms   peak {json_peak / 2 ** 20:7.1f} MB")
+    print(f"  stream  {stream_time * 1000:8.1f} ms   peak {stream_peak / 2 ** 20:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""预取对切换数据类型的延迟的影响
+
+模拟界面中最常见的操作：查询默认的中国/美国的 GDP，然后依次切换到人均GDP、
+CPI 和全部。每次切换之间等待 --think 秒（用户看图的时间），比较不预取和
+用 Prefetcher 预取全部指标时每次切换的耗时和请求数。
+
+    python bench/bench_prefetch.py --delay 0.1
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer
+from ui.prefetch import Prefetcher
+
+COUNTRIES = ["CHN", "USA"]
+FLIPS = [["GDP"], ["GDP_PER_CAPITA"], ["CPI"], list(INDICATORS)]
+
+
+def session(server, prefetch, think, start_year, end_year):
+    """返回 [(数据类型, 耗时毫秒, 请求数)]"""
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+    client.base_url = server.base_url
+    busy = [False]
+    prefetcher = Prefetcher(lambda: client, idle=lambda: not busy[0])
+    rows = []
+    for keys in FLIPS:
+        codes = [INDICATORS[key].code for key in keys]
+        before = server.request_count
+        busy[0] = True
+        started = time.perf_counter()
+        client.get_panel(COUNTRIES, codes, start_year, end_year)
+        elapsed = time.perf_counter() - started
+        busy[0] = False
+        rows.append(("+".join(keys), elapsed * 1000, server.request_count - before))
+        if prefetch:
+            prefetcher.warm(COUNTRIES, [i.code for i in INDICATORS.values()], start_year, end_year)
+        time.sleep(think)
+    prefetcher.stop()
+    client.close()
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.1, help="模拟的网络延迟（秒）")
+    parser.add_argument("--think", type=float, default=0.5, help="两次切换之间的间隔（秒）")
+    parser.add_argument("--start", type=int, default=1990)
+    parser.add_argument("--end", type=int, default=2022)
+    args = parser.parse_args()
+
+    with StubWorldBankServer(delay=args.delay) as server:
+        for prefetch in (False, True):
+            print(f"\n{'预取' if prefetch else '不预取'}:")
+            for data_type, elapsed, requests in session(server, prefetch, args.think, args.start, args.end):
+                print(f"  {data_type:32s} {elapsed:8.1f} ms  {requests} 个请求")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""排名查询：逐国获取后排序 与 预计算的 RankingIndex
+
+1. 逐国：对每个国家调用 get_indicator_data（每国一个请求），再在 Python 中
+   排序取前 N 名；
+2. RankingIndex.build 用批量请求获取全部国家，之后测量 top / rank / rollup
+   查询和单条序列更新（经 IndicatorCache 通知）的耗时。
+
+    python bench/bench_ranking.py --delay 0.02 --year 2020
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.ranking import RankingIndex
+from api.transport import HttpTransport
+from stub_server import COUNTRIES, StubWorldBankServer
+
+
+def new_client(server):
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+    client.base_url = server.base_url
+    return client
+
+
+def timed(function, repeat=1000):
+    """返回单次调用的平均耗时（微秒）"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.02, help="模拟的网络延迟（秒）")
+    parser.add_argument("--indicator", default="GDP_PER_CAPITA")
+    parser.add_argument("--year", type=int, default=2020)
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--start", type=int, default=1990)
+    parser.add_argument("--end", type=int, default=2022)
+    args = parser.parse_args()
+
+    code = INDICATORS[args.indicator].code
+    countries = [c["id"] for c in COUNTRIES if c["region"]["value"] != "Aggregates"]
+    with StubWorldBankServer(delay=args.delay) as server:
+        client = new_client(server)
+        before = server.request_count
+        started = time.perf_counter()
+        values = []
+        for country in countries:
+            years, series = client.get_indicator_data(country, code, args.start, args.end)
+            if args.year in years:
+                values.append((series[years.index(args.year)], country))
+        top = sorted(values, reverse=True)[:args.top]
+        naive = time.perf_counter() - started
+        print(f"逐国获取并排序: {server.request_count - before} 个请求，{naive * 1000:.0f} ms，第一名 {top[0][1]}")
+        client.close()
+
+        client = new_client(server)
+        before = server.request_count
+        started = time.perf_counter()
+        index = RankingIndex.build(client, list(INDICATORS), args.start, args.end)
+        build = time.perf_counter() - started
+        print(f"RankingIndex.build（{len(INDICATORS)} 个指标）: {server.request_count - before} 个请求，"
+              f"{build * 1000:.0f} ms")
+        index.attach(client.cache)
+
+        print(f"  top({args.top})          {timed(lambda: index.top(code, args.year, args.top)):8.1f} µs")
+        print(f"  rank                {timed(lambda: index.rank('CHN', code, args.year)):8.1f} µs")
+        print(f"  rollup(region)      {timed(lambda: index.rollup(code, args.year, by='region')):8.1f} µs")
+        group = ("income", index.groups["income"][0])
+        print(f"  top 组内            {timed(lambda: index.top(code, args.year, args.top, group=group)):8.1f} µs")
+
+        entry = client.cache.get("CHN", code)
+        # 两个版本交替写入，每次都有变化的年份
+        versions = itertools.cycle([[(year, value * 1.01) for year, value in entry.points], list(entry.points)])
+        update = timed(lambda: client.cache.put("CHN", code, entry.start_year, entry.end_year, next(versions)), 50)
+        print(f"  序列更新（缓存写入 + 增量重算） {update / 1000:6.2f} ms")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
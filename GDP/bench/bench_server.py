@@ -0,0 +1,134 @@
+"""HTTP数据服务的压力测试
+
+在后台线程中启动 DataServer，数据来自本地模拟的 World Bank API（每个上游
+请求延迟 --delay 秒）和内存中的缓存。--clients 个客户端各自保持一个
+keep-alive 连接，依次发出 --requests 个请求，混合单条序列（json/npz）
+和面板查询；一半的客户端带上之前收到的 ETag（If-None-Match），应得到304。
+
+报告吞吐量、延迟分位数、状态码分布、上游请求数和服务进程的线程数。
+
+    python bench/bench_server.py --clients 300 --requests 20
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from server import DataServer
+from stub_server import StubWorldBankServer
+
+PATHS = [
+    "/v1/series/CHN/GDP?start=1990&end=2022",
+    "/v1/series/USA/GDP_PER_CAPITA?start=2000&end=2022&format=npz",
+    "/v1/series/Japan/CPI?start=1980&end=2020",
+    "/v1/series/DEU/GDP?start=1960&end=2022&format=npz",
+    "/v1/panel?countries=CHN,USA,JPN,DEU,IND&indicators=GDP,CPI&start=1990&end=2022",
+    "/v1/panel?countries=GBR,FRA,BRA&indicators=GDP,GDP_PER_CAPITA,CPI&format=npz",
+    "/v1/countries",
+]
+
+
+async def request(reader, writer, path, etag=None):
+    """发送一个GET请求，返回 (状态码, ETag, 响应体长度)"""
+    lines = [f"GET {path} HTTP/1.1", "Host: localhost"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status = int(head.split(" ", 2)[1])
+    headers = {}
+    for line in head.split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers.get("etag"), length
+
+
+async def client_session(port, count, revalidate, seed, latencies, statuses):
+    rng = random.Random(seed)
+    etags = {}
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        for _ in range(count):
+            path = rng.choice(PATHS)
+            started = time.perf_counter()
+            status, etag, _ = await request(reader, writer, path, etags.get(path) if revalidate else None)
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if etag:
+                etags[path] = etag
+    finally:
+        writer.close()
+
+
+async def load(port, clients, count):
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(client_session(port, count, i % 2 == 0, i, latencies, statuses)
+                           for i in range(clients)))
+    return time.perf_counter() - started, sorted(latencies), statuses
+
+
+def percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=300, help="并发客户端数")
+    parser.add_argument("--requests", type=int, default=20, help="每个客户端的请求数")
+    parser.add_argument("--delay", type=float, default=0.05, help="上游单请求延迟（秒）")
+    parser.add_argument("--workers", type=int, default=8, help="服务的取数线程数")
+    args = parser.parse_args()
+
+    with StubWorldBankServer(delay=args.delay) as upstream:
+        client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+        client.base_url = upstream.base_url
+        server = DataServer(client, port=0, workers=args.workers)
+
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start())
+            ready.set()
+            loop.run_forever()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        ready.wait()
+
+        elapsed, latencies, statuses = asyncio.run(load(server.port, args.clients, args.requests))
+        threads = threading.active_count()
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        client.close()
+
+    total = len(latencies)
+    print(f"{args.clients} clients x {args.requests} requests = {total} requests in {elapsed:.2f} s "
+          f"({total / elapsed:.0f} req/s)")
+    print(f"latency p50 {percentile(latencies, 0.5) * 1000:.1f} ms   "
+          f"p95 {percentile(latencies, 0.95) * 1000:.1f} ms   p99 {percentile(latencies, 0.99) * 1000:.1f} ms")
+    print("status: " + "  ".join(f"{status}={n}" for status, n in sorted(statuses.items())))
+    print(f"upstream requests: {upstream.request_count}   threads in process: {threads}")
+    print(f"client: {client.request_stats()}")
+    if set(statuses) - {200, 304}:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""GUI 启动耗时：模块导入时间和到窗口首次绘制的时间
+
+导入时间用 python -X importtime 测量 ui.app，列出累计耗时最多的模块；
+首次绘制时间是从启动新的Python进程到 GdpApp 创建完成、Tk 完成第一次
+update 的墙钟时间，超过 --target 毫秒时以非零状态退出。没有图形界面
+（DISPLAY）的环境只报告导入时间。
+
+    python bench/bench_startup.py --target 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+
+# 到首次绘制的目标时间（毫秒）
+TARGET_FIRST_PAINT_MS = 300
+
+FIRST_PAINT_SCRIPT = """
+import sys
+import tkinter as tk
+sys.path.insert(0, {src!r})
+from ui.app import GdpApp
+root = tk.Tk()
+app = GdpApp(root)
+root.update()
+print("painted", flush=True)
+root.destroy()
+"""
+
+
+def import_times(module, top=8):
+    """返回 (模块总耗时 us, [(累计耗时 us, 模块名), ...])"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name.rstrip()))
+    # 子模块排在父模块之前且缩进更深；只取 module 自己的子树，不含解释器启动时的 site 等
+    end = next(i for i, (_, name) in enumerate(rows) if name.strip() == module)
+    start = end
+    while start > 0 and rows[start - 1][1].startswith("  "):
+        start -= 1
+    return rows[end][0], sorted(rows[start:end], reverse=True)[:top]
+
+
+def first_paint(home):
+    """启动进程到窗口首次绘制的时间（秒）；没有图形界面时返回 None"""
+    env = dict(os.environ, HOME=home, USERPROFILE=home)
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", FIRST_PAINT_SCRIPT.format(src=SRC_DIR)],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    line = process.stdout.readline()
+    elapsed = time.perf_counter() - started
+    process.communicate()
+    return elapsed if line.strip() == "painted" else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", type=float, default=TARGET_FIRST_PAINT_MS, help="首次绘制目标（毫秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    total, slowest = import_times("ui.app")
+    print(f"import ui.app: {total / 1000:8.1f} ms")
+    for us, name in slowest:
+        print(f"  {us / 1000:8.1f} ms  {name}")
+    charts, _ = import_times("ui.charts")
+    print(f"import ui.charts (loaded on first query): {charts / 1000:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as home:
+        timings = [first_paint(home) for _ in range(args.repeat)]
+    if None in timings:
+        print("first paint: skipped (no display)")
+        return
+    best = min(timings) * 1000
+    print(f"first paint:   {best:8.1f} ms (best of {args.repeat}, target {args.target:.0f} ms)")
+    if best > args.target:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
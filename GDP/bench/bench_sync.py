@@ -0,0 +1,59 @@
+"""增量同步与逐条全量刷新的请求数和流量
+
+先用批量请求把全部国家 × 已注册指标写入空缓存，然后依次执行：首次同步、
+数据源未变化时的同步、模拟数据源发布新版本后的同步，以及全量同步；每一步
+打印模拟服务器收到的请求数、耗时和同步报告。
+
+    python bench/bench_sync.py --delay 0.05
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.transport import HttpTransport
+from stub_server import COUNTRIES, StubWorldBankServer
+from sync import DeltaSync
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.05, help="模拟的网络延迟（秒）")
+    parser.add_argument("--start", type=int, default=1990)
+    parser.add_argument("--end", type=int, default=2023)
+    parser.add_argument("--recent-years", type=int, default=5)
+    args = parser.parse_args()
+
+    countries = [c["id"] for c in COUNTRIES if c["region"]["value"] != "Aggregates"]
+    codes = [indicator.code for indicator in INDICATORS.values()]
+    with StubWorldBankServer(delay=args.delay) as server:
+        client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+        client.base_url = server.base_url
+        client.get_panel(countries, codes, args.start, args.end)
+        print(f"缓存了 {len(countries)} 个国家 × {len(codes)} 个指标 ({args.start}-{args.end})")
+
+        sync = DeltaSync(client, args.recent_years)
+        # 以缓存的最后一年为“今年”，最近几年落在缓存区间内
+        today = date(args.end, 12, 31)
+        steps = [("首次同步", None, False), ("未变化", None, False),
+                 ("数据源更新", "2099-01-01", False), ("全量同步", None, True)]
+        for label, last_updated, full in steps:
+            if last_updated:
+                server.last_updated = last_updated
+            before = server.request_count
+            started = time.perf_counter()
+            report = sync.run(full=full, today=today)
+            elapsed = time.perf_counter() - started
+            print(f"\n== {label}: 服务器收到 {server.request_count - before} 个请求，耗时 {elapsed * 1000:.0f} ms")
+            print(report.summary())
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
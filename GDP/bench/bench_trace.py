@@ -0,0 +1,94 @@
+"""追踪的开销，以及一次界面查询的各阶段耗时
+
+1. 单个 span 的开销：未启用时（一次函数调用加一次 with，与空函数相当）与启用时；
+2. 经模拟服务器（延迟 --delay 秒）执行与界面相同的查询，比较关闭和打开
+   追踪时的总耗时，并打印各阶段的统计；
+3. --export 把打开追踪时的事件写成 Chrome trace JSON。
+
+    python bench/bench_trace.py --delay 0.05 --export trace.json
+"""
+import argparse
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+from api import trace
+from api.cache import IndicatorCache
+from api.indicators import INDICATORS
+from api.metrics import MetricEngine
+from stub_server import StubWorldBankServer
+from suite import COUNTRY_NAMES, new_client, run_query
+from ui.charts import ChartView
+
+
+def span_cost(calls=200_000):
+    """每次 with span(...) 的平均开销（纳秒）"""
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        pass
+    baseline = time.perf_counter_ns() - started
+    started = time.perf_counter_ns()
+    for _ in range(calls):
+        with trace.span("bench.noop"):
+            pass
+    return (time.perf_counter_ns() - started - baseline) / calls
+
+
+def queries(base_url, repeat):
+    """每次用新的客户端和空缓存执行单国和多国查询，返回最短耗时（毫秒）"""
+    indicators = list(INDICATORS.values())
+    chart = ChartView(figsize=(10, 12))
+    engine = MetricEngine()
+    best = float("inf")
+    for _ in range(repeat):
+        client = new_client(base_url, IndicatorCache(":memory:"))
+        client.get_country_index()
+        started = time.perf_counter()
+        run_query(client, chart, engine, COUNTRY_NAMES[:1], indicators)
+        run_query(client, chart, engine, COUNTRY_NAMES, indicators)
+        best = min(best, time.perf_counter() - started)
+        client.close()
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay", type=float, default=0.05, help="模拟的网络延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--export", help="Chrome trace JSON 的输出路径")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore", "Glyph .* missing")
+
+    trace.disable()
+    disabled = span_cost()
+    trace.enable()
+    enabled = span_cost()
+    trace.TRACER.clear()
+    print(f"span overhead: disabled {disabled:6.1f} ns   enabled {enabled:8.1f} ns")
+
+    with StubWorldBankServer(delay=args.delay) as server:
+        trace.disable()
+        off = queries(server.base_url, args.repeat)
+        trace.enable()
+        on = queries(server.base_url, args.repeat)
+    print(f"query (cold cache, {args.delay * 1000:.0f} ms delay): tracing off {off:7.1f} ms   "
+          f"on {on:7.1f} ms ({on / off - 1:+.1%})")
+
+    print(f"\n{'span':22s} {'count':>6s} {'mean ms':>9s} {'p95 ms':>9s} {'total ms':>10s}")
+    for row in trace.TRACER.summary():
+        print(f"{row['name']:22s} {row['count']:6d} {row['mean_ms']:9.2f} {row['p95_ms']:9.2f} "
+              f"{row['total_ms']:10.1f}")
+    if args.export:
+        trace.TRACER.export_chrome(args.export)
+        print(f"\nChrome trace: {args.export}")
+
+
+if __name__ == "__main__":
+    main()
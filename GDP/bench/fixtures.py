@@ -0,0 +1,85 @@
+"""录制与回放 World Bank API 的响应
+
+录制时 GdpClient 使用 RecordingTransport 访问真实的API，每个响应体按请求
+路径（含查询参数，与模拟服务器收到的 self.path 一致）保存下来，写入一个
+gzip 压缩的JSON文件。回放时把它作为 StubWorldBankServer 的 fixtures，
+客户端按完全相同的URL请求就会得到录制的响应，没有录制的请求仍由模拟
+服务器合成数据。
+
+    python bench/fixtures.py --out bench/fixtures/worldbank.json.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from api.transport import HttpTransport
+
+DEFAULT_FIXTURES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures",
+                                     "worldbank.json.gz")
+WORLD_BANK_URL = "https://api.worldbank.org/v2/"
+
+
+class RecordingTransport(HttpTransport):
+    """把每个成功响应的响应体按请求路径记录下来"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorded = {}
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        response = super().get(url, params=params, headers=headers, timeout=timeout, stream=stream)
+        if response.status_code == 200:
+            # 读出整个响应体；之后 iter_content 会直接按块返回已读取的内容
+            self.recorded[response.request.path_url] = response.content
+        return response
+
+
+def save_fixtures(recorded, path=DEFAULT_FIXTURES_PATH):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump({key: body.decode("utf-8") for key, body in recorded.items()}, f)
+
+
+def load_fixtures(path=DEFAULT_FIXTURES_PATH):
+    """返回 {请求路径: 响应体字节}，文件不存在时返回 None"""
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return {key: body.encode("utf-8") for key, body in json.load(f).items()}
+
+
+def record(scenario, base_url=WORLD_BANK_URL):
+    """对 base_url 执行 scenario(client)，返回录制到的 {请求路径: 响应体}"""
+    from api.gdp_client import GdpClient
+
+    transport = RecordingTransport()
+    client = GdpClient(transport=transport)
+    client.base_url = base_url
+    try:
+        scenario(client)
+    finally:
+        client.close()
+        transport.close()
+    return transport.recorded
+
+
+def main():
+    from suite import record_scenario
+
+    parser = argparse.ArgumentParser(description="录制基准测试用到的 World Bank API 响应")
+    parser.add_argument("--out", default=DEFAULT_FIXTURES_PATH)
+    parser.add_argument("--base-url", default=WORLD_BANK_URL)
+    args = parser.parse_args()
+
+    recorded = record(record_scenario, args.base_url)
+    save_fixtures(recorded, args.out)
+    size = sum(len(body) for body in recorded.values())
+    print(f"录制了 {len(recorded)} 个响应（{size / 1024:.0f} KB），写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
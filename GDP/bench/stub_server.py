@@ -0,0 +1,273 @@
+"""本地 World Bank API 模拟服务器，供基准测试使用
+
+返回与真实API格式一致的JSON（分页头 + 数据行），数值由国家和指标代码确定性
+生成，可以为每个请求加上固定延迟以模拟网络往返时间。
+"""
+import json
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+# 几个真实国家，其余用合成代码补足到约217个经济体
+REAL_COUNTRIES = [
+    ("CHN", "CN", "China", "EAS", "East Asia & Pacific", "UMC", "Upper middle income"),
+    ("USA", "US", "United States", "NAC", "North America", "HIC", "High income"),
+    ("JPN", "JP", "Japan", "EAS", "East Asia & Pacific", "HIC", "High income"),
+    ("DEU", "DE", "Germany", "ECS", "Europe & Central Asia", "HIC", "High income"),
+    ("IND", "IN", "India", "SAS", "South Asia", "LMC", "Lower middle income"),
+    ("GBR", "GB", "United Kingdom", "ECS", "Europe & Central Asia", "HIC", "High income"),
+    ("FRA", "FR", "France", "ECS", "Europe & Central Asia", "HIC", "High income"),
+    ("BRA", "BR", "Brazil", "LCN", "Latin America & Caribbean", "UMC", "Upper middle income"),
+    ("NGA", "NG", "Nigeria", "SSF", "Sub-Saharan Africa", "LMC", "Lower middle income"),
+    ("EGY", "EG", "Egypt, Arab Rep.", "MEA", "Middle East & North Africa", "LMC", "Lower middle income"),
+]
+REGIONS = [
+    ("EAS", "East Asia & Pacific"), ("ECS", "Europe & Central Asia"),
+    ("LCN", "Latin America & Caribbean"), ("MEA", "Middle East & North Africa"),
+    ("NAC", "North America"), ("SAS", "South Asia"), ("SSF", "Sub-Saharan Africa"),
+]
+INCOME_LEVELS = [
+    ("HIC", "High income"), ("UMC", "Upper middle income"),
+    ("LMC", "Lower middle income"), ("LIC", "Low income"),
+]
+N_COUNTRIES = 217
+LAST_UPDATED = "2024-06-28"
+
+
+def _country_list():
+    countries = []
+    for iso3, iso2, name, region, region_name, income, income_name in REAL_COUNTRIES:
+        countries.append(_country(iso3, iso2, name, region, region_name, income, income_name))
+    i = 0
+    while len(countries) < N_COUNTRIES:
+        iso2 = f"{i // 26}{chr(ord('A') + i % 26)}"
+        iso3 = f"X{chr(ord('A') + i // 26)}{chr(ord('A') + i % 26)}"
+        region, region_name = REGIONS[i % len(REGIONS)]
+        income, income_name = INCOME_LEVELS[i % len(INCOME_LEVELS)]
+        countries.append(_country(iso3, iso2, f"Country {i:03d}", region, region_name, income, income_name))
+        i += 1
+    # 地区汇总项，与真实API一样 region 为 "Aggregates"
+    for code, name in REGIONS:
+        countries.append({
+            "id": code, "iso2Code": code[:2], "name": name,
+            "region": {"id": "NA", "iso2code": "NA", "value": "Aggregates"},
+            "adminregion": {"id": "", "iso2code": "", "value": ""},
+            "incomeLevel": {"id": "NA", "iso2code": "NA", "value": "Aggregates"},
+            "lendingType": {"id": "", "iso2code": "", "value": "Aggregates"},
+            "capitalCity": "", "longitude": "", "latitude": "",
+        })
+    return countries
+
+
+def _country(iso3, iso2, name, region, region_name, income, income_name):
+    return {
+        "id": iso3, "iso2Code": iso2, "name": name,
+        "region": {"id": region, "iso2code": region[:2], "value": region_name},
+        "adminregion": {"id": "", "iso2code": "", "value": ""},
+        "incomeLevel": {"id": income, "iso2code": income[:2], "value": income_name},
+        "lendingType": {"id": "IBD", "iso2code": "XF", "value": "IBRD"},
+        "capitalCity": "", "longitude": "0", "latitude": "0",
+    }
+
+
+COUNTRIES = _country_list()
+COUNTRY_BY_CODE = {}
+for _c in COUNTRIES:
+    COUNTRY_BY_CODE[_c["id"]] = _c
+    COUNTRY_BY_CODE[_c["iso2Code"]] = _c
+
+
+def synthetic_value(country, indicator, year):
+    """确定性地生成某国某指标某年的数值，约6%的年份缺失"""
+    seed = zlib.crc32(f"{country}|{indicator}".encode())
+    if zlib.crc32(f"{seed}|{year}".encode()) % 17 == 0:
+        return None
+    if indicator.endswith(".ZG"):
+        return round((seed % 800) / 100.0 - 1.0 + ((year * 7 + seed) % 13) / 5.0, 4)
+    base = 1e9 + seed % 10 ** 12 if "MKTP" in indicator else 100 + seed % 50000
+    growth = 1.02 + (seed % 60) / 1000.0
+    return round(base * growth ** (year - 1960), 2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和响应体分两次写出；不关 Nagle 的话每个 keep-alive 请求都要多等一次延迟确认（约40ms）
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.request_count += 1
+            failing = server.failures > 0
+            if failing:
+                server.failures -= 1
+        if server.delay:
+            time.sleep(server.delay)
+        if failing:
+            message = [{"message": [{"id": str(server.failure_status), "key": "Service temporarily unavailable"}]}]
+            self._send(server.failure_status, json.dumps(message).encode(), {"Retry-After": "0"})
+            return
+
+        parsed = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        parts = [p for p in parsed.path.split("/") if p]
+        if parts and parts[0] == "v2":
+            parts = parts[1:]
+
+        fixture = server.fixtures.get(self.path)
+        if fixture is not None:
+            with server.lock:
+                server.fixture_hits += 1
+            body = fixture
+        elif parts == ["country"]:
+            body = self._paginate(COUNTRIES, query, server.last_updated)
+        elif len(parts) == 2 and parts[0] == "source":
+            last_updated = server.source_updated.get(parts[1], server.last_updated)
+            body = self._paginate([{"id": parts[1], "lastupdated": last_updated,
+                                    "name": "World Development Indicators", "code": "WDI",
+                                    "description": "", "url": "", "dataavailability": "Y",
+                                    "metadataavailability": "Y", "concepts": "3"}], query, last_updated)
+        elif len(parts) == 4 and parts[0] == "country" and parts[2] == "indicator":
+            body = self._indicator(parts[1], parts[3], query, server.last_updated)
+        else:
+            self._send(404, b'[{"message":[{"id":"120","key":"Invalid value"}]}]')
+            return
+        self._send(200, body if isinstance(body, bytes) else json.dumps(body).encode())
+
+    def _send(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    # _paginate 和 _indicator 不访问 self.server，基准测试可以在没有服务器的
+    # _Handler.__new__(_Handler) 上直接调用它们生成响应体
+    def _paginate(self, rows, query, last_updated=LAST_UPDATED):
+        per_page = int(query.get("per_page", 50))
+        page = int(query.get("page", 1))
+        total = len(rows)
+        pages = max((total + per_page - 1) // per_page, 1)
+        chunk = rows[(page - 1) * per_page: page * per_page]
+        header = {"page": page, "pages": pages, "per_page": per_page, "total": total,
+                  "sourceid": query.get("source"), "lastupdated": last_updated}
+        return [header, chunk]
+
+    def _indicator(self, country_part, indicator_part, query, last_updated=LAST_UPDATED):
+        start, end = 1960, 2023
+        if "date" in query:
+            start, end = (int(x) for x in query["date"].split(":"))
+        if country_part.lower() == "all":
+            countries = [c for c in COUNTRIES if c["region"]["value"] != "Aggregates"]
+        else:
+            countries = [COUNTRY_BY_CODE[c.upper()] for c in country_part.split(";") if c.upper() in COUNTRY_BY_CODE]
+
+        rows = []
+        for indicator in indicator_part.split(";"):
+            for country in countries:
+                for year in range(end, start - 1, -1):
+                    rows.append({
+                        "indicator": {"id": indicator, "value": indicator},
+                        "country": {"id": country["iso2Code"], "value": country["name"]},
+                        "countryiso3code": country["id"],
+                        "date": str(year),
+                        "value": synthetic_value(country["id"], indicator, year),
+                        "unit": "",
+                        "obs_status": "",
+                        "decimal": 0,
+                    })
+        return self._paginate(rows, query, last_updated)
+
+
+class StubWorldBankServer:
+    """在后台线程中运行的模拟服务器
+
+    用法：
+        with StubWorldBankServer(delay=0.1) as server:
+            client.base_url = server.base_url
+    """
+
+    def __init__(self, delay=0.0, port=0, fixtures=None, last_updated=LAST_UPDATED, failures=0, failure_status=503):
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.delay = delay
+        self.httpd.last_updated = last_updated  # 数据源元数据和分页头中的 lastupdated
+        self.httpd.source_updated = {}  # 数据源编号 -> 单独发布的 lastupdated
+        self.httpd.lock = threading.Lock()
+        self.httpd.request_count = 0
+        self.httpd.fixture_hits = 0
+        self.httpd.fixtures = fixtures or {}  # 请求路径 -> 录制好的响应体
+        self.httpd.failures = failures  # 接下来这么多个请求返回 failure_status（带 Retry-After: 0）
+        self.httpd.failure_status = failure_status
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_port}/v2/"
+
+    @property
+    def last_updated(self):
+        return self.httpd.last_updated
+
+    @last_updated.setter
+    def last_updated(self, value):
+        """模拟数据源发布了新版本"""
+        self.httpd.last_updated = value
+
+    def publish(self, source, last_updated):
+        """模拟某一个数据源发布了新版本，其余数据源不变"""
+        self.httpd.source_updated[str(source)] = last_updated
+
+    def fail(self, count, status=503):
+        """让接下来的 count 个请求失败，模拟限流（429）或服务暂时不可用（5xx）"""
+        with self.httpd.lock:
+            self.httpd.failures = count
+            self.httpd.failure_status = status
+
+    @property
+    def request_count(self):
+        return self.httpd.request_count
+
+    @property
+    def fixture_hits(self):
+        """用录制的响应回答的请求数"""
+        return self.httpd.fixture_hits
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地 World Bank API 模拟服务器")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的延迟（秒）")
+    parser.add_argument("--failures", type=int, default=0, help="前这么多个请求返回 503")
+    args = parser.parse_args()
+
+    server = StubWorldBankServer(delay=args.delay, port=args.port, failures=args.failures)
+    print(f"Serving on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
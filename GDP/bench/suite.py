@@ -0,0 +1,326 @@
+"""获取/绘图流程的基准测试套件
+
+回放录制好的 World Bank 响应（见 fixtures.py；没有录制文件时由模拟服务器
+合成数据），测量以下热点路径，每项报告多次运行的中位数、最小和最大耗时：
+
+  fetch.*      GdpClient 下载并解析一条序列、一个面板；不带缓存
+  parse.page   一整页响应的流式解析（不经过网络）
+  countries.*  国家索引构建、名称解析和下拉框逐键过滤（GdpApp 的过滤路径）
+  chart.*      GDPChart 的 create_*_figure 和查询结果的 ChartView 重绘（fetch_data 的绘图部分）
+  e2e.*        模拟 --delay 秒网络延迟下，一次界面查询从解析国家到图表绘制完成的耗时；
+               cold 每次用新的客户端和空缓存，warm 复用同一客户端
+
+结果连同提交号、版本和环境信息写入 JSON（默认 bench/results/<提交号>.json），
+--compare 与之前的结果对比，最小耗时（受机器负载影响最小）变慢超过 --threshold
+时以非零状态退出。
+
+    python bench/suite.py
+    python bench/suite.py --compare bench/results/abc1234.json
+    python bench/suite.py --only chart e2e --repeat 5
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import warnings
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+
+import matplotlib
+
+matplotlib.use("Agg")
+import numpy as np
+
+from api.cache import IndicatorCache
+from api.countries import CountryIndex, IncrementalFilter
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS
+from api.metrics import MetricEngine
+from api.series import Panel
+from api.stream import CHUNK_SIZE, PageParser
+from api.transport import HttpTransport
+from api.views import VIEWS
+from fixtures import DEFAULT_FIXTURES_PATH, load_fixtures
+from stub_server import REAL_COUNTRIES, StubWorldBankServer
+from ui.charts import ChartView, GDPChart, configure_fonts, query_specs
+
+DEFAULT_RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+# 录制和回放用同一组请求：只用真实API中也存在的国家代码
+COUNTRY_CODES = [row[0] for row in REAL_COUNTRIES]
+COUNTRY_NAMES = [row[2] for row in REAL_COUNTRIES]
+INDICATOR_CODES = [indicator.code for indicator in INDICATORS.values()]
+START_YEAR, END_YEAR = 1960, 2022
+QUERY_START, QUERY_END = 1990, 2022
+# 逐键输入的国家名称和用于名称解析的查询
+TYPED = ["united", "germany", "south", "chn"]
+RESOLVE = ["China", "CHN", "cn", "united states", "Untied States", "germny", "Brazil", "EGY"]
+# 至少变慢这么多毫秒才算退化，避免亚毫秒级测量的噪声
+MIN_REGRESSION_MS = 0.5
+
+
+def fetch_series(client):
+    return client._get_series("CHN", INDICATORS["GDP"].code, START_YEAR, END_YEAR)
+
+
+def fetch_panel(client):
+    return client.fetch_panel(COUNTRY_CODES, INDICATOR_CODES, START_YEAR, END_YEAR)
+
+
+def run_query(client, chart, engine, names, indicators, view=VIEWS["RAW"]):
+    """与 GdpApp.fetch_data -> _run_query -> _show_query_result 相同的步骤"""
+    countries = [[name, client.get_country_code(name)] for name in names]
+    pairs = [(code, indicator.code) for _, code in countries for indicator in indicators]
+    series = {(r.country_code, r.indicator): (r.years, r.values)
+              for r in client.fetch_many(pairs, QUERY_START, QUERY_END)}
+    panel = Panel.from_results(series, QUERY_START, QUERY_END, countries=[code for _, code in countries],
+                               indicators=[indicator.code for indicator in indicators])
+    query = {
+        'countries': countries,
+        'comparison_mode': len(countries) > 1,
+        'indicators': indicators,
+        'start_year': QUERY_START,
+        'end_year': QUERY_END,
+    }
+    chart.show(query_specs(query, engine.panel(view, panel), view))  # Agg 画布的 draw_idle 立即绘制
+    return panel
+
+
+def record_scenario(client):
+    """录制回放时会用到的全部请求（URL必须与回放时完全一致）"""
+    client.get_countries()
+    fetch_series(client)
+    fetch_panel(client)
+    indicators = list(INDICATORS.values())
+    client.fetch_many([(code, i.code) for code in COUNTRY_CODES[:1] for i in indicators], QUERY_START, QUERY_END)
+    client.fetch_many([(code, i.code) for code in COUNTRY_CODES for i in indicators], QUERY_START, QUERY_END)
+
+
+def measure(fn, repeat, setup=None):
+    """运行 repeat 次（另有一次不计时的预热），setup 的返回值作为 fn 的参数且不计时"""
+    timings = []
+    for i in range(repeat + 1):
+        args = setup() if setup else ()
+        started = time.perf_counter()
+        fn(*args)
+        elapsed = time.perf_counter() - started
+        if i:
+            timings.append(elapsed * 1000)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "runs": repeat,
+    }
+
+
+def new_client(base_url, cache=None):
+    client = GdpClient(cache=cache, transport=HttpTransport())
+    client.base_url = base_url
+    return client
+
+
+def bench_fetch(base_url, repeat):
+    client = new_client(base_url)
+    results = {
+        "fetch.series": measure(lambda: fetch_series(client), repeat),
+        "fetch.panel": measure(lambda: fetch_panel(client), repeat),
+    }
+    client.close()
+    return results
+
+
+def bench_parse(fixtures, repeat):
+    # 回放数据中最大的一页；没有录制文件时用模拟服务器合成同样规模的一页
+    if fixtures:
+        payload = max(fixtures.values(), key=len)
+    else:
+        from stub_server import _Handler
+        body = _Handler.__new__(_Handler)._indicator(";".join(COUNTRY_CODES), ";".join(INDICATOR_CODES),
+                                                     {"per_page": "1000", "date": f"{START_YEAR}:{END_YEAR}"})
+        payload = json.dumps(body, separators=(",", ":")).encode()
+
+    def parse():
+        chunks = (payload[i:i + CHUNK_SIZE] for i in range(0, len(payload), CHUNK_SIZE))
+        for _ in PageParser(chunks):
+            pass
+
+    return {"parse.page": dict(measure(parse, repeat), bytes=len(payload))}
+
+
+def bench_countries(base_url, repeat):
+    client = new_client(base_url)
+    countries = client.get_countries()
+    client.close()
+    index = CountryIndex(countries)
+
+    def resolve():
+        for query in RESOLVE:
+            index.resolve(query)
+
+    def type_names():
+        # 下拉框的过滤：每个按键一次 update，换一个名称时 reset
+        incremental = IncrementalFilter(index)
+        for word in TYPED:
+            incremental.reset()
+            for n in range(1, len(word) + 1):
+                incremental.update(word[:n])
+
+    return {
+        "countries.index": dict(measure(lambda: CountryIndex(countries), repeat), countries=len(countries)),
+        "countries.resolve": measure(resolve, repeat),
+        "countries.filter": measure(type_names, repeat),
+    }
+
+
+def bench_chart(base_url, repeat):
+    client = new_client(base_url)
+    panel = client.fetch_panel(COUNTRY_CODES, INDICATOR_CODES, QUERY_START, QUERY_END)
+    client.close()
+    chart = GDPChart.from_panel(COUNTRY_NAMES[0], panel, COUNTRY_CODES[0])
+
+    def draw(figure):
+        matplotlib.backends.backend_agg.FigureCanvasAgg(figure).draw()
+
+    indicators = list(INDICATORS.values())
+    view = VIEWS["RAW"]
+    single = {'countries': [[COUNTRY_NAMES[0], COUNTRY_CODES[0]]], 'comparison_mode': False,
+              'indicators': indicators, 'start_year': QUERY_START, 'end_year': QUERY_END}
+    compare = dict(single, countries=[list(pair) for pair in zip(COUNTRY_NAMES, COUNTRY_CODES)],
+                   comparison_mode=True)
+    view_chart = ChartView(figsize=(10, 12))
+
+    def alternate():
+        # 交替显示单国和多国对比，和界面上连续查询一样复用同一个 ChartView
+        view_chart.show(query_specs(single, panel, view))
+        view_chart.show(query_specs(compare, panel, view))
+
+    return {
+        "chart.gdp_figure": measure(lambda: draw(chart.create_figure()), repeat),
+        "chart.cpi_figure": measure(lambda: draw(chart.create_cpi_figure()), repeat),
+        "chart.combined_figure": measure(lambda: draw(chart.create_combined_figure()), repeat),
+        "chart.query_view": measure(alternate, repeat),
+    }
+
+
+def bench_e2e(base_url, repeat):
+    indicators = list(INDICATORS.values())
+    chart = ChartView(figsize=(10, 12))
+    engine = MetricEngine()
+
+    def cold_client():
+        client = new_client(base_url, IndicatorCache(":memory:"))
+        client.get_country_index()  # 国家列表在界面启动时已经加载
+        return (client,)
+
+    warm = cold_client()[0]
+    results = {}
+    for name, names in (("single", COUNTRY_NAMES[:1]), ("compare", COUNTRY_NAMES)):
+        results[f"e2e.{name}.cold"] = measure(lambda client: run_query(client, chart, engine, names, indicators),
+                                              repeat, setup=cold_client)
+        results[f"e2e.{name}.warm"] = measure(lambda: run_query(warm, chart, engine, names, indicators), repeat)
+    warm.close()
+    return results
+
+
+def environment(fixtures_path, fixtures, delay):
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BENCH_DIR, capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+        "platform": platform.platform(),
+        "fixtures": fixtures_path if fixtures else "synthetic",
+        "delay_ms": delay * 1000,
+    }
+
+
+def compare(baseline, current, threshold):
+    """打印对比表，返回变慢超过阈值的基准名称"""
+    regressions = []
+    print(f"\n{'benchmark (min)':28s} {'base ms':>10s} {'now ms':>10s} {'change':>8s}")
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:28s} {'-':>10s} {result['min_ms']:10.2f}      new")
+            continue
+        change = result["min_ms"] / before["min_ms"] - 1 if before["min_ms"] else 0.0
+        slower = change > threshold and result["min_ms"] - before["min_ms"] > MIN_REGRESSION_MS
+        if slower:
+            regressions.append(name)
+        print(f"{name:28s} {before['min_ms']:10.2f} {result['min_ms']:10.2f} {change:+8.1%}"
+              f"{'  <-- slower' if slower else ''}")
+    return regressions
+
+
+GROUPS = ("fetch", "parse", "countries", "chart", "e2e")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_PATH, help="录制的响应（fixtures.py 生成）")
+    parser.add_argument("--delay", type=float, default=0.05, help="e2e 的模拟网络延迟（秒）")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--only", nargs="*", choices=GROUPS, help="只运行这些组")
+    parser.add_argument("--out", help="结果文件，默认 bench/results/<提交号>.json")
+    parser.add_argument("--compare", help="与之前的结果文件对比")
+    parser.add_argument("--threshold", type=float, default=0.10, help="判定为退化的变慢比例")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", "Glyph .* missing")
+    configure_fonts()
+    fixtures = load_fixtures(args.fixtures)
+    groups = args.only or GROUPS
+    results = {}
+    with StubWorldBankServer(fixtures=fixtures) as server, \
+            StubWorldBankServer(delay=args.delay, fixtures=fixtures) as slow_server:
+        for group in groups:
+            started = time.perf_counter()
+            if group == "fetch":
+                results.update(bench_fetch(server.base_url, args.repeat))
+            elif group == "parse":
+                results.update(bench_parse(fixtures, args.repeat))
+            elif group == "countries":
+                results.update(bench_countries(server.base_url, args.repeat))
+            elif group == "chart":
+                results.update(bench_chart(server.base_url, args.repeat))
+            elif group == "e2e":
+                results.update(bench_e2e(slow_server.base_url, args.repeat))
+            print(f"{group}: {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        fixture_hits = server.fixture_hits + slow_server.fixture_hits
+
+    env = environment(args.fixtures, fixtures, args.delay)
+    env["fixture_hits"] = fixture_hits
+    report = {"environment": env, "results": results}
+    for name, result in results.items():
+        print(f"{name:28s} median {result['median_ms']:9.2f} ms   min {result['min_ms']:9.2f} ms")
+
+    out = args.out or os.path.join(DEFAULT_RESULTS_DIR, f"{env['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果写入 {out}（{'录制的响应' if fixtures else '合成数据'}）")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        if regressions:
+            print(f"变慢超过 {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""World Bank WDI 批量数据的离线导入与内存映射存储
+
+World Bank 提供完整的 WDI 数据包（WDI_CSV.zip，内含 WDICSV.csv，旧版为
+WDIData.csv）。import_wdi 逐行流式读取，不会把整个文件载入内存，数值按行
+写入一个 float64 二进制文件；BulkStore 用 np.memmap 打开它，任意
+国家/指标/年份的查询都只是内存映射上的切片，不需要复制数据。
+
+    python src/api/bulk.py WDI_CSV.zip --indicators NY.GDP.MKTP.CD NY.GDP.PCAP.CD FP.CPI.TOTL.ZG
+"""
+import csv
+import io
+import json
+import os
+import sys
+import zipfile
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.cache import DEFAULT_CACHE_DIR
+from api.series import Series, Panel, VALUE_DTYPE
+
+DEFAULT_STORE_DIR = os.path.join(DEFAULT_CACHE_DIR, "wdi")
+
+VALUES_FILE = "values.f64"
+# 导入时每行的 (国家序号, 指标序号)，int32，随数值按批写入，导入完成后删除
+KEYS_FILE = "keys.i32.tmp"
+INDEX_FILE = "index.npy"
+META_FILE = "meta.json"
+
+# 数据文件在ZIP中的名称（新版、旧版）
+DATA_MEMBERS = ("WDICSV.csv", "WDIData.csv")
+COUNTRY_MEMBERS = ("WDICountry.csv",)
+
+# 每攒够这么多行写一次磁盘，内存占用与文件大小无关
+WRITE_BATCH_ROWS = 4096
+
+
+def import_wdi(source_path, store_dir=DEFAULT_STORE_DIR, indicators=None, countries=None,
+               progress=None):
+    """把 WDI 的 CSV 或 ZIP 导入到 store_dir，返回 BulkStore
+
+    indicators / countries 可以限定只导入部分指标或国家（代码列表）。
+    progress(rows) 会在每写入一批数据后被调用。
+    """
+    wanted_indicators = set(indicators) if indicators else None
+    wanted_countries = {c.upper() for c in countries} if countries else None
+    os.makedirs(store_dir, exist_ok=True)
+
+    with _open_csv(source_path, DATA_MEMBERS) as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        year_columns = [i for i, name in enumerate(header) if name.strip().isdigit()]
+        years = [int(header[i]) for i in year_columns]
+        if not years or years != list(range(years[0], years[-1] + 1)):
+            raise ValueError("无法识别的WDI文件：年份列缺失或不连续")
+        first, last = year_columns[0], year_columns[-1] + 1
+
+        country_index = {}
+        indicator_index = {}
+        country_names = []
+        indicator_names = []
+        rows = 0
+        batch = np.empty((WRITE_BATCH_ROWS, len(years)), dtype=VALUE_DTYPE)
+        # 每行的 (国家序号, 指标序号) 与数值一起按批写入临时文件，不随行数在内存中增长
+        batch_keys = np.empty((WRITE_BATCH_ROWS, 2), dtype=np.int32)
+        filled = 0
+
+        tmp_path = os.path.join(store_dir, VALUES_FILE + ".tmp")
+        keys_path = os.path.join(store_dir, KEYS_FILE)
+        with open(tmp_path, "wb") as out, open(keys_path, "wb") as keys_out:
+            for record in reader:
+                if len(record) < last:
+                    continue
+                country_name, country_code, indicator_name, indicator_code = record[:4]
+                if wanted_indicators is not None and indicator_code not in wanted_indicators:
+                    continue
+                if wanted_countries is not None and country_code.upper() not in wanted_countries:
+                    continue
+
+                if country_code not in country_index:
+                    country_index[country_code] = len(country_names)
+                    country_names.append(country_name)
+                if indicator_code not in indicator_index:
+                    indicator_index[indicator_code] = len(indicator_names)
+                    indicator_names.append(indicator_name)
+                batch_keys[filled] = (country_index[country_code], indicator_index[indicator_code])
+                batch[filled] = [float(v) if v else np.nan for v in record[first:last]]
+                filled += 1
+                rows += 1
+                if filled == WRITE_BATCH_ROWS:
+                    batch.tofile(out)
+                    batch_keys.tofile(keys_out)
+                    filled = 0
+                    if progress:
+                        progress(rows)
+            batch[:filled].tofile(out)
+            batch_keys[:filled].tofile(keys_out)
+            if progress:
+                progress(rows)
+
+    # (国家, 指标) -> 行号，-1 表示没有这一行；键从磁盘映射，逐块填入
+    index = np.full((len(country_names), len(indicator_names)), -1, dtype=np.int32)
+    if rows:
+        pairs = np.memmap(keys_path, dtype=np.int32, mode="r", shape=(rows, 2))
+        for lo in range(0, rows, WRITE_BATCH_ROWS):
+            chunk = pairs[lo:lo + WRITE_BATCH_ROWS]
+            index[chunk[:, 0], chunk[:, 1]] = np.arange(lo, lo + len(chunk), dtype=np.int32)
+        del pairs
+    os.remove(keys_path)
+
+    meta = {
+        "years": [years[0], years[-1]],
+        "rows": rows,
+        "countries": [{"code": code, "name": country_names[i]} for code, i in country_index.items()],
+        "indicators": [{"code": code, "name": indicator_names[i]} for code, i in indicator_index.items()],
+    }
+    meta["countries"] = _attach_country_metadata(source_path, meta["countries"])
+
+    os.replace(tmp_path, os.path.join(store_dir, VALUES_FILE))
+    np.save(os.path.join(store_dir, INDEX_FILE), index)
+    with open(os.path.join(store_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return BulkStore(store_dir)
+
+
+class BulkStore:
+    """导入后的 WDI 数据，数值通过 np.memmap 按需从磁盘映射"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.start_year, self.end_year = meta["years"]
+        self.countries = meta["countries"]
+        self.indicators = meta["indicators"]
+        self.years = np.arange(self.start_year, self.end_year + 1, dtype=np.int16)
+
+        self._index = np.load(os.path.join(store_dir, INDEX_FILE))
+        self._country_index = {}
+        for i, country in enumerate(self.countries):
+            self._country_index[country["code"].upper()] = i
+            if country.get("iso2"):
+                self._country_index[country["iso2"].upper()] = i
+        self._indicator_index = {ind["code"]: i for i, ind in enumerate(self.indicators)}
+        self._values = None
+        self._rows = meta["rows"]
+
+    @classmethod
+    def open_default(cls):
+        """默认位置存在已导入的数据时返回 BulkStore，否则返回 None"""
+        if os.path.exists(os.path.join(DEFAULT_STORE_DIR, META_FILE)):
+            return cls(DEFAULT_STORE_DIR)
+        return None
+
+    @property
+    def values(self):
+        """全部数据的只读内存映射，形状为 (行数, 年份数)"""
+        if self._values is None:
+            shape = (self._rows, len(self.years))
+            if self._rows == 0:
+                self._values = np.empty(shape, dtype=VALUE_DTYPE)
+            else:
+                self._values = np.memmap(os.path.join(self.store_dir, VALUES_FILE),
+                                         dtype=VALUE_DTYPE, mode="r", shape=shape)
+        return self._values
+
+    def row(self, country_code, indicator):
+        """返回 (国家, 指标) 所在的行号，不存在时返回 None"""
+        ci = self._country_index.get(country_code.upper())
+        ii = self._indicator_index.get(indicator)
+        if ci is None or ii is None:
+            return None
+        row = int(self._index[ci, ii])
+        return row if row >= 0 else None
+
+    def has(self, country_code, indicator, start_year=None, end_year=None):
+        """数据中有 (国家, 指标)，并且覆盖 [start_year, end_year]（给出时）"""
+        return self.covers(start_year, end_year) and self.row(country_code, indicator) is not None
+
+    def covers(self, start_year=None, end_year=None):
+        return ((start_year is None or start_year >= self.start_year)
+                and (end_year is None or end_year <= self.end_year))
+
+    def series(self, country_code, indicator, start_year=None, end_year=None):
+        """返回 Series，其数值是内存映射的视图（零拷贝）；不存在时返回 None"""
+        row = self.row(country_code, indicator)
+        if row is None:
+            return None
+        lo, hi = self._columns(start_year, end_year)
+        return Series(self.years[lo:hi], self.values[row, lo:hi])
+
+    def panel(self, country_codes, indicators, start_year=None, end_year=None):
+        """取出多个国家 × 多个指标，返回 Panel（缺失的组合为 NaN）"""
+        lo, hi = self._columns(start_year, end_year)
+        rows = np.full((len(country_codes), len(indicators)), -1, dtype=np.int64)
+        for ci, country in enumerate(country_codes):
+            for ii, indicator in enumerate(indicators):
+                row = self.row(country, indicator)
+                if row is not None:
+                    rows[ci, ii] = row
+        data = np.full(rows.shape + (hi - lo,), np.nan)
+        present = rows >= 0
+        if present.any():
+            data[present] = self.values[rows[present], lo:hi]
+        return Panel(country_codes, indicators, self.years[lo:hi], data)
+
+    def _columns(self, start_year, end_year):
+        """[start_year, end_year] 与数据年份的交集对应的列 [lo, hi)，没有交集时为空"""
+        start_year = self.start_year if start_year is None else max(start_year, self.start_year)
+        end_year = self.end_year if end_year is None else min(end_year, self.end_year)
+        lo = start_year - self.start_year
+        return lo, max(lo, end_year - self.start_year + 1)
+
+
+def _open_csv(source_path, members):
+    """打开CSV文件，或ZIP包中名称匹配的成员，返回文本流"""
+    if zipfile.is_zipfile(source_path):
+        archive = zipfile.ZipFile(source_path)
+        for name in archive.namelist():
+            if os.path.basename(name) in members:
+                return _ZipText(archive, archive.open(name))
+        archive.close()
+        raise ValueError(f"ZIP中找不到数据文件: {', '.join(members)}")
+    return open(source_path, newline="", encoding="utf-8-sig")
+
+
+class _ZipText(io.TextIOWrapper):
+    """关闭时同时关闭ZIP包的文本流"""
+
+    def __init__(self, archive, raw):
+        super().__init__(raw, encoding="utf-8-sig", newline="")
+        self._archive = archive
+
+    def close(self):
+        super().close()
+        self._archive.close()
+
+
+def _attach_country_metadata(source_path, countries):
+    """ZIP中带有 WDICountry.csv 时补充ISO2代码、地区和收入组"""
+    if not zipfile.is_zipfile(source_path):
+        return countries
+    try:
+        handle = _open_csv(source_path, COUNTRY_MEMBERS)
+    except ValueError:
+        return countries
+
+    with handle:
+        extra = {}
+        for record in csv.DictReader(handle):
+            extra[record.get("Country Code", "")] = {
+                "iso2": record.get("2-alpha code", ""),
+                "region": record.get("Region", ""),
+                "income": record.get("Income Group", ""),
+            }
+    for country in countries:
+        country.update(extra.get(country["code"], {}))
+    return countries
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="把 World Bank WDI 批量数据导入为内存映射存储")
+    parser.add_argument("source", help="WDI_CSV.zip 或 WDICSV.csv")
+    parser.add_argument("--store", default=DEFAULT_STORE_DIR, help="存储目录")
+    parser.add_argument("--indicators", nargs="*", help="只导入这些指标代码")
+    parser.add_argument("--countries", nargs="*", help="只导入这些国家代码")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = import_wdi(args.source, args.store, args.indicators, args.countries,
+                       progress=lambda rows: print(f"\r已导入 {rows} 行", end="", flush=True))
+    print(f"\n完成：{len(store.countries)} 个国家，{len(store.indicators)} 个指标，"
+          f"{store.start_year}-{store.end_year}，用时 {time.perf_counter() - started:.1f} 秒")
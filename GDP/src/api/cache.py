@@ -0,0 +1,225 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+
+from api.trace import span
+
+# 默认缓存位置：用户目录下的 .gdp_analyzer
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".gdp_analyzer")
+DEFAULT_CACHE_PATH = os.path.join(DEFAULT_CACHE_DIR, "indicators.sqlite3")
+
+# World Bank 年度数据一年只更新几次，默认一周后重新验证
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+class CacheEntry:
+    """缓存中的一条指标序列（某国家某指标在连续年份区间内的数据）"""
+
+    def __init__(self, country, indicator, start_year, end_year, points,
+                 fetched_at, etag=None, last_modified=None):
+        self.country = country
+        self.indicator = indicator
+        self.start_year = start_year
+        self.end_year = end_year
+        self.points = points  # [(year, value), ...]，按年份升序，只含非空值
+        self.fetched_at = fetched_at
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def covers(self, start_year, end_year):
+        return self.start_year <= start_year and end_year <= self.end_year
+
+    def is_fresh(self, ttl, now=None):
+        now = time.time() if now is None else now
+        return now - self.fetched_at < ttl
+
+    def slice(self, start_year, end_year):
+        """从较宽的缓存区间中截取所需年份，返回 (years, values)"""
+        years = []
+        values = []
+        for year, value in self.points:
+            if start_year <= year <= end_year:
+                years.append(year)
+                values.append(value)
+        return years, values
+
+
+class IndicatorCache:
+    """基于SQLite的指标数据持久化缓存
+
+    以 (国家, 指标) 为主键保存已覆盖的年份区间，较窄的年份查询直接从较宽的
+    缓存区间中截取。内存中保留一份副本，重复查询无需访问磁盘。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, offline=False):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline  # 离线模式：不访问网络，过期数据照样返回
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._listeners = []  # 每次 put 之后以新条目调用，见 subscribe
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS series ("
+            " country TEXT NOT NULL,"
+            " indicator TEXT NOT NULL,"
+            " start_year INTEGER NOT NULL,"
+            " end_year INTEGER NOT NULL,"
+            " points TEXT NOT NULL,"
+            " fetched_at REAL NOT NULL,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " PRIMARY KEY (country, indicator))"
+        )
+        # 每个数据源上次同步时的 lastupdated（见 sync.py）
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " source TEXT PRIMARY KEY,"
+            " last_updated TEXT NOT NULL,"
+            " synced_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, country, indicator):
+        """返回 (国家, 指标) 的缓存条目，不存在时返回 None"""
+        key = (country.upper(), indicator)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry
+
+            with span("cache.load"):
+                row = self._conn.execute(
+                    "SELECT start_year, end_year, points, fetched_at, etag, last_modified"
+                    " FROM series WHERE country = ? AND indicator = ?",
+                    key,
+                ).fetchone()
+            if row is None:
+                return None
+
+            start_year, end_year, points, fetched_at, etag, last_modified = row
+            entry = CacheEntry(key[0], indicator, start_year, end_year,
+                               [tuple(p) for p in json.loads(points)],
+                               fetched_at, etag, last_modified)
+            self._memory[key] = entry
+            return entry
+
+    def lookup(self, country, indicator, start_year, end_year):
+        """返回覆盖所需年份区间的缓存条目（不论是否过期），否则返回 None"""
+        with span("cache.lookup") as traced:
+            entry = self.get(country, indicator)
+            if entry is not None and entry.covers(start_year, end_year):
+                return entry
+            traced.set(miss=True)
+            return None
+
+    def put(self, country, indicator, start_year, end_year, points,
+            etag=None, last_modified=None):
+        """写入新下载的数据
+
+        新区间与已缓存区间相交或相邻时合并为一个更宽的区间，新数据优先。
+        """
+        existing = self.get(country, indicator)
+        points = sorted(points)
+
+        if existing is not None and start_year <= existing.end_year + 1 and existing.start_year <= end_year + 1:
+            merged = {year: value for year, value in existing.points}
+            # 新区间内的旧数据全部以新数据为准（包括已被删除的年份）
+            for year in range(start_year, end_year + 1):
+                merged.pop(year, None)
+            merged.update(points)
+            points = sorted(merged.items())
+            start_year = min(start_year, existing.start_year)
+            end_year = max(end_year, existing.end_year)
+
+        entry = CacheEntry(country.upper(), indicator, start_year, end_year,
+                           points, time.time(), etag, last_modified)
+        self._store(entry)
+        for listener in self._listeners:
+            listener(entry)
+        return entry
+
+    def subscribe(self, listener):
+        """每次写入新下载的数据后在写入线程中调用 listener(entry)，如更新排名索引"""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def touch(self, entry, etag=None, last_modified=None):
+        """重新验证后数据未变化，只刷新获取时间"""
+        entry.fetched_at = time.time()
+        if etag:
+            entry.etag = etag
+        if last_modified:
+            entry.last_modified = last_modified
+        self._store(entry)
+        return entry
+
+    def ranges(self):
+        """返回全部缓存条目的 [(国家, 指标, start_year, end_year)]，不加载数据"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT country, indicator, start_year, end_year FROM series ORDER BY indicator, country"
+            ).fetchall()
+
+    def revalidate(self, pairs):
+        """确认一批 (国家, 指标) 的数据仍是最新的，只刷新获取时间，返回更新的条数"""
+        now = time.time()
+        keys = [(country.upper(), indicator) for country, indicator in pairs]
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None:
+                    entry.fetched_at = now
+            cursor = self._conn.executemany(
+                "UPDATE series SET fetched_at = ? WHERE country = ? AND indicator = ?",
+                [(now, country, indicator) for country, indicator in keys],
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    def source_updated(self, source):
+        """上次同步时数据源的 lastupdated，没有同步过时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_updated FROM sources WHERE source = ?", (str(source),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_source_updated(self, source, last_updated):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source, last_updated, synced_at) VALUES (?, ?, ?)",
+                (str(source), last_updated, time.time()),
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM series")
+            self._conn.execute("DELETE FROM sources")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _store(self, entry):
+        with self._lock, span("cache.store", points=len(entry.points)):
+            self._memory[(entry.country, entry.indicator)] = entry
+            self._conn.execute(
+                "INSERT OR REPLACE INTO series"
+                " (country, indicator, start_year, end_year, points, fetched_at, etag, last_modified)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.country, entry.indicator, entry.start_year, entry.end_year,
+                 json.dumps(entry.points), entry.fetched_at, entry.etag, entry.last_modified),
+            )
+            self._conn.commit()
@@ -0,0 +1,308 @@
+"""国家索引与分组
+
+CountryIndex 在国家列表上一次性建好名称/代码字典、别名和 n-gram 子串索引，
+按名称查代码是 O(1)，每次按键的过滤只需对少量候选做校验，而不是扫描全部
+名称。国家列表会缓存到磁盘，查不到的名称不会再触发网络请求。
+"""
+import difflib
+import heapq
+import json
+import os
+import time
+
+from api.cache import DEFAULT_CACHE_DIR
+
+# 常用国家集团（ISO3代码）
+COUNTRY_GROUPS = {
+    "G7": ["CAN", "FRA", "DEU", "ITA", "JPN", "GBR", "USA"],
+    "G20": ["ARG", "AUS", "BRA", "CAN", "CHN", "FRA", "DEU", "IND", "IDN", "ITA",
+            "JPN", "KOR", "MEX", "RUS", "SAU", "ZAF", "TUR", "GBR", "USA", "EUU"],
+    "金砖国家": ["BRA", "RUS", "IND", "CHN", "ZAF"],
+}
+
+DEFAULT_COUNTRIES_PATH = os.path.join(DEFAULT_CACHE_DIR, "countries.json")
+# 国家列表很少变化，磁盘缓存30天后再刷新
+COUNTRIES_TTL = 30 * 24 * 3600
+
+# 常见别名（小写） -> ISO3代码
+COUNTRY_ALIASES = {
+    "usa": "USA", "us": "USA", "america": "USA", "united states of america": "USA", "美国": "USA",
+    "prc": "CHN", "中国": "CHN",
+    "uk": "GBR", "britain": "GBR", "great britain": "GBR", "england": "GBR", "英国": "GBR",
+    "russia": "RUS", "俄罗斯": "RUS",
+    "south korea": "KOR", "korea": "KOR", "韩国": "KOR",
+    "north korea": "PRK",
+    "iran": "IRN", "egypt": "EGY", "syria": "SYR", "venezuela": "VEN",
+    "vietnam": "VNM", "turkey": "TUR", "hong kong": "HKG", "macau": "MAC",
+    "eu": "EUU", "european union": "EUU",
+    "日本": "JPN", "德国": "DEU", "法国": "FRA", "印度": "IND", "巴西": "BRA", "加拿大": "CAN",
+}
+
+# 子串索引使用的最大 n-gram 长度
+NGRAM = 3
+# 下拉列表最多显示的匹配数
+FILTER_LIMIT = 50
+# 候选超过全部名称的 1/DENSE_FRACTION 时按字母序逐个校验，而不是求交集、排序
+DENSE_FRACTION = 8
+
+_EMPTY = frozenset()
+
+# World Bank 国家列表中汇总项（地区、收入组等）的 region 取值
+AGGREGATES_REGION = "Aggregates"
+REGION_PREFIX = "地区: "
+
+
+def is_aggregate(country):
+    return country.get('region', {}).get('value') == AGGREGATES_REGION
+
+
+def group_names(countries_data):
+    """返回可选的分组名称：固定的国家集团 + 国家列表中出现的地区"""
+    regions = sorted({c['region']['value'] for c in countries_data
+                      if c.get('region') and not is_aggregate(c)})
+    return list(COUNTRY_GROUPS) + [REGION_PREFIX + region for region in regions]
+
+
+def group_members(countries_data, name):
+    """返回分组内的国家代码；地区分组根据国家元数据中的 region 字段计算"""
+    if name in COUNTRY_GROUPS:
+        return list(COUNTRY_GROUPS[name])
+    if name.startswith(REGION_PREFIX):
+        region = name[len(REGION_PREFIX):]
+        return [c['id'] for c in countries_data
+                if c.get('region', {}).get('value') == region and not is_aggregate(c)]
+    return []
+
+
+class CountryIndex:
+    """国家列表上的索引：名称/代码/别名精确查找、子串过滤和模糊匹配"""
+
+    def __init__(self, countries, saved_at=None):
+        self.countries = sorted(countries, key=lambda c: c['name'])
+        # 国家列表的获取时间；从磁盘快照加载时为快照的保存时间
+        self.saved_at = time.time() if saved_at is None else saved_at
+        self.names = [c['name'] for c in self.countries]
+        self._lower = [name.lower() for name in self.names]
+
+        # 精确查找：名称、ISO3、ISO2、别名（均为小写） -> 国家序号
+        self._exact = {}
+        for i, name in enumerate(self._lower):
+            self._exact[name] = i
+        for i, country in enumerate(self.countries):
+            for code in (country.get('id'), country.get('iso2Code')):
+                if code:
+                    self._exact.setdefault(code.lower(), i)
+        by_code = {c['id']: i for i, c in enumerate(self.countries)}
+        for alias, code in COUNTRY_ALIASES.items():
+            if code in by_code:
+                self._exact.setdefault(alias, by_code[code])
+
+        # 子串索引：每个长度不超过 NGRAM 的片段 -> 包含它的名称序号集合
+        self._grams = {}
+        for i, name in enumerate(self._lower):
+            for n in range(1, NGRAM + 1):
+                for j in range(len(name) - n + 1):
+                    self._grams.setdefault(name[j:j + n], set()).add(i)
+
+        # 名称开头、单词开头的前 NGRAM 个字符 -> 按字母序排列的国家序号
+        self._prefixes = {}
+        self._word_prefixes = {}
+        for i, name in enumerate(self._lower):
+            for n in range(1, NGRAM + 1):
+                self._prefixes.setdefault(name[:n], []).append(i)
+            for pos in range(1, len(name)):
+                if name[pos].isalnum() and not name[pos - 1].isalnum():
+                    for n in range(1, NGRAM + 1):
+                        ids = self._word_prefixes.setdefault(name[pos:pos + n], [])
+                        if not ids or ids[-1] != i:
+                            ids.append(i)
+
+        self._fuzzy_keys = list(self._exact)
+        self._all = frozenset(range(len(self.names)))
+
+    def __len__(self):
+        return len(self.countries)
+
+    def is_stale(self, ttl=COUNTRIES_TTL):
+        return time.time() - self.saved_at > ttl
+
+    def get(self, query):
+        """按名称、代码或别名精确查找国家，找不到时返回 None"""
+        i = self._exact.get(query.strip().lower())
+        return self.countries[i] if i is not None else None
+
+    def code(self, query):
+        """返回国家的ISO3代码（World Bank 的 id），找不到时返回 None"""
+        country = self.get(query)
+        return country['id'] if country else None
+
+    def name(self, code):
+        country = self.get(code)
+        return country['name'] if country else code
+
+    def search(self, query, limit=None):
+        """返回名称包含 query 的国家名称，按匹配程度排序：
+
+        代码/别名 > 完全相同 > 名称开头 > 某个单词开头 > 其他位置；同级按字母序。
+        """
+        query = query.strip().lower()
+        return [self.names[i] for i in self._rank(query, self._match_ids(query), limit)]
+
+    def _search_ids(self, query, limit=None):
+        query = query.strip().lower()
+        return self._rank(query, self._match_ids(query), limit)
+
+    def _match_ids(self, query, within=None):
+        """可能包含 query 的国家序号集合（给定 within 时只在其中查找）
+
+        不超过 NGRAM 个字符的查询本身就是索引中的片段，结果是精确的；更长的
+        查询只按 n-gram 求交集得到候选，是否真正包含 query 由 _rank 在取用时
+        校验。候选占全部名称的比例较大时不再求交集，直接用最小的一个集合，
+        由 _rank 按字母序逐个校验，取够 limit 个即停止。返回的集合可能就是
+        索引本身，调用方不能修改它。
+        """
+        if not query:
+            return self._all if within is None else within
+        if len(query) <= NGRAM:
+            ids = self._grams.get(query, _EMPTY)
+            return ids & within if within is not None else ids
+
+        sets = [self._grams.get(query[j:j + NGRAM], _EMPTY) for j in range(len(query) - NGRAM + 1)]
+        if within is not None:
+            sets.append(within)
+        sets.sort(key=len)
+        if len(sets[0]) * DENSE_FRACTION > len(self.names):
+            return sets[0]
+        # 从最小的集合开始求交集，结果不超过最小集合的大小
+        return sets[0].intersection(*sets[1:])
+
+    def _rank(self, query, matches, limit=None):
+        """按匹配程度取出前 limit 个真正包含 query 的国家序号
+
+        每一级只校验需要的候选，取够 limit 个即返回；不对全部匹配排序。
+        """
+        limit = limit or len(self.names) + 1
+        if not query:
+            return heapq.nsmallest(limit, matches)
+
+        ordered = []
+        seen = set()
+        lower = self._lower
+
+        def take(i):
+            if i not in seen:
+                seen.add(i)
+                ordered.append(i)
+            return len(ordered) >= limit
+
+        # 代码或别名命中的国家排在最前
+        exact = self._exact.get(query)
+        if exact is not None and take(exact):
+            return ordered
+        for i in self._prefixes.get(query[:NGRAM], ()):
+            if i in matches and lower[i].startswith(query) and take(i):
+                return ordered
+        for i in self._word_prefixes.get(query[:NGRAM], ()):
+            if i in matches and i not in seen and self._is_word_match(i, query) and take(i):
+                return ordered
+
+        # 其余按字母序（序号即字母序），只取还需要的个数
+        need = limit - len(ordered)
+        if len(matches) * DENSE_FRACTION > len(self.names):
+            for i in range(len(self.names)):
+                if i in matches and i not in seen and query in lower[i]:
+                    ordered.append(i)
+                    need -= 1
+                    if not need:
+                        break
+        else:
+            ordered.extend(heapq.nsmallest(need, (i for i in matches if i not in seen and query in lower[i])))
+        return ordered
+
+    def _is_word_match(self, i, query):
+        name = self._lower[i]
+        pos = name.find(query)
+        while pos > 0:
+            if not name[pos - 1].isalnum():
+                return True
+            pos = name.find(query, pos + 1)
+        return False
+
+    def fuzzy(self, query, limit=5, cutoff=0.6):
+        """容错匹配（拼写错误等），返回按相似度排序的国家名称"""
+        query = query.strip().lower()
+        names = []
+        for key in difflib.get_close_matches(query, self._fuzzy_keys, n=limit * 2, cutoff=cutoff):
+            name = self.names[self._exact[key]]
+            if name not in names:
+                names.append(name)
+        return names[:limit]
+
+    def resolve(self, query):
+        """把用户输入解析为国家：精确/别名 > 子串最佳匹配 > 模糊匹配，找不到时返回 None"""
+        if not query.strip():
+            return None
+        country = self.get(query)
+        if country is not None:
+            return country
+        ids = self._search_ids(query, limit=1)
+        if ids:
+            return self.countries[ids[0]]
+        fuzzy = self.fuzzy(query, limit=1)
+        return self.get(fuzzy[0]) if fuzzy else None
+
+    def save(self, path=DEFAULT_COUNTRIES_PATH):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": self.saved_at, "countries": self.countries}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=DEFAULT_COUNTRIES_PATH, ttl=None):
+        """从磁盘加载；文件不存在、损坏或超过 ttl 秒时返回 None"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        index = cls(data["countries"], saved_at=data.get("saved_at", 0))
+        if ttl is not None and index.is_stale(ttl):
+            return None
+        return index
+
+
+class IncrementalFilter:
+    """一个输入框的增量过滤状态
+
+    用户在上一次输入后继续追加字符时，只需在上一次的结果中继续筛选，
+    不必回到完整列表；返回结果截断为前 limit 个。
+    """
+
+    def __init__(self, index, limit=FILTER_LIMIT):
+        self.index = index
+        self.limit = limit
+        self.last_duration = 0.0  # 上一次过滤耗时（秒）
+        self.max_duration = 0.0
+        self._query = None
+        self._matches = None
+
+    def update(self, query):
+        """返回与 query 匹配的前 limit 个国家名称"""
+        started = time.perf_counter()
+        query = query.strip().lower()
+        if self._query and query.startswith(self._query):
+            matches = self.index._match_ids(query, within=self._matches)
+        else:
+            matches = self.index._match_ids(query)
+        self._query = query
+        self._matches = matches
+
+        names = [self.index.names[i] for i in self.index._rank(query, matches, self.limit)]
+        self.last_duration = time.perf_counter() - started
+        self.max_duration = max(self.max_duration, self.last_duration)
+        return names
+
+    def reset(self):
+        self._query = None
+        self._matches = None
@@ -2,100 +2,519 @@ import requests
 import json
 from datetime import datetime
 
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from api.countries import CountryIndex, COUNTRIES_TTL
+from api.inflight import FlightTable
+from api.indicators import INDICATORS, get_indicator
+from api.series import Panel, Series
+from api.stream import CHUNK_SIZE, PageParser
+from api.trace import span
+from api.transport import get_default_transport
+
+GDP_INDICATOR = INDICATORS["GDP"].code  # GDP (current US$)
+GDP_PER_CAPITA_INDICATOR = INDICATORS["GDP_PER_CAPITA"].code  # GDP per capita (current US$)
+CPI_INDICATOR = INDICATORS["CPI"].code  # 消费者价格指数，年度百分比变化
+
+# 并发请求数上限的默认值
+DEFAULT_MAX_WORKERS = 6
+# 每页行数；响应的分页头会告诉我们总页数
+PER_PAGE = 1000
+# 一个URL中最多合并的国家数，避免URL过长
+MAX_COUNTRIES_PER_REQUEST = 50
+# 国家列表在 single-flight 表中的键
+COUNTRY_LIST_KEY = ("country", None)
+
+
+class FetchResult:
+    """fetch_many 返回的单条结果"""
+    
+    def __init__(self, country_code, indicator, years=None, values=None, error=None):
+        self.country_code = country_code
+        self.indicator = indicator
+        self.years = years or []
+        self.values = values or []
+        self.error = error  # 请求失败时为异常对象
+        
+    @property
+    def ok(self):
+        return self.error is None
+
+
 class GdpClient:
     """处理与World Bank API的通信，获取GDP和其他经济数据"""
     
-    def __init__(self):
+    def __init__(self, cache=None, transport=None, max_workers=DEFAULT_MAX_WORKERS, store=None,
+                 countries_path=None):
         self.base_url = "https://api.worldbank.org/v2/"
+        self.transport = transport or get_default_transport()
+        self.cache = cache  # 可选的 IndicatorCache，为 None 时每次都访问网络
+        self.store = store  # 可选的 BulkStore（离线导入的WDI数据）或 PanelStore（导出的面板文件），优先于缓存和网络
+        self.max_workers = max_workers
+        self.countries_path = countries_path  # 国家列表的磁盘缓存位置，为 None 时只保存在内存中
+        self._executor = None
+        self._country_index = None
+        self._flights = FlightTable()  # 进行中的下载，并发的相同请求共用一次
         
-    def get_country_code(self, country_name):
-        """获取国家代码"""
-        url = f"{self.base_url}country?format=json&per_page=300"
-        response = requests.get(url)
-        data = response.json()
+    def get_countries(self):
+        """获取完整的国家（及地区汇总项）列表，包含 region、incomeLevel 等元数据"""
+        rows, _ = self._fetch_rows(f"{self.base_url}country?format=json")
+        return rows or []
+        
+    def get_country_index(self, refresh=False, stale_ok=False):
+        """返回国家索引：内存 > 磁盘缓存 > 网络，只在第一次或 refresh 时下载国家列表
+
+        stale_ok 为 True 时磁盘上过期的快照也直接返回，调用方可以先用它，
+        再在后台用 refresh=True 更新（见 CountryIndex.is_stale）。
+        """
+        if self._country_index is not None and not refresh:
+            return self._country_index
+        # 界面加载国家列表和查询线程解析国家名称可能同时走到这里，只下载一次
+        def load(keys, start_year, end_year):
+            return {COUNTRY_LIST_KEY: self._load_country_index(refresh, stale_ok)}
+
+        return self._shared_download([COUNTRY_LIST_KEY], None, None, load)[COUNTRY_LIST_KEY]
+
+    def _load_country_index(self, refresh, stale_ok):
+        index = None
+        if self.countries_path and not refresh:
+            index = CountryIndex.load(self.countries_path, ttl=None if stale_ok else COUNTRIES_TTL)
+        if index is None:
+            index = CountryIndex(self.get_countries())
+            if self.countries_path:
+                index.save(self.countries_path)
+        self._country_index = index
+        return index
         
-        if not data or len(data) < 2:
+    def get_source_updated(self, source):
+        """返回数据源元数据中的 lastupdated（如 "2024-06-28"），没有时返回 None"""
+        data = self.transport.get_json(f"{self.base_url}source/{source}?format=json")
+        if not data or len(data) < 2 or not data[1]:
             return None
-            
-        countries = data[1]
-        for country in countries:
-            if country_name.lower() in country['name'].lower():
-                return country['id']
-        return None
+        return data[1][0].get('lastupdated') or None
+
+    def request_stats(self):
+        """返回请求合并的统计：hits（本地命中的序列数）、coalesced（等待其他线程
+        下载的序列数）、issued（实际发起的下载数）、widened（因区间重叠而扩大的下载数）"""
+        return self._flights.stats()
+
+    def get_country_code(self, country_name):
+        """获取国家代码（名称、代码、别名或近似拼写均可），找不到时返回 None"""
+        country = self.get_country_index().resolve(country_name)
+        return country['id'] if country else None
     
     def get_gdp_data(self, country_code, start_year=1990, end_year=2022):
         """获取指定国家在给定年份范围内的GDP数据"""
-        indicator = "NY.GDP.MKTP.CD"  # GDP (current US$)
-        url = f"{self.base_url}country/{country_code}/indicator/{indicator}?format=json&date={start_year}:{end_year}&per_page=100"
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if not data or len(data) < 2:
-            return [], []
-            
-        # 数据排序（因为API返回的是倒序）
-        data_points = data[1]
-        data_points.sort(key=lambda x: x['date'])
-        
-        years = []
-        values = []
-        
-        for point in data_points:
-            if point['value'] is not None:
-                years.append(int(point['date']))
-                values.append(float(point['value']))
-                
-        return years, values
+        return self._get_series(country_code, GDP_INDICATOR, start_year, end_year)
     
     def get_gdp_per_capita_data(self, country_code, start_year=1990, end_year=2022):
         """获取指定国家在给定年份范围内的人均GDP数据"""
-        indicator = "NY.GDP.PCAP.CD"  # GDP per capita (current US$)
-        url = f"{self.base_url}country/{country_code}/indicator/{indicator}?format=json&date={start_year}:{end_year}&per_page=100"
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if not data or len(data) < 2:
+        return self._get_series(country_code, GDP_PER_CAPITA_INDICATOR, start_year, end_year)
+
+    def get_cpi_data(self, country_code, start_year, end_year):
+ 
+        try:
+            return self._get_series(country_code, CPI_INDICATOR, start_year, end_year)
+            
+        except Exception as e:
+            print(f"获取CPI数据出错: {str(e)}")
             return [], []
+
+    def get_indicator_data(self, country_code, indicator, start_year, end_year):
+        """获取任意已注册指标（界面标识或指标代码均可）的数据，返回 (years, values)"""
+        return self._get_series(country_code, get_indicator(indicator).code, start_year, end_year)
+
+    def get_series(self, country_code, indicator, start_year, end_year):
+        """获取一条指标序列，返回对齐到 [start_year, end_year] 的 Series"""
+        years, values = self.get_indicator_data(country_code, indicator, start_year, end_year)
+        return Series.from_lists(years, values, start_year, end_year)
+
+    def fetch_panel(self, country_codes, indicators, start_year, end_year):
+        """批量获取多个国家 × 多个指标，返回按年份对齐的 Panel"""
+        codes = [get_indicator(i).code for i in indicators]
+        in_store = self.store is not None and all(self.store.has(c, i, start_year, end_year)
+                                                  for c in country_codes for i in codes)
+        if in_store:
+            # 全部在离线数据中时直接从内存映射中取出
+            return self.store.panel(list(dict.fromkeys(country_codes)), list(dict.fromkeys(codes)),
+                                    start_year, end_year)
+        results = self.get_panel(country_codes, codes, start_year, end_year)
+        return Panel.from_results(results, start_year, end_year,
+                                  countries=list(dict.fromkeys(country_codes)),
+                                  indicators=list(dict.fromkeys(codes)))
+
+    def get_indicators_data(self, country_code, indicators, start_year, end_year):
+        """一次获取同一国家的多个指标，返回 {指标代码: (years, values)}"""
+        panel = self.get_panel([country_code], indicators, start_year, end_year)
+        return {code: data for (_, code), data in panel.items()}
+
+    def get_panel(self, country_codes, indicators, start_year, end_year):
+        """批量获取多个国家 × 多个指标，返回 {(国家代码, 指标代码): (years, values)}
+
+        缓存中已有的序列直接返回，其余同一数据源的序列合并成
+        country/A;B;C/indicator/X;Y;Z 请求（国家过多时按批拆分），并完整地
+        按分页获取，20个国家 × 3个指标只需一两个HTTP请求。
+        """
+        codes = [get_indicator(i).code for i in indicators]
+        return self.get_pairs([(country, code) for country in country_codes for code in codes],
+                              start_year, end_year)
+
+    def get_pairs(self, pairs, start_year, end_year):
+        """批量获取任意一组 (国家代码, 指标) 组合，返回 {(国家代码, 指标代码): (years, values)}
+
+        与 get_panel 相同，但不要求是国家 × 指标的完整组合：合并请求时只把需要
+        同一组指标的国家放进同一个请求，不会下载没有请求的组合。
+        """
+        pairs = list(dict.fromkeys((country, get_indicator(code).code) for country, code in pairs))
+        results = {}
+        missing = []
+        for country, code in pairs:
+            if self.store is not None and self.store.has(country, code, start_year, end_year):
+                results[(country, code)] = self.store.series(country, code, start_year, end_year).to_lists()
+                continue
+            entry = self.cache.lookup(country, code, start_year, end_year) if self.cache else None
+            if entry is not None and (self.cache.offline or entry.is_fresh(self.cache.ttl)):
+                results[(country, code)] = entry.slice(start_year, end_year)
+            else:
+                missing.append((country, code))
+        self._flights.record_hits(len(results))
+                    
+        if missing and self.cache is not None and self.cache.offline:
+            for country, code in missing:
+                partial = self.cache.get(country, code)
+                results[(country, code)] = partial.slice(start_year, end_year) if partial else ([], [])
+            return results
             
-        data_points = data[1]
-        data_points.sort(key=lambda x: x['date'])
-        
-        years = []
-        values = []
-        
-        for point in data_points:
-            if point['value'] is not None:
-                years.append(int(point['date']))
-                values.append(float(point['value']))
+        if len(missing) == 1:
+            country, code = missing[0]
+            results[(country, code)] = self._get_series(country, code, start_year, end_year)
+            return results
+            
+        for source, batch in _batches(missing):
+            try:
+                downloaded = self._fetch_panel_points(batch, source, start_year, end_year)
+            except requests.RequestException:
+                # 网络不可用时使用过期数据
+                stale = [self.cache.get(country, code) if self.cache else None for country, code in batch]
+                if any(entry is None for entry in stale):
+                    raise
+                for pair, entry in zip(batch, stale):
+                    results[pair] = entry.slice(start_year, end_year)
+                continue
                 
-        return years, values
+            for pair in batch:
+                results[pair] = _slice_points(downloaded.get(pair, []), start_year, end_year)
+        return results
 
-    def get_cpi_data(self, country_code, start_year, end_year):
- 
-        # CPI指标代码: FP.CPI.TOTL.ZG (消费者价格指数，年度百分比变化)
-        indicator = "FP.CPI.TOTL.ZG"
+    def refresh(self, pairs, start_year, end_year):
+        """不论缓存是否新鲜，重新下载一批 (国家代码, 指标代码) 在 [start_year, end_year]
+        的数据并合并进缓存（区间外已缓存的年份保持不变）
+
+        与 get_pairs 一样按数据源和指标组合分组、按国家分批合并请求。
+        """
+        for source, batch in _batches(dict.fromkeys(pairs)):
+            self._fetch_panel_points(batch, source, start_year, end_year)
+
+    def fetch_many(self, requests_list, start_year, end_year, max_workers=None):
+        """并发获取多个 (国家代码, 指标代码) 序列，按完成顺序逐个产出 FetchResult
+
+        请求按国家分批合并为批量请求（见 get_pairs），各批在有界线程池中执行，
+        并发数不超过 max_workers（默认取 self.max_workers）。
+        单个请求失败不会中断其余请求，错误保存在 FetchResult.error 中。
+        """
+        groups = {}
+        for country_code, indicator in dict.fromkeys(requests_list):  # 去重并保持顺序
+            groups.setdefault(country_code, []).append(indicator)
+        if not groups:
+            return
+            
+        countries = list(groups)
+        batches = [countries[i:i + MAX_COUNTRIES_PER_REQUEST]
+                   for i in range(0, len(countries), MAX_COUNTRIES_PER_REQUEST)]
+            
+        executor = self._get_executor()
+        limit = max_workers or self.max_workers
+        pending = iter(batches)
+        futures = {}
         
-        url = f"{self.base_url}/country/{country_code}/indicator/{indicator}?format=json&date={start_year}:{end_year}&per_page=100"
+        def submit_next():
+            batch = next(pending, None)
+            if batch is not None:
+                pairs = [(country, indicator) for country in batch for indicator in groups[country]]
+                future = executor.submit(self.get_pairs, pairs, start_year, end_year)
+                futures[future] = batch
         
+        # 同时在途的请求不超过 limit 个，完成一个再补交一个
+        for _ in range(min(limit, len(batches))):
+            submit_next()
+            
+        while futures:
+            done, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = futures.pop(future)
+                submit_next()
+                try:
+                    data = future.result()
+                except Exception as e:
+                    for country_code in batch:
+                        for indicator in groups[country_code]:
+                            yield FetchResult(country_code, indicator, error=e)
+                    continue
+                for country_code in batch:
+                    for indicator in groups[country_code]:
+                        years, values = data[(country_code, get_indicator(indicator).code)]
+                        yield FetchResult(country_code, indicator, years, values)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                thread_name_prefix="gdp-fetch")
+        return self._executor
+
+    def _get_series(self, country_code, indicator, start_year, end_year):
+        """先查本地数据，未命中或过期时再访问网络，返回 (years, values)"""
+        if self.store is not None and self.store.has(country_code, indicator, start_year, end_year):
+            self._flights.record_hits()
+            return self.store.series(country_code, indicator, start_year, end_year).to_lists()
+            
+        if self.cache is None:
+            points = self._fetch_series(country_code, indicator, start_year, end_year)
+            return _slice_points(points, start_year, end_year)
+            
+        entry = self.cache.lookup(country_code, indicator, start_year, end_year)
+        if entry is not None and (self.cache.offline or entry.is_fresh(self.cache.ttl)):
+            self._flights.record_hits()
+            return entry.slice(start_year, end_year)
+            
+        if entry is None and self.cache.offline:
+            # 离线模式下退而求其次：返回部分覆盖的旧数据
+            partial = self.cache.get(country_code, indicator)
+            return partial.slice(start_year, end_year) if partial else ([], [])
+            
         try:
-            response = requests.get(url)
-            data = response.json()
+            if entry is not None:
+                # 缓存已过期：带条件请求头重新验证整个缓存区间
+                points = self._fetch_series(country_code, indicator, entry.start_year, entry.end_year, entry)
+            else:
+                points = self._fetch_series(country_code, indicator, start_year, end_year)
+            return _slice_points(points, start_year, end_year)
             
-            if not data or len(data) < 2 or not data[1]:
-                return [], []
-                
-            years = []
-            cpi_values = []
+        except requests.RequestException:
+            # 网络不可用时使用过期数据
+            stale = self.cache.get(country_code, indicator)
+            if stale is None:
+                raise
+            return stale.slice(start_year, end_year)
+
+    def _shared_download(self, keys, start_year, end_year, download):
+        """经 single-flight 表下载一组键，返回 {键: 结果}
+
+        已有覆盖所需区间的下载在进行中的键直接等待其结果（区间重叠时扩大那次
+        下载），其余的键合并为一次下载：download(keys, start_year, end_year) 在
+        当前线程中执行。下载期间其他线程扩大了区间时，再用一次 download 下载
+        扩大后的整个区间，区间因此可能比请求的更宽。
+        """
+        joined, flight = self._flights.claim(keys, start_year, end_year)
+        results = {}
+        if flight is not None:
+            start, end = start_year, end_year
+            try:
+                while True:
+                    with span("client.download", keys=len(flight.keys), start=start, end=end):
+                        downloaded = download(flight.keys, start, end)
+                    widened = self._flights.finish(flight, downloaded, start, end)
+                    if widened is None:
+                        break
+                    start, end = widened
+            except BaseException as e:
+                self._flights.fail(flight, e)
+                raise
+            results.update(downloaded)
+        if joined:
+            # 等待其他线程进行中的同一下载
+            with span("client.wait", keys=len(joined)):
+                for key, other in joined.items():
+                    results[key] = other.result()[key]
+        return results
+
+    def _fetch_series(self, country_code, indicator, start_year, end_year, entry=None):
+        """下载一条序列并写入缓存，返回覆盖 [start_year, end_year] 的 points
+
+        entry 为过期的缓存条目时带条件请求头重新验证，304 时沿用缓存的数据。
+        """
+        key = (country_code, indicator)
+
+        def download(keys, start, end):
+            # 区间被扩大后URL不同，缓存的 ETag 不再适用
+            conditional = entry is not None and (entry.start_year, entry.end_year) == (start, end)
+            points, etag, last_modified = self._download_series(
+                country_code, indicator, start, end,
+                etag=entry.etag if conditional else None,
+                last_modified=entry.last_modified if conditional else None)
+            if self.cache is None:
+                return {key: points}
+            if points is None:
+                return {key: self.cache.touch(entry, etag, last_modified).points}
+            return {key: self.cache.put(country_code, indicator, start, end, points, etag, last_modified).points}
+
+        return self._shared_download([key], start_year, end_year, download)[key]
+
+    def _fetch_panel_points(self, pairs, source, start_year, end_year):
+        """下载同一数据源的一批 (国家代码, 指标代码) 并写入缓存，返回 {pair: points}"""
+        def download(keys, start, end):
+            countries = list(dict.fromkeys(country for country, _ in keys))
+            codes = list(dict.fromkeys(code for _, code in keys))
+            downloaded = self._download_panel(countries, codes, source, start, end)
+            results = {}
+            for country, code in keys:
+                points = downloaded.get((country, code), [])
+                if self.cache is not None:
+                    points = self.cache.put(country, code, start, end, points).points
+                results[(country, code)] = points
+            return results
+
+        return self._shared_download(pairs, start_year, end_year, download)
+
+    def _download_series(self, country_code, indicator, start_year, end_year, etag=None, last_modified=None):
+        """下载一条指标序列，返回 (points, etag, last_modified)
+
+        带条件请求头且服务端返回 304 时 points 为 None。
+        """
+        url = f"{self.base_url}country/{country_code}/indicator/{indicator}?format=json&date={start_year}:{end_year}"
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
             
-            for item in reversed(data[1]):
-                if item['value'] is not None:
-                    years.append(int(item['date']))
-                    cpi_values.append(float(item['value']))
-                    
-            return years, cpi_values
+        rows, response = self._stream_rows(url, headers=headers)
+        etag = response.headers.get('ETag', etag)
+        last_modified = response.headers.get('Last-Modified', last_modified)
+        if rows is None:
+            return None, etag, last_modified
             
-        except Exception as e:
-            print(f"获取CPI数据出错: {str(e)}")
-            return [], []
\ No newline at end of file
+        points = [(int(row.date), row.value) for row in rows]
+        
+        # 数据排序（因为API返回的是倒序）
+        points.sort()
+        return points, etag, last_modified
+
+    def _download_panel(self, country_codes, codes, source, start_year, end_year):
+        """用一个请求（及其后续分页）下载多个国家 × 同一数据源的多个指标
+
+        返回 {(国家代码, 指标代码): points}，国家代码与传入的一致。
+        """
+        country_part = ";".join(country_codes)
+        indicator_part = ";".join(codes)
+        url = (f"{self.base_url}country/{country_part}/indicator/{indicator_part}"
+               f"?format=json&source={source}&date={start_year}:{end_year}")
+        rows, _ = self._stream_rows(url)
+        
+        # 响应中同时有ISO3 (countryiso3code) 和ISO2 (country.id)，映射回请求时用的代码
+        requested = {code.upper(): code for code in country_codes}
+        points = {}
+        for row in rows:
+            country = requested.get(row.iso3.upper()) or requested.get(row.country.upper())
+            if country is None:
+                continue
+            points.setdefault((country, row.indicator), []).append((int(row.date), row.value))
+        for series in points.values():
+            series.sort()
+        return points
+
+    def _fetch_rows(self, url, headers=None):
+        """按分页头获取全部数据行，返回 (rows, 第一页的响应)
+
+        服务端对条件请求返回 304 时 rows 为 None。
+        """
+        response = self.transport.get(f"{url}&per_page={PER_PAGE}&page=1", headers=headers)
+        if response.status_code == 304:
+            return None, response
+        response.raise_for_status()
+        
+        data = response.json()
+        if not data or len(data) < 2 or not data[1]:
+            return [], response
+            
+        rows = list(data[1])
+        pages = int(data[0].get('pages') or 1)
+        for page in range(2, pages + 1):
+            more = self.transport.get_json(f"{url}&per_page={PER_PAGE}&page={page}")
+            if more and len(more) >= 2 and more[1]:
+                rows.extend(more[1])
+        return rows, response
+
+    def _stream_rows(self, url, headers=None):
+        """与 _fetch_rows 相同的分页获取，但边下载边解析，返回 (行迭代器, 第一页的响应)
+
+        响应体按块读取并逐行解析（见 api.stream），不把整页解码成字典列表；
+        迭代器产出 api.stream.Row，数值为 null 的行已跳过，读完一页才请求下一页。
+        服务端对条件请求返回 304 时迭代器为 None。
+        """
+        response = self.transport.get(f"{url}&per_page={PER_PAGE}&page=1", headers=headers, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return None, response
+        try:
+            response.raise_for_status()
+            page = PageParser(self.transport.iter_content(response, CHUNK_SIZE))
+        except Exception:
+            response.close()
+            raise
+        return self._iter_pages(url, page, response), response
+
+    def _iter_pages(self, url, page, response):
+        # client.page 为读取并解析一页的时间，其中等待网络的部分是嵌套的 http.read
+        try:
+            with span("client.page", page=1) as traced:
+                yield from page
+                traced.set(rows=page.rows_seen)
+        finally:
+            response.close()
+        pages = int(page.header.get('pages') or 1)
+        for number in range(2, pages + 1):
+            response = self.transport.get(f"{url}&per_page={PER_PAGE}&page={number}", stream=True)
+            try:
+                response.raise_for_status()
+                with span("client.page", page=number) as traced:
+                    page = PageParser(self.transport.iter_content(response, CHUNK_SIZE))
+                    yield from page
+                    traced.set(rows=page.rows_seen)
+            finally:
+                response.close()
+
+
+def _batches(pairs):
+    """把 (国家代码, 指标代码) 组合分成可以合并为一个请求的批次，产出 (数据源, [组合])
+
+    country/A;B/indicator/X;Y 请求的是国家与指标的完整组合，所以同一批中的
+    国家需要完全相同的一组指标（同一数据源），这样不会下载没有请求的组合；
+    国家过多时再按 MAX_COUNTRIES_PER_REQUEST 拆分。
+    """
+    by_source = {}
+    for country, code in pairs:
+        by_source.setdefault(get_indicator(code).source, {}).setdefault(country, []).append(code)
+    for source, codes_by_country in by_source.items():
+        by_codes = {}
+        for country, codes in codes_by_country.items():
+            by_codes.setdefault(tuple(sorted(codes)), []).append(country)
+        for codes, countries in by_codes.items():
+            for i in range(0, len(countries), MAX_COUNTRIES_PER_REQUEST):
+                yield source, [(country, code) for country in countries[i:i + MAX_COUNTRIES_PER_REQUEST]
+                               for code in codes]
+
+
+def _slice_points(points, start_year, end_year):
+    """从 points 中截取 [start_year, end_year]，返回 (years, values)"""
+    return _split_points([(year, value) for year, value in points if start_year <= year <= end_year])
+
+
+def _split_points(points):
+    years = [year for year, _ in points]
+    values = [value for _, value in points]
+    return years, values
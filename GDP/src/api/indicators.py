@@ -0,0 +1,92 @@
+"""World Bank 指标注册表
+
+每个指标只需声明代码、名称、单位和数值格式，获取、缓存、批量请求和绘图都
+走同一条通用路径。新增指标时调用 register_indicator 即可，不需要新的代码分支。
+"""
+
+# World Development Indicators 数据源编号；批量请求多个指标时必须带上 source
+WDI_SOURCE = 2
+
+
+class Indicator:
+    """一个可查询的指标"""
+
+    def __init__(self, key, code, label, unit, formatter, source=WDI_SOURCE,
+                 styles=(('b-', 'o'), ('r-', 's')), monetary=False):
+        self.key = key          # 界面中使用的标识，如 "GDP"
+        self.code = code        # World Bank 指标代码
+        self.label = label      # 显示名称
+        self.unit = unit        # 单位，用于坐标轴
+        self.formatter = formatter  # 数值 -> 显示字符串
+        self.source = source
+        self.styles = styles    # 依次用于第1、2…个国家的 (线型, 标记)
+        self.monetary = monetary  # 按现价货币计价，可以用CPI平减为实际值
+
+    @property
+    def title(self):
+        return f"{self.label}趋势"
+
+    @property
+    def is_rate(self):
+        """数值本身是百分比变化率（如CPI通胀率），而不是水平值"""
+        return self.unit == "%"
+
+    @property
+    def axis_label(self):
+        return f"{self.label} ({self.unit})"
+
+    def style(self, index):
+        return self.styles[index % len(self.styles)]
+
+    def format(self, value):
+        return self.formatter(value)
+
+    def __repr__(self):
+        return f"Indicator({self.key!r}, {self.code!r})"
+
+
+INDICATORS = {}
+_BY_CODE = {}
+
+
+def register_indicator(indicator):
+    """注册指标，同名指标会被覆盖"""
+    INDICATORS[indicator.key] = indicator
+    _BY_CODE[indicator.code] = indicator
+    return indicator
+
+
+def find_indicator(key_or_code):
+    """按界面标识或指标代码查找已注册的指标，未注册时返回 None"""
+    return INDICATORS.get(key_or_code) or _BY_CODE.get(key_or_code)
+
+
+def get_indicator(key_or_code):
+    """按界面标识或指标代码查找指标；未注册的代码返回一个临时指标"""
+    indicator = find_indicator(key_or_code)
+    if indicator is None:
+        indicator = Indicator(key_or_code, key_or_code, key_or_code, "", _plain)
+    return indicator
+
+
+def _plain(value):
+    return f"{value:,.2f}"
+
+
+register_indicator(Indicator(
+    "GDP", "NY.GDP.MKTP.CD", "GDP", "美元",
+    lambda x: f"${x / 1e9:.1f}B",
+    styles=(('b-', 'o'), ('r-', 's')),
+    monetary=True,
+))
+register_indicator(Indicator(
+    "GDP_PER_CAPITA", "NY.GDP.PCAP.CD", "人均GDP", "美元",
+    lambda x: f"${x:,.0f}",
+    styles=(('g-', 's'), ('m-', 'd')),
+    monetary=True,
+))
+register_indicator(Indicator(
+    "CPI", "FP.CPI.TOTL.ZG", "CPI", "%",
+    lambda x: f"{x:.1f}%",
+    styles=(('r-', '^'), ('c-', 'x')),
+))
@@ -0,0 +1,133 @@
+"""进行中下载的登记表（single-flight）
+
+界面上的两次操作或批处理中的两个线程同时请求同一序列时，只发出一次HTTP请求：
+后来者登记为等待者，拿到同一次下载的结果。键一般是 (国家代码, 指标代码)，
+每次下载带一个年份区间；与进行中的下载区间重叠或相邻但不被覆盖的请求
+不另发下载，而是把那次下载的目标区间扩大到覆盖两者并等待它：下载方完成
+当前请求后发现目标区间变宽了，再用一个请求下载扩大后的整个区间。这期间
+到达的所有重叠请求都并入同一次补充下载。
+"""
+import threading
+from concurrent.futures import Future
+
+
+class Flight:
+    """一次进行中的下载，等待者通过 result() 取得结果"""
+
+    def __init__(self, keys, start_year=None, end_year=None):
+        self.keys = keys              # 这次下载负责的键
+        self.start_year = start_year  # 目标区间，可能被后来的请求扩大；为 None 时没有年份区间（如国家列表）
+        self.end_year = end_year
+        self._future = Future()
+
+    def extend(self, start_year, end_year):
+        self.start_year = min(self.start_year, start_year)
+        self.end_year = max(self.end_year, end_year)
+
+    def covers(self, start_year, end_year):
+        if self.start_year is None or start_year is None:
+            return self.start_year is None and start_year is None
+        return self.start_year <= start_year and end_year <= self.end_year
+
+    def overlaps(self, start_year, end_year):
+        """区间相交或相邻"""
+        if self.start_year is None or start_year is None:
+            return False
+        return start_year <= self.end_year + 1 and self.start_year <= end_year + 1
+
+    def result(self, timeout=None):
+        """等待下载完成，返回 {键: 结果}；下载失败时抛出同一个异常"""
+        return self._future.result(timeout)
+
+
+class FlightTable:
+    """按键登记进行中的下载，并统计命中、合并与实际发出的请求数"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # 键 -> [Flight]
+        self.hits = 0       # 不需要下载（本地数据或缓存命中）的序列数
+        self.coalesced = 0  # 等待了其他线程的下载的序列数
+        self.issued = 0     # 实际发起的下载次数
+        self.widened = 0    # 因区间重叠而扩大的下载次数（每次扩大对应一次补充下载）
+
+    def claim(self, keys, start_year=None, end_year=None):
+        """登记一组键的下载，返回 (joined, flight)
+
+        joined 为 {键: Flight}，这些键已有覆盖所需区间的下载在进行中（或被扩大到
+        覆盖所需区间），等待其结果即可；其余的键合并为一个新的 Flight 返回，调用方
+        负责下载 flight 的区间后调用 finish 或 fail。所有键都能等待时 flight 为 None。
+        """
+        with self._lock:
+            joined = {}
+            own = []
+            extended = set()
+            for key in keys:
+                flights = self._flights.get(key, ())
+                flight = next((f for f in flights if f.covers(start_year, end_year)), None)
+                if flight is None:
+                    flight = next((f for f in flights if f.overlaps(start_year, end_year)), None)
+                    if flight is not None and id(flight) not in extended:
+                        flight.extend(start_year, end_year)
+                        extended.add(id(flight))
+                if flight is not None:
+                    joined[key] = flight
+                else:
+                    own.append(key)
+            self.coalesced += len(joined)
+            if not own:
+                return joined, None
+
+            flight = Flight(own, start_year, end_year)
+            for key in own:
+                self._flights.setdefault(key, []).append(flight)
+            self.issued += 1
+            return joined, flight
+
+    def finish(self, flight, result, start_year=None, end_year=None):
+        """下载方完成了 [start_year, end_year] 的下载
+
+        期间有请求扩大了 flight 的目标区间时返回新的 (start_year, end_year)，
+        调用方应再下载一次这个区间并再次调用 finish；否则以 result 结束
+        flight 并返回 None。
+        """
+        with self._lock:
+            if (flight.start_year, flight.end_year) != (start_year, end_year):
+                self.issued += 1
+                self.widened += 1
+                return flight.start_year, flight.end_year
+            self._remove_locked(flight)
+        flight._future.set_result(result)
+        return None
+
+    def fail(self, flight, error):
+        self._remove(flight)
+        flight._future.set_exception(error)
+
+    def record_hits(self, count=1):
+        with self._lock:
+            self.hits += count
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'coalesced': self.coalesced,
+                'issued': self.issued,
+                'widened': self.widened,
+                'in_flight': len({id(f) for flights in self._flights.values() for f in flights}),
+            }
+
+    def _remove(self, flight):
+        with self._lock:
+            self._remove_locked(flight)
+
+    def _remove_locked(self, flight):
+        for key in flight.keys:
+            flights = self._flights.get(key)
+            if flights is None:
+                continue
+            if flight in flights:
+                flights.remove(flight)
+            if not flights:
+                del self._flights[key]
@@ -0,0 +1,212 @@
+"""派生指标的向量化计算
+
+所有函数都沿最后一个轴（年份）计算，输入可以是一条序列的一维数组，也可以
+是整个 Panel 的 (国家, 指标, 年份) 数组，一次算完所有国家，不需要逐点的
+Python 循环。缺失年份为 NaN，窗口内有缺失值时结果为 NaN。
+
+MetricEngine 按输入数据的内容记住计算结果，界面在视图之间切换时直接复用。
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from api.indicators import INDICATORS, get_indicator
+from api.series import Panel, Series
+
+
+def yoy_growth(values, years=None):
+    """同比增长率（%）"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[..., 1:] = (values[..., 1:] / values[..., :-1] - 1) * 100
+    return out
+
+
+def rolling_mean(values, years=None, window=3):
+    """window 年移动平均，结果对齐到窗口的最后一年"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window > values.shape[-1]:
+        return out
+    valid = ~np.isnan(values)
+    pad = np.zeros(values.shape[:-1] + (1,))
+    sums = np.concatenate([pad, np.cumsum(np.where(valid, values, 0.0), axis=-1)], axis=-1)
+    counts = np.concatenate([pad, np.cumsum(valid, axis=-1)], axis=-1)
+    window_sums = sums[..., window:] - sums[..., :-window]
+    window_counts = counts[..., window:] - counts[..., :-window]
+    out[..., window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return out
+
+
+def rolling_cagr(values, years=None, window=5):
+    """过去 window 年的复合年增长率（%）"""
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if window >= values.shape[-1]:
+        return out
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values[..., window:] / values[..., :-window]
+        out[..., window:] = np.where(ratio > 0, (ratio ** (1.0 / window) - 1) * 100, np.nan)
+    return out
+
+
+def cagr(values, years=None):
+    """每条序列在第一个与最后一个有数据的年份之间的复合年增长率（%）
+
+    返回的数组去掉了年份轴，例如 Panel 数据返回 (国家, 指标)。
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    n = values.shape[-1]
+    first = np.argmax(valid, axis=-1)
+    last = n - 1 - np.argmax(valid[..., ::-1], axis=-1)
+    start = np.take_along_axis(values, first[..., None], axis=-1)[..., 0]
+    end = np.take_along_axis(values, last[..., None], axis=-1)[..., 0]
+    periods = last - first
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = end / start
+        result = (ratio ** (1.0 / periods) - 1) * 100
+    return np.where(valid.any(axis=-1) & (periods > 0) & (ratio > 0), result, np.nan)
+
+
+def index_to_base(values, years=None, base_year=None):
+    """以基准年为100的指数；base_year 默认为每条序列第一个有数据的年份"""
+    values = np.asarray(values, dtype=np.float64)
+    if base_year is None:
+        valid = ~np.isnan(values)
+        base = np.argmax(valid, axis=-1)[..., None]
+    else:
+        base = np.full(values.shape[:-1] + (1,), int(base_year) - int(years[0]))
+    base_values = np.take_along_axis(values, base, axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return values / base_values * 100
+
+
+def price_index(inflation, base=None):
+    """由年度通胀率（%）累乘出价格指数，基准年处为 1
+
+    第 t 年的通胀率把第 t-1 年和第 t 年的价格连接起来（第一年的通胀率不使用）。
+    缺失的通胀率切断链条，断开处两侧的价格不可比较：只有与基准年在同一段链条
+    上的年份有指数，其余为 NaN。base 为基准年的位置，默认为每条序列最后一个
+    有通胀率的年份（最近一年的CPI常常还没有发布）；一年通胀率都没有的序列
+    全部为 NaN。
+    """
+    inflation = np.asarray(inflation, dtype=np.float64)
+    n = inflation.shape[-1]
+    if n == 0:
+        return np.full(inflation.shape, np.nan)
+    valid = ~np.isnan(inflation)
+    links = np.where(valid, 1 + inflation / 100, 1.0)
+    links[..., 0] = 1.0
+    prices = np.cumprod(links, axis=-1)
+    # 链条段号：到第 t 年为止断开的次数
+    breaks = ~valid
+    breaks[..., 0] = False
+    segments = np.cumsum(breaks, axis=-1)
+    if base is None:
+        base = (n - 1 - np.argmax(valid[..., ::-1], axis=-1))[..., None]
+    else:
+        base = np.full(inflation.shape[:-1] + (1,), base % n, dtype=np.intp)
+    linked = (segments == np.take_along_axis(segments, base, axis=-1)) & valid.any(axis=-1)[..., None]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(linked, prices / np.take_along_axis(prices, base, axis=-1), np.nan)
+
+
+def deflate(values, years=None, inflation=None, base_year=None):
+    """用CPI通胀率把名义值换算为基准年价格的实际值
+
+    base_year 默认为每条序列最后一个有通胀率的年份；与基准年之间通胀率有
+    缺失的年份为 NaN（见 price_index）。
+    """
+    if inflation is None:
+        raise ValueError("deflate 需要同一国家的CPI通胀率序列")
+    base = None if base_year is None else int(base_year) - int(years[0])
+    return np.asarray(values, dtype=np.float64) / price_index(inflation, base)
+
+
+METRICS = {
+    "yoy_growth": yoy_growth,
+    "rolling_mean": rolling_mean,
+    "rolling_cagr": rolling_cagr,
+    "index_to_base": index_to_base,
+    "deflate": deflate,
+}
+
+
+class MetricEngine:
+    """按视图计算派生序列，并按输入数据的内容缓存结果
+
+    缓存键包含视图、参数和输入数组的字节内容，相同数据重新查询后也能命中；
+    最多保留 maxsize 个结果。
+    """
+
+    def __init__(self, maxsize=64, inflation_indicator=INDICATORS["CPI"].code):
+        self.maxsize = maxsize
+        self.inflation_indicator = inflation_indicator
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    def compute(self, metric, values, years, inflation=None, **params):
+        """计算一组数组（最后一个轴为年份），结果只读且可能被缓存复用"""
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        years = np.asarray(years)
+        key = (metric, tuple(sorted(params.items())), values.shape, values.tobytes(),
+               int(years[0]) if len(years) else None,
+               None if inflation is None else np.ascontiguousarray(inflation, dtype=np.float64).tobytes())
+        result = self._results.get(key)
+        if result is not None:
+            self.hits += 1
+            self._results.move_to_end(key)
+            return result
+
+        self.misses += 1
+        kwargs = dict(params)
+        if inflation is not None:
+            kwargs['inflation'] = inflation
+        result = METRICS[metric](values, years, **kwargs)
+        result.flags.writeable = False
+        self._results[key] = result
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+        return result
+
+    def series(self, view, series, inflation=None):
+        """对一条 Series 应用视图；inflation 为同一年份轴上的CPI通胀率 Series"""
+        if view.raw:
+            return series
+        if view.needs_inflation:
+            inflation = inflation.reindex(series.years).values if inflation is not None else None
+            if inflation is None:
+                return Series.empty(series.start_year, series.end_year)
+        return Series(series.years, self.compute(view.metric, series.values, series.years,
+                                                 inflation, **view.params))
+
+    def panel(self, view, panel):
+        """对整个 Panel 应用视图，所有国家一次算完
+
+        视图不适用的指标（如对CPI做平减）保留原始数据；需要通胀率而面板中
+        没有CPI时，这些指标全部为 NaN。
+        """
+        if view.raw:
+            return panel
+        applies = [view.applies_to(get_indicator(code)) for code in panel.indicators]
+        if not any(applies):
+            return panel
+
+        data = np.array(panel.data)
+        selected = np.flatnonzero(applies)
+        inflation = None
+        if view.needs_inflation:
+            if not panel.has_indicator(self.inflation_indicator):
+                data[:, selected, :] = np.nan
+                return Panel(panel.countries, panel.indicators, panel.years, data)
+            inflation = np.broadcast_to(panel.indicator(self.inflation_indicator)[:, None, :],
+                                        (len(panel.countries), len(selected), len(panel.years)))
+        data[:, selected, :] = self.compute(view.metric, panel.data[:, selected, :], panel.years,
+                                            inflation, **view.params)
+        return Panel(panel.countries, panel.indicators, panel.years, data)
+
+    def clear(self):
+        self._results.clear()
@@ -0,0 +1,238 @@
+"""面板（国家 × 指标 × 年份）的二进制导出与零拷贝读取
+
+查询结果以 Panel 的形式保存为列式文件，notebook 可以直接读取，应用和命令行
+也可以用 PanelStore 把它当作数据源，不必再访问网络。支持两种格式：
+
+- NPZ（.npz）：data、years、countries、indicators 四个数组。默认不压缩，
+  load_panel 把 data 直接映射到文件中的位置（np.memmap），读取不复制数据；
+  compress=True 时文件更小，但读取时需要解压。
+- Arrow IPC / Feather v2（.arrow、.feather）：需要 pyarrow。长表
+  country, indicator, year, value，按 (国家, 指标, 年份) 顺序排列，
+  country/indicator 为字典编码，pandas/polars 可以直接读取；读取时
+  value 列经 pyarrow.memory_map 零拷贝地重塑为 (国家, 指标, 年份)。
+
+    save_panel(panel, "panel.npz")
+    panel = load_panel("panel.npz")
+    client = GdpClient(store=PanelStore("panel.npz"))
+"""
+import json
+import os
+import struct
+import zipfile
+
+import numpy as np
+
+from api.series import Panel, Series, VALUE_DTYPE, YEAR_DTYPE
+
+NPZ = "npz"
+ARROW = "arrow"
+# 文件扩展名 -> 格式
+EXTENSIONS = {".npz": NPZ, ".arrow": ARROW, ".feather": ARROW, ".ipc": ARROW}
+# Arrow schema 元数据中保存坐标（国家、指标、年份）的键
+ARROW_META_KEY = b"gdp_analyzer.panel"
+# Arrow 压缩使用的编码
+ARROW_COMPRESSION = "zstd"
+
+# ZIP 本地文件头：签名和固定部分的长度
+_ZIP_LOCAL_SIGNATURE = b"PK\x03\x04"
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def panel_format(path, format=None):
+    """返回 path 的格式（NPZ 或 ARROW），format 不为 None 时以它为准"""
+    if format is not None:
+        if format not in (NPZ, ARROW):
+            raise ValueError(f"不支持的格式: {format}")
+        return format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"无法从扩展名识别格式: {path}（支持 {', '.join(sorted(EXTENSIONS))}）")
+    return EXTENSIONS[extension]
+
+
+def save_panel(panel, path, format=None, compress=False):
+    """把 panel 写入 path（先写临时文件再替换），返回文件大小（字节）
+
+    format 默认由扩展名决定。compress 为 True 时 NPZ 用 zlib、Arrow 用 zstd
+    压缩，读取时需要解压，不能零拷贝。
+    """
+    format = panel_format(path, format)
+    tmp_path = path + ".tmp"
+    try:
+        if format == NPZ:
+            _save_npz(panel, tmp_path, compress)
+        else:
+            _save_arrow(panel, tmp_path, compress)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return os.path.getsize(path)
+
+
+def load_panel(path, format=None, mmap=True):
+    """读取 save_panel 写入的文件，返回 Panel
+
+    mmap 为 True 且文件未压缩时，Panel.data 是文件的只读内存映射，读取时间
+    与面板大小无关，数据在第一次访问时才从磁盘载入。
+    """
+    if panel_format(path, format) == NPZ:
+        return _load_npz(path, mmap)
+    return _load_arrow(path, mmap)
+
+
+class PanelStore:
+    """导出的面板文件作为 GdpClient 的数据源，接口与 BulkStore 相同
+
+    文件中有且覆盖所需年份的 (国家, 指标) 直接从内存映射中取出，其余的仍走
+    缓存和网络。
+    """
+
+    def __init__(self, path, format=None, mmap=True):
+        self.path = path
+        self.saved_panel = load_panel(path, format, mmap)
+        self.countries = self.saved_panel.countries
+        self.indicators = self.saved_panel.indicators
+        self.years = self.saved_panel.years
+        self.start_year = self.saved_panel.start_year
+        self.end_year = self.saved_panel.end_year
+        self._country_index = {code.upper(): i for i, code in enumerate(self.countries)}
+        self._indicator_index = {code: i for i, code in enumerate(self.indicators)}
+
+    def has(self, country_code, indicator, start_year=None, end_year=None):
+        """文件中有 (国家, 指标)，并且覆盖 [start_year, end_year]（给出时）"""
+        return (self.covers(start_year, end_year) and country_code.upper() in self._country_index
+                and indicator in self._indicator_index)
+
+    def covers(self, start_year=None, end_year=None):
+        if not len(self.years):
+            return False
+        return ((start_year is None or start_year >= self.start_year)
+                and (end_year is None or end_year <= self.end_year))
+
+    def series(self, country_code, indicator, start_year=None, end_year=None):
+        """返回 Series，其数值是文件数据的视图（零拷贝）；不存在时返回 None"""
+        if not self.has(country_code, indicator):
+            return None
+        lo, hi = self._columns(start_year, end_year)
+        row = self.saved_panel.data[self._country_index[country_code.upper()], self._indicator_index[indicator]]
+        return Series(self.years[lo:hi], row[lo:hi])
+
+    def panel(self, country_codes, indicators, start_year=None, end_year=None):
+        """取出多个国家 × 多个指标，返回 Panel（缺失的组合为 NaN）"""
+        lo, hi = self._columns(start_year, end_year)
+        data = np.full((len(country_codes), len(indicators), hi - lo), np.nan)
+        rows = [(i, self._country_index.get(code.upper())) for i, code in enumerate(country_codes)]
+        rows = [(i, source) for i, source in rows if source is not None]
+        columns = [(i, self._indicator_index.get(code)) for i, code in enumerate(indicators)]
+        columns = [(i, source) for i, source in columns if source is not None]
+        if rows and columns and hi > lo:
+            (target_rows, source_rows), (target_columns, source_columns) = zip(*rows), zip(*columns)
+            data[np.ix_(target_rows, target_columns)] = \
+                self.saved_panel.data[np.ix_(source_rows, source_columns)][..., lo:hi]
+        return Panel(country_codes, indicators, self.years[lo:hi], data)
+
+    def _columns(self, start_year, end_year):
+        start_year = self.start_year if start_year is None else max(start_year, self.start_year)
+        end_year = self.end_year if end_year is None else min(end_year, self.end_year)
+        lo = start_year - self.start_year
+        return lo, max(lo, end_year - self.start_year + 1)
+
+    def __repr__(self):
+        return f"PanelStore({self.path!r}, {self.saved_panel!r})"
+
+
+def _save_npz(panel, path, compress):
+    save = np.savez_compressed if compress else np.savez
+    # 传入文件对象，np.savez 不会给文件名追加 .npz
+    with open(path, "wb") as f:
+        save(f,
+             data=np.ascontiguousarray(panel.data, dtype=VALUE_DTYPE),
+             years=np.asarray(panel.years, dtype=YEAR_DTYPE),
+             countries=np.array(panel.countries, dtype=str),
+             indicators=np.array(panel.indicators, dtype=str))
+
+
+def _load_npz(path, mmap):
+    with np.load(path, allow_pickle=False) as archive:
+        countries = archive["countries"].tolist()
+        indicators = archive["indicators"].tolist()
+        years = archive["years"]
+        data = _memmap_member(path, "data.npy") if mmap else None
+        if data is None:
+            data = archive["data"]
+    return Panel(countries, indicators, years, data)
+
+
+def _memmap_member(path, name):
+    """把 npz 中未压缩的数组成员映射为 np.memmap；压缩的或无法映射的返回 None"""
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        return None
+    with open(path, "rb") as f:
+        # 中央目录中的扩展字段长度可能与本地文件头不同，以本地文件头为准
+        f.seek(info.header_offset)
+        header = f.read(_ZIP_LOCAL_HEADER_SIZE)
+        if len(header) != _ZIP_LOCAL_HEADER_SIZE or header[:4] != _ZIP_LOCAL_SIGNATURE:
+            return None
+        name_length, extra_length = struct.unpack("<HH", header[26:30])
+        f.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        elif version == (2, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        else:
+            return None
+        offset = f.tell()
+    if dtype.hasobject or 0 in shape:
+        return None
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape,
+                     order="F" if fortran_order else "C")
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+    except ImportError:
+        raise ImportError("Arrow/Feather 格式需要 pyarrow（pip install pyarrow），或改用 .npz") from None
+    return pyarrow
+
+
+def _save_arrow(panel, path, compress):
+    pa = _require_pyarrow()
+    n_countries, n_indicators, n_years = panel.data.shape
+    country_ids = np.repeat(np.arange(n_countries, dtype=np.int32), n_indicators * n_years)
+    indicator_ids = np.tile(np.repeat(np.arange(n_indicators, dtype=np.int32), n_years), n_countries)
+    table = pa.table({
+        "country": pa.DictionaryArray.from_arrays(country_ids, pa.array(panel.countries, pa.string())),
+        "indicator": pa.DictionaryArray.from_arrays(indicator_ids, pa.array(panel.indicators, pa.string())),
+        "year": pa.array(np.tile(np.asarray(panel.years, dtype=YEAR_DTYPE), n_countries * n_indicators)),
+        # NaN 保持为数值而不是 null，读取时 value 列可以零拷贝转成 NumPy
+        "value": pa.array(np.ascontiguousarray(panel.data, dtype=VALUE_DTYPE).reshape(-1)),
+    })
+    meta = {"countries": panel.countries, "indicators": panel.indicators, "years": panel.years.tolist()}
+    table = table.replace_schema_metadata({ARROW_META_KEY: json.dumps(meta, ensure_ascii=False)})
+    options = pa.ipc.IpcWriteOptions(compression=ARROW_COMPRESSION if compress else None)
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+
+
+def _load_arrow(path, mmap):
+    pa = _require_pyarrow()
+    source = pa.memory_map(path, "r") if mmap else pa.OSFile(path, "rb")
+    table = pa.ipc.open_file(source).read_all()
+    metadata = table.schema.metadata or {}
+    if ARROW_META_KEY not in metadata:
+        raise ValueError(f"{path} 不是导出的面板文件（缺少 {ARROW_META_KEY.decode()} 元数据）")
+    meta = json.loads(metadata[ARROW_META_KEY])
+    shape = (len(meta["countries"]), len(meta["indicators"]), len(meta["years"]))
+    column = table.column("value")
+    if column.num_chunks == 1:
+        # 没有 null 时是 Arrow 缓冲区的只读视图，缓冲区引用着内存映射
+        values = column.chunk(0).to_numpy(zero_copy_only=False)
+    else:
+        values = column.to_numpy()
+    return Panel(meta["countries"], meta["indicators"], meta["years"], values.reshape(shape))
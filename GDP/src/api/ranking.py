@@ -0,0 +1,299 @@
+"""跨国排名、百分位和地区/收入组汇总的预计算索引
+
+"2020年人均GDP前20名"、某国的百分位、各地区的合计，如果逐国获取再在
+Python 中排序，需要上百个请求和逐个比较。RankingIndex 为每个指标保存全部
+国家 × 年份的数值矩阵，并预先算好：
+
+- 每年的降序排列和每个国家的名次（并列时名次相同，如 1, 2, 2, 4）；
+- 百分位：同一年有数据的国家中低于该国的比例（0-100）；
+- 按国家元数据中的 region、incomeLevel 分组的合计、均值和国家数。
+
+查询只是数组下标访问。某条序列变化时（attach 到 IndicatorCache 后，每次
+写入缓存都会通知）只重算它变化的那几年的排名，分组合计按差值更新。
+
+    index = RankingIndex.build(client, ["GDP_PER_CAPITA"], 1990, 2022)
+    index.top("GDP_PER_CAPITA", 2020, 20)
+    index.rank("CHN", "GDP_PER_CAPITA", 2020)
+    index.rollup("GDP", 2020, by="region")
+"""
+import threading
+
+import numpy as np
+
+from api.countries import is_aggregate
+from api.indicators import get_indicator
+from api.series import year_range
+
+# 分组依据：名称 -> 国家元数据中的字段
+GROUPINGS = {
+    "region": "region",
+    "income": "incomeLevel",
+}
+
+
+class RankedRow:
+    """排名查询的一行"""
+
+    __slots__ = ('country', 'name', 'value', 'rank', 'percentile')
+
+    def __init__(self, country, name, value, rank, percentile):
+        self.country = country
+        self.name = name
+        self.value = value
+        self.rank = rank
+        self.percentile = percentile
+
+    def __repr__(self):
+        return f"RankedRow({self.rank}, {self.country!r}, {self.value!r})"
+
+
+class _IndicatorRanks:
+    """一个指标的数值矩阵 (国家, 年份) 及其排名和分组汇总"""
+
+    def __init__(self, values, memberships):
+        self.values = np.array(values, dtype=np.float64)
+        n_countries, n_years = self.values.shape
+        self.order = np.zeros((n_years, n_countries), dtype=np.intp)  # 每年按数值降序的国家序号
+        self.counts = np.zeros(n_years, dtype=np.intp)  # 每年有数据的国家数
+        self.ranks = np.zeros((n_countries, n_years), dtype=np.int32)  # 名次，从1开始，无数据为0
+        self.percentiles = np.full((n_countries, n_years), np.nan)
+        for year in range(n_years):
+            self._rank_year(year)
+        # 分组：one-hot 矩阵 (组, 国家) @ 数值，一次算出所有组所有年份
+        valid = ~np.isnan(self.values)
+        filled = np.where(valid, self.values, 0.0)
+        self.sums = {key: onehot @ filled for key, (_, onehot) in memberships.items()}
+        self.group_counts = {key: (onehot @ valid).astype(np.intp) for key, (_, onehot) in memberships.items()}
+
+    def _rank_year(self, year):
+        column = self.values[:, year]
+        valid = ~np.isnan(column)
+        # NaN 排在最后；argsort 对 -column 是稳定的，并列时按国家顺序
+        order = np.argsort(np.where(valid, -column, np.inf), kind='stable')
+        count = int(valid.sum())
+        self.order[year] = order
+        self.counts[year] = count
+        self.ranks[:, year] = 0
+        self.percentiles[:, year] = np.nan
+        if not count:
+            return
+        ordered = -column[order[:count]]  # 升序
+        # 名次 = 1 + 严格大于它的国家数
+        ranks = np.searchsorted(ordered, -column[valid], side='left') + 1
+        self.ranks[valid, year] = ranks
+        # 严格小于它的国家数
+        below = count - np.searchsorted(ordered, -column[valid], side='right')
+        self.percentiles[valid, year] = below / (count - 1) * 100 if count > 1 else 100.0
+
+    def update(self, row, values, memberships):
+        """用新的一行数值替换 row，返回变化的年份数"""
+        old = self.values[row]
+        changed = np.flatnonzero(~((old == values) | (np.isnan(old) & np.isnan(values))))
+        if not len(changed):
+            return 0
+        old_valid = ~np.isnan(old[changed])
+        new_valid = ~np.isnan(values[changed])
+        delta = np.where(new_valid, values[changed], 0.0) - np.where(old_valid, old[changed], 0.0)
+        count_delta = new_valid.astype(np.intp) - old_valid
+        for key, (labels, _) in memberships.items():
+            group = labels[row]
+            if group >= 0:
+                self.sums[key][group, changed] += delta
+                self.group_counts[key][group, changed] += count_delta
+        self.values[row, changed] = values[changed]
+        for year in changed:
+            self._rank_year(year)
+        return len(changed)
+
+
+class RankingIndex:
+    """多个指标在同一组国家、同一年份轴上的排名索引"""
+
+    def __init__(self, countries, start_year, end_year):
+        """countries 为国家元数据列表（GdpClient.get_countries 的格式），汇总项会被忽略"""
+        countries = [c for c in countries if not is_aggregate(c)]
+        self.countries = [c['id'] for c in countries]
+        self.names = {c['id']: c['name'] for c in countries}
+        self.years = year_range(start_year, end_year)
+        self.start_year = start_year
+        self.end_year = end_year
+        self._row = {code: i for i, code in enumerate(self.countries)}
+        self._lock = threading.Lock()
+        self._indicators = {}  # 指标代码 -> _IndicatorRanks
+
+        # 分组 -> (每个国家的组序号（无分组为 -1）, one-hot 矩阵 (组, 国家))
+        self.groups = {}
+        self._memberships = {}
+        for key, field in GROUPINGS.items():
+            names = sorted({(c.get(field) or {}).get('value') for c in countries} - {None, ''})
+            position = {name: i for i, name in enumerate(names)}
+            labels = np.array([position.get((c.get(field) or {}).get('value'), -1) for c in countries],
+                              dtype=np.intp)
+            onehot = np.zeros((len(names), len(countries)))
+            onehot[labels[labels >= 0], np.flatnonzero(labels >= 0)] = 1.0
+            self.groups[key] = names
+            self._memberships[key] = (labels, onehot)
+
+    def __getstate__(self):
+        # 锁不能序列化；render 的工作进程通过 pickle 接收索引
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, client, indicators, start_year, end_year):
+        """用 GdpClient 批量获取全部国家 × indicators 并建立索引"""
+        countries = client.get_country_index().countries
+        index = cls(countries, start_year, end_year)
+        index.load(client, indicators)
+        return index
+
+    def load(self, client, indicators):
+        """用 GdpClient 批量获取全部国家 × indicators，加入（或替换）这些指标"""
+        panel = client.fetch_panel(self.countries, indicators, self.start_year, self.end_year)
+        for indicator in panel.indicators:
+            self.set_indicator(indicator, panel.select(indicators=[indicator]).data[:, 0, :],
+                               panel.countries)
+
+    @property
+    def indicators(self):
+        return list(self._indicators)
+
+    def set_indicator(self, indicator, values, countries=None):
+        """设置一个指标的全部数值 (国家, 年份)；countries 给出行的顺序，默认为 self.countries"""
+        code = get_indicator(indicator).code
+        matrix = np.full((len(self.countries), len(self.years)), np.nan)
+        values = np.asarray(values, dtype=np.float64)
+        if countries is None:
+            matrix[:] = values
+        else:
+            rows = [self._row.get(country) for country in countries]
+            keep = [i for i, row in enumerate(rows) if row is not None]
+            matrix[[rows[i] for i in keep]] = values[keep]
+        ranks = _IndicatorRanks(matrix, self._memberships)
+        with self._lock:
+            self._indicators[code] = ranks
+
+    def update_series(self, country, indicator, years, values, start_year=None, end_year=None):
+        """某国某指标的序列变化时调用，只重算变化的年份；返回变化的年份数
+
+        [start_year, end_year] 为这次数据覆盖的年份（默认为整个索引区间），其中
+        没有出现在 years 里的年份视为缺失，区间外的年份保持不变。不在索引中的
+        国家或指标被忽略。
+        """
+        code = get_indicator(indicator).code
+        lo = max(start_year or self.start_year, self.start_year) - self.start_year
+        hi = min(end_year or self.end_year, self.end_year) - self.start_year + 1
+        with self._lock:
+            ranks = self._indicators.get(code)
+            row = self._row.get(country.upper())
+            if ranks is None or row is None or lo >= hi:
+                return 0
+            new = ranks.values[row].copy()
+            new[lo:hi] = np.nan
+            years = np.asarray(years, dtype=np.int64)
+            inside = (years >= self.start_year) & (years <= self.end_year)
+            new[years[inside] - self.start_year] = np.asarray(values, dtype=np.float64)[inside]
+            return ranks.update(row, new, self._memberships)
+
+    def attach(self, cache):
+        """订阅 IndicatorCache 的写入，缓存中的序列更新时同步更新索引"""
+        def on_put(entry):
+            years, values = entry.slice(self.start_year, self.end_year)
+            self.update_series(entry.country, entry.indicator, years, values,
+                               entry.start_year, entry.end_year)
+
+        cache.subscribe(on_put)
+        return on_put
+
+    def top(self, indicator, year, n=20, group=None, ascending=False):
+        """某年数值最高（ascending 时最低）的 n 个国家，返回 [RankedRow]
+
+        group 为 (分组依据, 组名)，如 ("region", "South Asia")，只在组内排名；
+        名次和百分位仍是在全部国家中的。
+        """
+        ranks, column = self._column(indicator, year)
+        with self._lock:
+            order = ranks.order[column, :ranks.counts[column]]
+            if ascending:
+                order = order[::-1]
+            if group is not None:
+                key, name = group
+                position = self._group(key, name)
+                labels, _ = self._memberships[key]
+                order = order[labels[order] == position]
+            return [self._row_of(ranks, i, column) for i in order[:n]]
+
+    def rank(self, country, indicator, year):
+        """某国某年的 RankedRow，没有数据时返回 None"""
+        ranks, column = self._column(indicator, year)
+        row = self._row.get(country.upper())
+        with self._lock:
+            if row is None or not ranks.ranks[row, column]:
+                return None
+            return self._row_of(ranks, row, column)
+
+    def count(self, indicator, year):
+        """某年有数据的国家数"""
+        ranks, column = self._column(indicator, year)
+        with self._lock:
+            return int(ranks.counts[column])
+
+    def rollup(self, indicator, year=None, by="region"):
+        """按分组汇总，返回 {组名: {'sum', 'mean', 'count'}}
+
+        year 为 None 时每项为按年份排列的数组（与 self.years 对应），否则为标量。
+        """
+        names = self._grouping(by)
+        ranks, _ = self._column(indicator, self.start_year)
+        with self._lock:
+            sums = ranks.sums[by].copy()
+            counts = ranks.group_counts[by].copy()
+        if year is not None:
+            column = self._year_column(year)
+            sums, counts = sums[:, column], counts[:, column]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = np.where(counts > 0, sums / counts, np.nan)
+        return {name: {'sum': sums[i], 'mean': means[i], 'count': counts[i]} for i, name in enumerate(names)}
+
+    def latest_year(self, indicator):
+        """该指标有数据的最近一年，没有任何数据时返回 None"""
+        ranks, _ = self._column(indicator, self.start_year)
+        with self._lock:
+            columns = np.flatnonzero(ranks.counts)
+        return int(self.years[columns[-1]]) if len(columns) else None
+
+    def _grouping(self, key):
+        if key not in self.groups:
+            raise KeyError(f"未知的分组依据: {key}（可用: {', '.join(self.groups)}）")
+        return self.groups[key]
+
+    def _group(self, key, name):
+        """组名在分组中的序号"""
+        names = self._grouping(key)
+        try:
+            return names.index(name)
+        except ValueError:
+            raise KeyError(f"{key} 分组中没有 {name!r}（可用: {', '.join(names)}）") from None
+
+    def _column(self, indicator, year):
+        code = get_indicator(indicator).code
+        ranks = self._indicators.get(code)
+        if ranks is None:
+            raise KeyError(f"排名索引中没有指标 {code}")
+        return ranks, self._year_column(year)
+
+    def _year_column(self, year):
+        year = int(year)
+        if not self.start_year <= year <= self.end_year:
+            raise KeyError(f"年份 {year} 不在 {self.start_year}-{self.end_year} 之间")
+        return year - self.start_year
+
+    def _row_of(self, ranks, row, column):
+        country = self.countries[row]
+        return RankedRow(country, self.names[country], float(ranks.values[row, column]),
+                         int(ranks.ranks[row, column]), float(ranks.percentiles[row, column]))
@@ -0,0 +1,214 @@
+"""基于NumPy的年度时间序列容器
+
+Series 保存一个国家一个指标的连续年份数据：int16 年份索引 + float64 数值，
+缺失年份为 NaN。Panel 把多个国家 × 多个指标对齐到同一年份轴上，保存为
+一个三维数组，对齐、掩码和运算都是向量化的。
+"""
+import numpy as np
+
+YEAR_DTYPE = np.int16
+VALUE_DTYPE = np.float64
+
+
+def year_range(start_year, end_year):
+    return np.arange(start_year, end_year + 1, dtype=YEAR_DTYPE)
+
+
+class Series:
+    """连续年份上的一条序列，缺失年份为 NaN"""
+
+    __slots__ = ('years', 'values')
+
+    def __init__(self, years, values):
+        self.years = np.asarray(years, dtype=YEAR_DTYPE)
+        self.values = np.asarray(values, dtype=VALUE_DTYPE)
+        if self.years.shape != self.values.shape:
+            raise ValueError("years 与 values 长度不一致")
+
+    @classmethod
+    def empty(cls, start_year=None, end_year=None):
+        if start_year is None or end_year is None:
+            return cls(np.empty(0, YEAR_DTYPE), np.empty(0, VALUE_DTYPE))
+        years = year_range(start_year, end_year)
+        return cls(years, np.full(len(years), np.nan))
+
+    @classmethod
+    def from_lists(cls, years, values, start_year=None, end_year=None):
+        """由 (years, values) 两个列表构造，年份区间默认取数据自身的范围"""
+        years = np.asarray(years, dtype=np.int64)
+        values = np.asarray(values, dtype=VALUE_DTYPE)
+        if start_year is None or end_year is None:
+            if len(years) == 0:
+                return cls.empty()
+            start_year = int(years.min()) if start_year is None else start_year
+            end_year = int(years.max()) if end_year is None else end_year
+
+        series = cls.empty(start_year, end_year)
+        inside = (years >= start_year) & (years <= end_year)
+        series.values[years[inside] - start_year] = values[inside]
+        return series
+
+    @property
+    def start_year(self):
+        return int(self.years[0]) if len(self.years) else None
+
+    @property
+    def end_year(self):
+        return int(self.years[-1]) if len(self.years) else None
+
+    @property
+    def mask(self):
+        """有数据的年份"""
+        return ~np.isnan(self.values)
+
+    @property
+    def count(self):
+        return int(self.mask.sum())
+
+    def __len__(self):
+        return len(self.years)
+
+    def __bool__(self):
+        return self.count > 0
+
+    def dropna(self):
+        """只保留有数据的年份，返回 (years, values) 两个数组"""
+        mask = self.mask
+        return self.years[mask], self.values[mask]
+
+    def to_lists(self):
+        years, values = self.dropna()
+        return years.tolist(), values.tolist()
+
+    def slice(self, start_year, end_year):
+        """截取年份区间，超出原有范围的年份为 NaN"""
+        return self.reindex(year_range(start_year, end_year))
+
+    def reindex(self, years):
+        """对齐到给定的连续年份轴"""
+        years = np.asarray(years, dtype=YEAR_DTYPE)
+        values = np.full(len(years), np.nan)
+        if len(self.years) and len(years):
+            lo = max(int(years[0]), self.start_year)
+            hi = min(int(years[-1]), self.end_year)
+            if lo <= hi:
+                values[lo - years[0]:hi - years[0] + 1] = self.values[lo - self.start_year:hi - self.start_year + 1]
+        return Series(years, values)
+
+    def align(self, other):
+        """把两条序列对齐到两者年份的并集上"""
+        if not len(self.years):
+            return self.reindex(other.years), other
+        if not len(other.years):
+            return self, other.reindex(self.years)
+        years = year_range(min(self.start_year, other.start_year), max(self.end_year, other.end_year))
+        return self.reindex(years), other.reindex(years)
+
+    def _binary(self, other, op):
+        if isinstance(other, Series):
+            left, right = self.align(other)
+            return Series(left.years, op(left.values, right.values))
+        return Series(self.years, op(self.values, other))
+
+    def __add__(self, other):
+        return self._binary(other, np.add)
+
+    def __sub__(self, other):
+        return self._binary(other, np.subtract)
+
+    def __mul__(self, other):
+        return self._binary(other, np.multiply)
+
+    def __truediv__(self, other):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._binary(other, np.divide)
+
+    def __repr__(self):
+        return f"Series({self.start_year}-{self.end_year}, {self.count} values)"
+
+
+class Panel:
+    """多个国家 × 多个指标在同一年份轴上的数据，data 形状为 (国家, 指标, 年份)"""
+
+    def __init__(self, countries, indicators, years, data=None):
+        self.countries = list(countries)
+        self.indicators = list(indicators)
+        self.years = np.asarray(years, dtype=YEAR_DTYPE)
+        shape = (len(self.countries), len(self.indicators), len(self.years))
+        self.data = np.full(shape, np.nan) if data is None else np.asarray(data, dtype=VALUE_DTYPE)
+        if self.data.shape != shape:
+            raise ValueError(f"数据形状 {self.data.shape} 与坐标 {shape} 不一致")
+        self._country_index = {c: i for i, c in enumerate(self.countries)}
+        self._indicator_index = {c: i for i, c in enumerate(self.indicators)}
+
+    @classmethod
+    def from_results(cls, results, start_year, end_year, countries=None, indicators=None):
+        """由 {(国家, 指标): (years, values)} 构造（例如 GdpClient.get_panel 的返回值）"""
+        if countries is None:
+            countries = list(dict.fromkeys(country for country, _ in results))
+        if indicators is None:
+            indicators = list(dict.fromkeys(indicator for _, indicator in results))
+        panel = cls(countries, indicators, year_range(start_year, end_year))
+
+        for (country, indicator), (years, values) in results.items():
+            if country not in panel._country_index or indicator not in panel._indicator_index:
+                continue
+            years = np.asarray(years, dtype=np.int64)
+            inside = (years >= start_year) & (years <= end_year)
+            row = panel.data[panel._country_index[country], panel._indicator_index[indicator]]
+            row[years[inside] - start_year] = np.asarray(values, dtype=VALUE_DTYPE)[inside]
+        return panel
+
+    @property
+    def start_year(self):
+        return int(self.years[0]) if len(self.years) else None
+
+    @property
+    def end_year(self):
+        return int(self.years[-1]) if len(self.years) else None
+
+    @property
+    def mask(self):
+        return ~np.isnan(self.data)
+
+    def has_country(self, country):
+        return country in self._country_index
+
+    def has_indicator(self, indicator):
+        return indicator in self._indicator_index
+
+    def series(self, country, indicator):
+        """返回某国某指标的 Series（与面板共享内存）"""
+        row = self.data[self._country_index[country], self._indicator_index[indicator]]
+        return Series(self.years, row)
+
+    def indicator(self, indicator):
+        """返回某指标在所有国家上的二维数组 (国家, 年份)"""
+        return self.data[:, self._indicator_index[indicator], :]
+
+    def year(self, year):
+        """返回某一年的二维数组 (国家, 指标)；年份不在面板中时抛出 KeyError"""
+        year = int(year)
+        if not len(self.years) or not self.start_year <= year <= self.end_year:
+            raise KeyError(f"年份 {year} 不在面板的 {self.start_year}-{self.end_year} 之间")
+        return self.data[:, :, year - self.start_year]
+
+    def slice(self, start_year, end_year):
+        """截取年份区间（与面板的交集，没有交集时为空面板）"""
+        if not len(self.years):
+            return self
+        lo = max(start_year, self.start_year) - self.start_year
+        hi = max(min(end_year, self.end_year) - self.start_year + 1, lo)
+        return Panel(self.countries, self.indicators, self.years[lo:hi], self.data[:, :, lo:hi])
+
+    def select(self, countries=None, indicators=None):
+        """按国家/指标取子面板"""
+        countries = self.countries if countries is None else list(countries)
+        indicators = self.indicators if indicators is None else list(indicators)
+        ci = [self._country_index[c] for c in countries]
+        ii = [self._indicator_index[i] for i in indicators]
+        return Panel(countries, indicators, self.years, self.data[np.ix_(ci, ii)])
+
+    def __repr__(self):
+        return (f"Panel({len(self.countries)} countries x {len(self.indicators)} indicators x "
+                f"{len(self.years)} years)")
@@ -0,0 +1,173 @@
+"""World Bank 指标响应的流式解析
+
+响应格式为 [分页头, [行, 行, ...]]，每行除了年份和数值之外还带着
+indicator/country 对象、unit、obs_status、decimal 等元数据。response.json()
+会把整页解码成字典列表后才开始取值，内存随页大小线性增长。
+
+这里按块读取响应体，逐行解析：标准格式的行用一个锚定的正则直接取出
+所需字段，不构造字典；格式不同的行退回 json 的 raw_decode。任意时刻只
+保留当前未解析完的一小段文本，峰值内存与页大小无关。
+"""
+import codecs
+import json
+import re
+
+CHUNK_SIZE = 64 * 1024
+# 用正则解析一行前至少缓冲这么多字符，保证一行不会被截断
+MAX_ROW_CHARS = 4096
+
+_STR = r'"[^"\\]*(?:\\.[^"\\]*)*"'
+_ID = r'"([^"\\]*)"'
+_ROW = re.compile(
+    r'\s*\{\s*"indicator"\s*:\s*\{\s*"id"\s*:\s*' + _ID + r'\s*,\s*"value"\s*:\s*' + _STR + r'\s*\}\s*,'
+    r'\s*"country"\s*:\s*\{\s*"id"\s*:\s*' + _ID + r'\s*,\s*"value"\s*:\s*' + _STR + r'\s*\}\s*,'
+    r'\s*"countryiso3code"\s*:\s*' + _ID + r'\s*,'
+    r'\s*"date"\s*:\s*' + _ID + r'\s*,'
+    r'\s*"value"\s*:\s*(null|-?[0-9][0-9.eE+-]*)\s*,'
+    r'\s*"unit"\s*:\s*' + _STR + r'\s*,'
+    r'\s*"obs_status"\s*:\s*' + _STR + r'\s*,'
+    r'\s*"decimal"\s*:\s*-?[0-9]+\s*\}'
+    r'\s*([,\]])'  # 行后的分隔符，一次匹配同时消耗掉
+)
+_WS = re.compile(r'\s*')
+_DECODER = json.JSONDecoder()
+
+
+class Row:
+    """一行数据中用到的字段"""
+
+    __slots__ = ('indicator', 'country', 'iso3', 'date', 'value')
+
+    def __init__(self, indicator, country, iso3, date, value):
+        self.indicator = indicator  # 指标代码
+        self.country = country      # country.id（ISO2）
+        self.iso3 = iso3            # countryiso3code，汇总项可能为空
+        self.date = date            # 字符串，年度数据为 "2022"
+        self.value = value          # float，缺失为 None
+
+
+class _TextBuffer:
+    """按需从字节块中解码文本"""
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """再读一块，没有更多数据时返回 False"""
+        if self.eof:
+            return False
+        if self.pos > CHUNK_SIZE:
+            # 丢掉已经解析过的部分
+            self.text = self.text[self.pos:]
+            self.pos = 0
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            self.text += self._decoder.decode(b'', final=True)
+            return False
+        self.text += self._decoder.decode(chunk)
+        return True
+
+    def ensure(self, size):
+        while len(self.text) - self.pos < size and self.fill():
+            pass
+
+    def peek(self):
+        """跳过空白，返回下一个字符；数据结束时返回空字符串"""
+        while True:
+            self.pos = _WS.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"无法解析的响应：位置 {self.pos} 处应为 {char!r}")
+        self.pos += 1
+
+    def decode(self):
+        """解码下一个完整的JSON值"""
+        while True:
+            self.peek()
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+            if end == len(self.text) and self.fill():
+                continue  # 数字等可能被块边界截断，补齐后重新解码
+            self.pos = end
+            return value
+
+
+class PageParser:
+    """解析一页响应：先读出分页头，再逐行迭代
+
+        page = PageParser(chunks)
+        page.header['pages']
+        for row in page: ...
+    """
+
+    def __init__(self, chunks, skip_null=True):
+        self.skip_null = skip_null
+        self.rows_seen = 0
+        self._buffer = _TextBuffer(chunks)
+        self._buffer.expect('[')
+        header = self._buffer.decode()
+        self.header = header if isinstance(header, dict) else {}
+        self._has_rows = self._open_rows()
+
+    def _open_rows(self):
+        buffer = self._buffer
+        if buffer.peek() != ',':
+            return False  # 只有分页头（或错误信息）
+        buffer.pos += 1
+        if buffer.peek() == '[':
+            buffer.pos += 1
+            return True
+        buffer.decode()  # null
+        return False
+
+    def __iter__(self):
+        if not self._has_rows:
+            return
+        buffer = self._buffer
+        if buffer.peek() == ']':
+            buffer.pos += 1
+            return
+        skip_null = self.skip_null
+        match_row = _ROW.match
+        while True:
+            if len(buffer.text) - buffer.pos < MAX_ROW_CHARS:
+                buffer.ensure(MAX_ROW_CHARS)
+            match = match_row(buffer.text, buffer.pos)
+            if match is not None:
+                buffer.pos = match.end()
+                indicator, country, iso3, date, value, separator = match.groups()
+                value = None if value == 'null' else float(value)
+                row = Row(indicator, country, iso3, date, value)
+            else:
+                row = self._decode_row()
+                separator = buffer.peek()
+                buffer.pos += 1
+                if separator not in (',', ']'):
+                    raise ValueError(f"无法解析的响应：位置 {buffer.pos - 1} 处应为 ',' 或 ']'")
+            self.rows_seen += 1
+            if row.value is not None or not skip_null:
+                yield row
+            if separator == ']':
+                return
+
+    def _decode_row(self):
+        """字段顺序或格式与标准格式不同的行：按普通JSON解码"""
+        row = self._buffer.decode()
+        value = row.get('value')
+        return Row((row.get('indicator') or {}).get('id', ''), (row.get('country') or {}).get('id', ''),
+                   row.get('countryiso3code') or '', str(row.get('date', '')),
+                   None if value is None else float(value))
@@ -0,0 +1,196 @@
+"""轻量的耗时追踪
+
+    from api.trace import span
+
+    with span("http.request", path=path) as s:
+        response = ...
+        s.set(status=response.status_code)
+
+未启用时 span() 只检查一个布尔值并返回共享的空对象，热点路径上的 span 可以
+一直保留。启用后（enable() 或环境变量 GDP_TRACE=1）每个结束的 span 记入：
+
+- 按名称的滚动直方图：每个名称保留最近 WINDOW 个耗时，给出次数、平均值、
+  分位数和按对数刻度分桶的分布（界面的性能面板显示这些数据）；
+- 最近 MAX_EVENTS 个事件，可以导出为 Chrome trace JSON，用 chrome://tracing
+  或 Perfetto 打开，按线程查看嵌套的各个阶段。
+
+这个模块只用标准库，界面启动时可以直接导入。
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 每个名称保留的最近耗时个数
+WINDOW = 1000
+# 保留的最近事件数（用于导出）
+MAX_EVENTS = 100_000
+# 直方图各桶的上界（毫秒），最后一桶为更慢的全部
+BUCKETS_MS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+
+
+class _NullSpan:
+    """追踪未启用时所有 span() 共用的空对象"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **args):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.tracer.record(self.name, self.start, end - self.start, self.args)
+        return False
+
+    def set(self, **args):
+        """补充结束时才知道的信息，如状态码、行数"""
+        self.args.update(args)
+
+
+class Tracer:
+    """收集结束的 span：滚动的耗时窗口和用于导出的事件"""
+
+    def __init__(self, window=WINDOW, max_events=MAX_EVENTS):
+        self.enabled = False
+        self.window = window
+        self._lock = threading.Lock()
+        self._durations = {}  # 名称 -> deque[耗时 ns]
+        self._counts = {}     # 名称 -> 清空以来的总次数
+        self._events = deque(maxlen=max_events)
+        self._threads = {}    # 线程 ident -> 线程名
+
+    def record(self, name, start, duration, args):
+        thread = threading.current_thread()
+        with self._lock:
+            durations = self._durations.get(name)
+            if durations is None:
+                durations = self._durations[name] = deque(maxlen=self.window)
+            durations.append(duration)
+            self._counts[name] = self._counts.get(name, 0) + 1
+            self._events.append((name, start, duration, thread.ident, args))
+            self._threads[thread.ident] = thread.name
+
+    def summary(self):
+        """每个名称最近 window 次的统计，按窗口内总耗时降序
+
+        返回 [{name, count, window, mean_ms, p50_ms, p95_ms, max_ms, total_ms, histogram}]，
+        histogram 为 BUCKETS_MS 各桶（及最后的溢出桶）中的次数。
+        """
+        with self._lock:
+            snapshot = [(name, self._counts[name], list(durations))
+                        for name, durations in self._durations.items()]
+        rows = []
+        for name, count, durations in snapshot:
+            ordered = sorted(durations)
+            total = sum(ordered) / 1e6
+            rows.append({
+                'name': name,
+                'count': count,
+                'window': len(ordered),
+                'mean_ms': total / len(ordered),
+                'p50_ms': ordered[len(ordered) // 2] / 1e6,
+                'p95_ms': ordered[min(int(len(ordered) * 0.95), len(ordered) - 1)] / 1e6,
+                'max_ms': ordered[-1] / 1e6,
+                'total_ms': total,
+                'histogram': _histogram(ordered),
+            })
+        rows.sort(key=lambda row: row['total_ms'], reverse=True)
+        return rows
+
+    def chrome_trace(self):
+        """Chrome trace 格式（完整事件 ph="X"，时间单位微秒）"""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                 for tid, name in threads.items()]
+        for name, start, duration, tid, args in events:
+            trace.append({
+                'name': name,
+                'cat': name.split('.', 1)[0],
+                'ph': 'X',
+                'ts': start / 1000,
+                'dur': duration / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {key: _jsonable(value) for key, value in args.items()},
+            })
+        return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+    def export_chrome(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f, ensure_ascii=False)
+        return path
+
+    def clear(self):
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+            self._events.clear()
+
+
+def _histogram(ordered_ns):
+    counts = [0] * (len(BUCKETS_MS) + 1)
+    bucket = 0
+    for duration in ordered_ns:
+        while bucket < len(BUCKETS_MS) and duration > BUCKETS_MS[bucket] * 1e6:
+            bucket += 1
+        counts[bucket] += 1
+    return counts
+
+
+def _jsonable(value):
+    return value if isinstance(value, (str, int, float, bool, type(None))) else str(value)
+
+
+TRACER = Tracer()
+
+
+def span(name, **args):
+    """追踪一段代码的耗时；未启用时返回空对象，几乎没有开销"""
+    if not TRACER.enabled:
+        return _NULL_SPAN
+    return _Span(TRACER, name, args)
+
+
+def enable():
+    TRACER.enabled = True
+
+
+def disable():
+    TRACER.enabled = False
+
+
+def is_enabled():
+    return TRACER.enabled
+
+
+if os.environ.get("GDP_TRACE") == "1":
+    enable()
@@ -0,0 +1,157 @@
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+from api.trace import span
+
+# (连接超时, 读取超时)，单位秒
+DEFAULT_TIMEOUT = (5, 20)
+# 这些状态码说明服务端暂时不可用，值得退避后重试
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class _TracedConnection:
+    """记录建立连接的耗时：http.connect 为整个过程（HTTPS 包括TLS握手），
+    其中的 http.tcp_connect 为DNS解析和TCP握手"""
+
+    def _new_conn(self):
+        with span("http.tcp_connect", host=self.host):
+            return super()._new_conn()
+
+    def connect(self):
+        with span("http.connect", host=self.host):
+            super().connect()
+
+
+class _TracedHTTPConnection(_TracedConnection, HTTPConnection):
+    pass
+
+
+class _TracedHTTPSConnection(_TracedConnection, HTTPSConnection):
+    pass
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class HttpTransport:
+    """共享的HTTP传输层
+
+    所有请求复用同一个连接池化的 requests.Session（keep-alive），每个请求都带
+    超时，429/5xx 按指数退避自动重试，并请求 gzip 压缩的响应。
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=3, backoff_factor=0.5, pool_size=10):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'User-Agent': 'GDP-Analyzer',
+        })
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", self.adapter)
+        self.session.mount("https://", self.adapter)
+        self.adapter.poolmanager.pool_classes_by_scheme = {
+            'http': _TracedHTTPConnectionPool,
+            'https': _TracedHTTPSConnectionPool,
+        }
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._bytes = 0
+
+    def get(self, url, params=None, headers=None, timeout=None, stream=False):
+        """发送GET请求，返回 requests.Response；网络错误时抛出 requests.RequestException"""
+        with span("http.request", path=urlsplit(url).path, stream=stream) as traced:
+            try:
+                response = self.session.get(url, params=params, headers=headers,
+                                            timeout=timeout or self.timeout, stream=stream)
+            except requests.RequestException:
+                with self._lock:
+                    self._requests += 1
+                    self._errors += 1
+                raise
+            traced.set(status=response.status_code)
+
+        with self._lock:
+            self._requests += 1
+            if not stream:
+                self._bytes += len(response.content)
+        return response
+
+    def iter_content(self, response, chunk_size=64 * 1024):
+        """逐块读取 stream=True 的响应体（已解压），并计入接收字节数"""
+        chunks = response.iter_content(chunk_size)
+        while True:
+            with span("http.read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                return
+            with self._lock:
+                self._bytes += len(chunk)
+            yield chunk
+
+    def get_json(self, url, params=None, headers=None, timeout=None):
+        response = self.get(url, params=params, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        """返回请求与连接复用统计
+
+        connections_opened 为实际建立的TCP连接数，其余请求都复用了已有连接。
+        """
+        opened = 0
+        sent = 0
+        pools = self.adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is not None:
+                opened += pool.num_connections
+                sent += pool.num_requests
+
+        with self._lock:
+            return {
+                'requests': self._requests,
+                'errors': self._errors,
+                'bytes_received': self._bytes,
+                'http_requests_sent': sent,  # 包括重试
+                'connections_opened': opened,
+                'connections_reused': max(sent - opened, 0),
+            }
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport():
+    """返回进程内共享的默认传输层"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport()
+        return _default_transport
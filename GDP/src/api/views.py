@@ -0,0 +1,77 @@
+"""数据视图注册表
+
+视图是对原始指标序列的一种变换（同比增长率、移动平均、按CPI平减等），
+只声明计算函数名、参数、单位和显示格式，计算由 api.metrics 完成。这个模块
+不导入 NumPy，界面启动时可以直接用它填充下拉框。
+"""
+
+
+class MetricView:
+    """一种数据视图"""
+
+    def __init__(self, key, label, metric=None, params=None, unit=None, formatter=None,
+                 monetary_only=False, needs_inflation=False, rates=False):
+        self.key = key              # 标识，如 "YOY"
+        self.label = label          # 显示名称
+        self.metric = metric        # api.metrics 中的函数名，为 None 时显示原始数据
+        self.params = dict(params or {})
+        self.unit = unit            # 为 None 时沿用指标的单位
+        self.formatter = formatter  # 为 None 时沿用指标的格式
+        self.monetary_only = monetary_only    # 只适用于货币计价的指标
+        self.needs_inflation = needs_inflation  # 需要同一国家的CPI通胀率
+        self.rates = rates          # 是否也适用于本身就是变化率的指标（如CPI）
+
+    @property
+    def raw(self):
+        return self.metric is None
+
+    def applies_to(self, indicator):
+        if self.raw or (indicator.is_rate and not self.rates):
+            return False
+        return indicator.monetary or not self.monetary_only
+
+    def title(self, indicator):
+        if not self.applies_to(indicator):
+            return indicator.title
+        return f"{indicator.label}{self.label}"
+
+    def axis_label(self, indicator):
+        if not self.applies_to(indicator) or self.unit is None:
+            return indicator.axis_label
+        return f"{indicator.label} ({self.unit})"
+
+    def format(self, indicator, value):
+        if not self.applies_to(indicator) or self.formatter is None:
+            return indicator.format(value)
+        return self.formatter(value)
+
+    def __repr__(self):
+        return f"MetricView({self.key!r}, {self.metric!r})"
+
+
+VIEWS = {}
+
+
+def register_view(view):
+    """注册视图，同名视图会被覆盖"""
+    VIEWS[view.key] = view
+    return view
+
+
+def get_view(key):
+    return VIEWS[key]
+
+
+def _percent(value):
+    return f"{value:.1f}%"
+
+
+register_view(MetricView("RAW", "原始数据"))
+register_view(MetricView("YOY", "同比增长率", "yoy_growth", unit="%", formatter=_percent))
+register_view(MetricView("MA3", "3年移动平均", "rolling_mean", {"window": 3}, rates=True))
+register_view(MetricView("CAGR5", "5年复合增长率", "rolling_cagr", {"window": 5}, unit="%",
+                         formatter=_percent))
+register_view(MetricView("REAL", "实际值(按CPI平减)", "deflate", unit="美元, 最近有CPI年份的价格",
+                         monetary_only=True, needs_inflation=True))
+register_view(MetricView("INDEX", "指数(起始年=100)", "index_to_base", unit="起始年=100",
+                         formatter=lambda x: f"{x:.0f}"))
@@ -0,0 +1,72 @@
+"""把查询的面板导出为 NPZ 或 Arrow/Feather 文件
+
+数据与 render 一样在一次批量查询中获取（走缓存和离线数据），保存为
+国家 × 指标 × 年份的面板。导出的文件可以在 notebook 中直接读取
+（api.panel_io.load_panel，或 pandas.read_feather），也可以用 --panel 交给
+界面、render 和 serve 作为数据源，不再访问网络。
+
+    python src/main.py export --countries CHN USA --out panel.npz
+    python src/main.py export --all --start 1960 --end 2022 --out wdi.feather
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.indicators import INDICATORS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把查询的面板导出为 NPZ 或 Arrow/Feather 文件")
+    parser.add_argument("--countries", nargs="*", default=[], help="国家名称或代码")
+    parser.add_argument("--group", help="国家组，如 G7、G20 或 \"地区: South Asia\"")
+    parser.add_argument("--all", action="store_true", help="导出全部国家（不含地区汇总项）")
+    parser.add_argument("--indicators", nargs="*", default=list(INDICATORS),
+                        help="指标（界面标识或代码），默认全部已注册指标")
+    parser.add_argument("--start", type=int, default=1990, help="起始年份")
+    parser.add_argument("--end", type=int, default=2022, help="结束年份")
+    parser.add_argument("--out", required=True, help="输出文件（.npz、.arrow 或 .feather）")
+    parser.add_argument("--format", choices=["npz", "arrow"], help="文件格式，默认由扩展名决定")
+    parser.add_argument("--compress", action="store_true", help="压缩（文件更小，但读取时不能零拷贝）")
+    parser.add_argument("--panel", help="用之前导出的面板文件作为数据源")
+    parser.add_argument("--offline", action="store_true", help="只使用本地缓存")
+    args = parser.parse_args(argv)
+
+    if args.start >= args.end:
+        parser.error("起始年份必须小于结束年份")
+
+    from api.bulk import BulkStore
+    from api.cache import IndicatorCache
+    from api.countries import DEFAULT_COUNTRIES_PATH
+    from api.gdp_client import GdpClient
+    from api.panel_io import PanelStore, panel_format, save_panel
+    from render import select_countries
+
+    try:
+        panel_format(args.out, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    store = PanelStore(args.panel) if args.panel else BulkStore.open_default()
+    client = GdpClient(cache=IndicatorCache(offline=args.offline), store=store,
+                       countries_path=DEFAULT_COUNTRIES_PATH)
+    try:
+        index = client.get_country_index()
+        codes = select_countries(index, args.countries, args.group, args.all)
+        if not codes:
+            parser.error("请用 --countries、--group 或 --all 指定国家")
+        started = time.perf_counter()
+        panel = client.fetch_panel(codes, args.indicators, args.start, args.end)
+    finally:
+        client.close()
+    fetched = time.perf_counter()
+    print(f"已获取 {len(panel.countries)} 个国家 × {len(panel.indicators)} 个指标，用时 {fetched - started:.1f} 秒")
+
+    size = save_panel(panel, args.out, args.format, args.compress)
+    print(f"完成：{panel!r} 写入 {args.out}（{size / 1024 / 1024:.2f} MB），"
+          f"用时 {(time.perf_counter() - fetched) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
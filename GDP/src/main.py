@@ -5,7 +5,28 @@ from pathlib import Path
 current_dir = Path(__file__).parent
 sys.path.append(str(current_dir))
 
-from ui.app import run_app
-
 if __name__ == "__main__":
-    run_app()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "render":
+        # 无界面批量导出：python main.py render --countries CHN USA
+        from render import main
+        main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        # 本地HTTP数据服务：python main.py serve --port 8000
+        from server import main
+        main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "export":
+        # 把查询的面板导出为 NPZ/Arrow 文件：python main.py export --countries CHN USA --out panel.npz
+        from export import main
+        main(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "sync":
+        # 按数据源更新时间增量同步缓存（适合每晚定时执行）：python main.py sync
+        from sync import main
+        sys.exit(main(sys.argv[2:]))
+    else:
+        # 用导出的面板文件作为数据源：python main.py --panel panel.npz
+        import argparse
+        parser = argparse.ArgumentParser(description="GDP Analyzer")
+        parser.add_argument("--panel", help="导出的面板文件（.npz、.arrow 或 .feather）")
+        args = parser.parse_args()
+        from ui.app import run_app
+        run_app(panel_path=args.panel)
@@ -0,0 +1,222 @@
+"""无界面批量导出图表
+
+数据在主进程中一次批量获取（走缓存和离线数据），然后按国家分发给进程池，
+每个工作进程用 Agg 后端调用 GDPChart 的 create_*_figure 并保存为
+PNG/SVG/PDF。绘图是CPU密集的，进程数接近CPU核数时总耗时近似线性缩短。
+
+ranking 图表需要全部国家的数据：主进程先建立 api.ranking.RankingIndex，
+在工作进程启动时传给它们，每个国家的图中标出本国的名次。
+
+    python src/main.py render --countries CHN USA --charts gdp cpi --formats png svg
+    python src/main.py render --group G20 --charts ranking --ranking-year 2020 --top 30
+    python src/render.py --all --start 1990 --end 2022 --out charts --workers 8
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.indicators import get_indicator
+
+# 预设图表：名称 -> (GDPChart 的方法, 用到的指标)
+CHARTS = {
+    "gdp": ("create_figure", ["GDP", "GDP_PER_CAPITA"]),
+    "cpi": ("create_cpi_figure", ["CPI"]),
+    "combined": ("create_combined_figure", ["GDP", "GDP_PER_CAPITA", "CPI"]),
+    "ranking": ("create_ranking_figure", ["GDP_PER_CAPITA"]),
+}
+# 排名图默认显示的国家数
+DEFAULT_TOP = 20
+FORMATS = ("png", "svg", "pdf")
+DEFAULT_OUT_DIR = "charts"
+
+
+class RenderJob:
+    """一个要导出的图表：预设图表，或任意一组指标的纵向子图"""
+
+    def __init__(self, name, method, keys):
+        self.name = name      # 用于文件名
+        self.method = method  # GDPChart 的方法名
+        self.keys = keys      # 指标标识
+        self.year = None      # 排名图的年份，由 main 在建立排名索引后确定
+        self.top = DEFAULT_TOP
+
+    @classmethod
+    def preset(cls, name):
+        method, keys = CHARTS[name]
+        return cls(name, method, keys)
+
+    @classmethod
+    def indicators(cls, keys):
+        keys = [get_indicator(key).key for key in keys]
+        return cls("-".join(keys), "create_indicator_figure", keys)
+
+
+def render_country(name, code, series, jobs, formats, out_dir, dpi=100):
+    """在工作进程中执行：绘制一个国家的全部图表，返回 (已写入的文件, 无数据跳过的图表)"""
+    from ui.charts import GDPChart
+
+    chart = GDPChart(name, series=series)
+    written = []
+    skipped = []
+    for job in jobs:
+        method = getattr(chart, job.method)
+        if job.method == "create_ranking_figure":
+            if _ranking is None or job.year is None or not _ranking.count(job.keys[0], job.year):
+                skipped.append(job.name)
+                continue
+            fig = method(_ranking, job.keys[0], job.year, job.top)
+        elif not any(chart.series.get(key) for key in job.keys):
+            skipped.append(job.name)
+            continue
+        else:
+            fig = method(job.keys) if job.method == "create_indicator_figure" else method()
+        for fmt in formats:
+            path = os.path.join(out_dir, f"{code}_{job.name}.{fmt}")
+            fig.savefig(path, format=fmt, dpi=dpi)
+            written.append(path)
+    return written, skipped
+
+
+def render_panel(panel, names, jobs, formats=("png",), out_dir=DEFAULT_OUT_DIR, workers=None,
+                 dpi=100, progress=None, ranking=None):
+    """用进程池为 panel 中的每个国家导出图表
+
+    names 为 {国家代码: 显示名称}；progress(done, total) 在每个国家完成后调用。
+    ranking 为排名图使用的 RankingIndex，在每个工作进程启动时传入一次。
+    返回 (写入的文件列表, {国家代码: 因无数据跳过的图表})。
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    keys = list(dict.fromkeys(key for job in jobs for key in job.keys))
+    tasks = []
+    for code in panel.countries:
+        series = {}
+        for key in keys:
+            indicator = get_indicator(key)
+            if panel.has_indicator(indicator.code):
+                series[key] = panel.series(code, indicator.code).dropna()
+        tasks.append((names.get(code, code), code, series))
+
+    written = []
+    skipped = {}
+    # spawn：工作进程不继承主进程中的网络线程和Tk状态，各平台行为一致
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(ranking,)) as executor:
+        futures = {executor.submit(render_country, name, code, series, jobs, formats, out_dir, dpi): code
+                   for name, code, series in tasks}
+        for done, future in enumerate(as_completed(futures), 1):
+            paths, empty = future.result()
+            written.extend(paths)
+            if empty:
+                skipped[futures[future]] = empty
+            if progress:
+                progress(done, len(tasks))
+    return written, skipped
+
+
+# 工作进程中的排名索引（见 _init_worker）
+_ranking = None
+
+
+def _init_worker(ranking=None):
+    global _ranking
+    _ranking = ranking
+    import matplotlib
+    matplotlib.use("Agg")
+    from ui.charts import configure_fonts
+    configure_fonts()
+
+
+def select_countries(index, queries=None, group=None, include_all=False):
+    """把命令行中的国家名称/代码、分组或 --all 解析为 ISO3 代码列表"""
+    from api.countries import group_members, is_aggregate
+
+    if include_all:
+        return [c['id'] for c in index.countries if not is_aggregate(c)]
+    codes = []
+    for query in queries or []:
+        country = index.resolve(query)
+        if country is None:
+            raise SystemExit(f"找不到国家: {query}")
+        codes.append(country['id'])
+    if group:
+        codes.extend(group_members(index.countries, group))
+    return list(dict.fromkeys(codes))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量导出GDP图表")
+    parser.add_argument("--countries", nargs="*", default=[], help="国家名称或代码")
+    parser.add_argument("--group", help="国家组，如 G7、G20 或 \"地区: South Asia\"")
+    parser.add_argument("--all", action="store_true", help="导出全部国家（不含地区汇总项）")
+    parser.add_argument("--charts", nargs="*", choices=sorted(CHARTS), help="预设图表，默认 combined")
+    parser.add_argument("--indicators", nargs="*", default=[], help="再导出一张由这些指标组成的图")
+    parser.add_argument("--ranking-year", type=int, help="排名图的年份，默认为有数据的最近一年")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP, help="排名图显示的国家数")
+    parser.add_argument("--start", type=int, default=1990, help="起始年份")
+    parser.add_argument("--end", type=int, default=2022, help="结束年份")
+    parser.add_argument("--formats", nargs="*", default=["png"], choices=FORMATS)
+    parser.add_argument("--out", default=DEFAULT_OUT_DIR, help="输出目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--offline", action="store_true", help="只使用本地缓存")
+    parser.add_argument("--panel", help="用导出的面板文件（见 main.py export）作为数据源")
+    args = parser.parse_args(argv)
+
+    if args.start >= args.end:
+        parser.error("起始年份必须小于结束年份")
+    if args.ranking_year is not None and not args.start <= args.ranking_year <= args.end:
+        parser.error("排名年份必须在起始年份和结束年份之间")
+    jobs = [RenderJob.preset(name) for name in (args.charts or ([] if args.indicators else ["combined"]))]
+    if args.indicators:
+        jobs.append(RenderJob.indicators(args.indicators))
+
+    from api.bulk import BulkStore
+    from api.cache import IndicatorCache
+    from api.countries import DEFAULT_COUNTRIES_PATH
+    from api.gdp_client import GdpClient
+    from api.panel_io import PanelStore
+    from api.ranking import RankingIndex
+
+    store = PanelStore(args.panel) if args.panel else BulkStore.open_default()
+    client = GdpClient(cache=IndicatorCache(offline=args.offline), store=store,
+                       countries_path=DEFAULT_COUNTRIES_PATH)
+    index = client.get_country_index()
+    codes = select_countries(index, args.countries, args.group, args.all)
+    if not codes:
+        parser.error("请用 --countries、--group 或 --all 指定国家")
+
+    keys = list(dict.fromkeys(key for job in jobs for key in job.keys))
+    started = time.perf_counter()
+    panel = client.fetch_panel(codes, keys, args.start, args.end)
+    ranking = None
+    ranking_jobs = [job for job in jobs if job.method == "create_ranking_figure"]
+    if ranking_jobs:
+        ranking_keys = list(dict.fromkeys(job.keys[0] for job in ranking_jobs))
+        ranking = RankingIndex.build(client, ranking_keys, args.start, args.end)
+        for job in ranking_jobs:
+            job.year = args.ranking_year or ranking.latest_year(job.keys[0])
+            job.top = args.top
+    client.close()
+    fetched = time.perf_counter()
+    print(f"已获取 {len(codes)} 个国家 × {len(keys)} 个指标，用时 {fetched - started:.1f} 秒")
+
+    written, skipped = render_panel(panel, {code: index.name(code) for code in codes}, jobs, args.formats,
+                                    args.out, args.workers, args.dpi,
+                                    progress=lambda done, total: print(f"\r已导出 {done}/{total} 个国家",
+                                                                       end="", flush=True),
+                                    ranking=ranking)
+    print()
+    for code, names in skipped.items():
+        print(f"{code}: 没有数据，跳过 {', '.join(names)}")
+    print(f"完成：{len(written)} 个文件写入 {args.out}，绘图用时 {time.perf_counter() - fetched:.1f} 秒"
+          f"（{args.workers} 个进程）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+"""本地HTTP数据服务
+
+把 GdpClient 的数据（走离线数据、共享的SQLite缓存和网络）提供给其他程序：
+
+    GET /v1/countries
+    GET /v1/series/<国家>/<指标>?start=1990&end=2022&format=json|npz
+    GET /v1/panel?countries=CHN,USA&indicators=GDP,CPI&start=1990&end=2022&format=json|npz
+    GET /v1/ranking/<指标>?year=2020&n=20&group=region:South%20Asia&ascending=1&country=CHN
+    GET /v1/stats
+
+国家可以是名称、ISO2/ISO3 代码或别名，指标可以是界面标识（GDP）或指标代码。
+ranking 使用 api.ranking.RankingIndex，覆盖 DEFAULT_START_YEAR-DEFAULT_END_YEAR 的
+全部国家；每个指标第一次被查询时批量获取一次，之后随缓存写入增量更新。year
+默认为有数据的最近一年，group 为 分组依据:组名（region 或 income），country
+给出时额外返回该国的名次。json 中缺失年份为 null；npz 是 numpy.load 可以直接读取的未压缩数组包
+（series: years, values；panel: countries, indicators, years, data）。
+每个响应都带按内容计算的 ETag，客户端带 If-None-Match 重新请求且数据
+未变化时返回 304，不再传输响应体。
+
+连接由 asyncio 在一个线程中处理，HTTP/1.1 keep-alive；GdpClient 是同步的，
+取数和编码放到大小固定的线程池中执行，几百个并发客户端也不会为每个请求
+创建线程。同时到达的相同请求由 GdpClient 合并为一次下载。
+
+    python src/main.py serve --port 8000
+    curl -s localhost:8000/v1/series/CHN/GDP?start=2000
+"""
+import argparse
+import asyncio
+import hashlib
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from api.indicators import INDICATORS, find_indicator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_WORKERS = 8
+DEFAULT_START_YEAR = 1990
+DEFAULT_END_YEAR = 2022
+# 客户端在这段时间内可以直接复用响应，之后用 If-None-Match 重新验证（秒）
+MAX_AGE = 300
+# 请求头的最大长度
+MAX_HEADER_BYTES = 16 * 1024
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 500: "Internal Server Error", 502: "Bad Gateway"}
+CONTENT_TYPES = {"json": "application/json; charset=utf-8", "npz": "application/x-npz"}
+
+
+class HttpError(Exception):
+    """以给定状态码返回给客户端的错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Response:
+    def __init__(self, status, body=b"", content_type=CONTENT_TYPES["json"], etag=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+
+    @classmethod
+    def error(cls, status, message):
+        return cls(status, json.dumps({"error": message}, ensure_ascii=False).encode())
+
+    def encode(self, keep_alive):
+        lines = [f"HTTP/1.1 {self.status} {REASONS.get(self.status, '')}",
+                 f"Content-Length: {len(self.body)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if self.body:
+            lines.append(f"Content-Type: {self.content_type}")
+        if self.etag:
+            lines.append(f"ETag: {self.etag}")
+            lines.append(f"Cache-Control: max-age={MAX_AGE}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class DataServer:
+    """基于 asyncio 的HTTP服务，数据来自一个共享的 GdpClient"""
+
+    def __init__(self, client, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=DEFAULT_WORKERS):
+        self.client = client
+        self.host = host
+        self.port = port
+        self.requests = 0
+        self.not_modified = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gdp-serve")
+        self._server = None
+        self._ranking = None  # RankingIndex，第一次查询排名时建立
+        self._ranking_lock = threading.Lock()
+        self._routes = {
+            "countries": self._countries,
+            "series": self._series,
+            "panel": self._panel,
+            "ranking": self._rank,
+            "stats": self._stats,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES, backlog=1024)
+        # port 为 0 时由系统分配
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+                headers = {}
+                for line in header_lines:
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)  # GET 不需要请求体，读掉即可
+
+                parts = request_line.split(" ")
+                if len(parts) != 3:
+                    response, keep_alive = Response.error(400, "无法解析的请求行"), False
+                else:
+                    method, target, version = parts
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                    response = await self._respond(method, target, headers)
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method, target, headers):
+        self.requests += 1
+        if method != "GET":
+            return Response.error(405, "只支持 GET")
+        url = urlsplit(target)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if len(parts) < 2 or parts[0] != "v1" or parts[1] not in self._routes:
+            return Response.error(404, f"未知的路径: {url.path}")
+
+        loop = asyncio.get_running_loop()
+        try:
+            body, fmt = await loop.run_in_executor(self._executor, self._routes[parts[1]], parts[2:], query)
+        except HttpError as e:
+            return Response.error(e.status, str(e))
+        except Exception as e:
+            status = 502 if _is_network_error(e) else 500
+            return Response.error(status, f"{type(e).__name__}: {e}")
+
+        etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+        wanted = _etags(headers.get("if-none-match", ""))
+        if etag in wanted or "*" in wanted:
+            self.not_modified += 1
+            return Response(304, etag=etag)
+        return Response(200, body, CONTENT_TYPES[fmt], etag)
+
+    # 以下在线程池中执行，返回 (响应体, 格式)
+
+    def _countries(self, args, query):
+        index = self.client.get_country_index()
+        countries = [{
+            "id": c["id"],
+            "iso2": c.get("iso2Code", ""),
+            "name": c["name"],
+            "region": (c.get("region") or {}).get("value", ""),
+            "income": (c.get("incomeLevel") or {}).get("value", ""),
+        } for c in index.countries]
+        return _json(countries), "json"
+
+    def _series(self, args, query):
+        if len(args) != 2:
+            raise HttpError(404, "路径应为 /v1/series/<国家>/<指标>")
+        country = self._country_code(args[0])
+        indicator = _indicator(args[1])
+        start_year, end_year = _years(query)
+        fmt = _format(query)
+        series = self.client.get_series(country, indicator.code, start_year, end_year)
+        if fmt == "npz":
+            return _npz(years=series.years, values=series.values), fmt
+        return _json({
+            "country": country,
+            "indicator": indicator.code,
+            "unit": indicator.unit,
+            "years": series.years.tolist(),
+            "values": _nullable(series.values.tolist()),
+        }), fmt
+
+    def _panel(self, args, query):
+        countries = [self._country_code(c) for c in _split(query.get("countries"))]
+        indicators = [_indicator(i) for i in _split(query.get("indicators"))]
+        if not countries or not indicators:
+            raise HttpError(400, "需要 countries 和 indicators 参数")
+        start_year, end_year = _years(query)
+        fmt = _format(query)
+        panel = self.client.fetch_panel(countries, [i.code for i in indicators], start_year, end_year)
+        if fmt == "npz":
+            return _npz(countries=panel.countries, indicators=panel.indicators,
+                        years=panel.years, data=panel.data), fmt
+        return _json({
+            "countries": panel.countries,
+            "indicators": panel.indicators,
+            "years": panel.years.tolist(),
+            "data": [[_nullable(row) for row in rows] for rows in panel.data.tolist()],
+        }), fmt
+
+    def _rank(self, args, query):
+        if len(args) != 1:
+            raise HttpError(404, "路径应为 /v1/ranking/<指标>")
+        indicator = _indicator(args[0])
+        ranking = self._ranking_index(indicator)
+        try:
+            n = int(query.get("n", 20))
+            year = int(query["year"]) if "year" in query else ranking.latest_year(indicator.code)
+        except ValueError:
+            raise HttpError(400, "year/n 必须是整数") from None
+        if year is None:
+            raise HttpError(404, f"{indicator.code} 没有任何国家的数据")
+        if not ranking.start_year <= year <= ranking.end_year:
+            raise HttpError(400, f"year 必须在 {ranking.start_year}-{ranking.end_year} 之间")
+        group = None
+        if query.get("group"):
+            key, _, name = query["group"].partition(":")
+            group = (key.strip(), name.strip())
+        country = self._country_code(query["country"]) if query.get("country") else None
+        try:
+            rows = ranking.top(indicator.code, year, n, group=group,
+                               ascending=query.get("ascending", "0") not in ("0", "false", ""))
+        except KeyError as e:
+            raise HttpError(404, e.args[0]) from None
+        own = ranking.rank(country, indicator.code, year) if country else None
+        return _json({
+            "indicator": indicator.code,
+            "unit": indicator.unit,
+            "year": year,
+            "count": ranking.count(indicator.code, year),
+            "rows": [_ranked(row) for row in rows],
+            "country": _ranked(own) if own is not None else None,
+        }), "json"
+
+    def _ranking_index(self, indicator):
+        """共享的排名索引；指标第一次被查询时才获取它的数据"""
+        from api.ranking import RankingIndex
+
+        with self._ranking_lock:
+            if self._ranking is None:
+                ranking = RankingIndex(self.client.get_country_index().countries,
+                                       DEFAULT_START_YEAR, DEFAULT_END_YEAR)
+                if self.client.cache is not None:
+                    ranking.attach(self.client.cache)
+                self._ranking = ranking
+            if indicator.code not in self._ranking.indicators:
+                self._ranking.load(self.client, [indicator.code])
+            return self._ranking
+
+    def _stats(self, args, query):
+        return _json({
+            "requests": self.requests,
+            "not_modified": self.not_modified,
+            "client": self.client.request_stats(),
+            "transport": self.client.transport.stats(),
+        }), "json"
+
+    def _country_code(self, query):
+        country = self.client.get_country_index().resolve(query)
+        if country is None:
+            raise HttpError(404, f"找不到国家: {query}")
+        return country["id"]
+
+
+def _indicator(key):
+    """只接受已注册的指标；get_indicator 会为任意代码构造临时指标，未知代码会被转发给
+    World Bank 并写进缓存"""
+    indicator = find_indicator(key)
+    if indicator is None:
+        raise HttpError(404, f"未知的指标: {key}（可用: {', '.join(INDICATORS)}）")
+    return indicator
+
+
+def _ranked(row):
+    return {"country": row.country, "name": row.name, "value": row.value,
+            "rank": row.rank, "percentile": row.percentile}
+
+
+def _years(query):
+    try:
+        start_year = int(query.get("start", DEFAULT_START_YEAR))
+        end_year = int(query.get("end", DEFAULT_END_YEAR))
+    except ValueError:
+        raise HttpError(400, "start/end 必须是年份") from None
+    if start_year > end_year:
+        raise HttpError(400, "起始年份不能大于结束年份")
+    return start_year, end_year
+
+
+def _format(query):
+    fmt = query.get("format", "json")
+    if fmt not in CONTENT_TYPES:
+        raise HttpError(400, f"format 只能是 {', '.join(CONTENT_TYPES)}")
+    return fmt
+
+
+def _split(value):
+    return [part.strip() for part in (value or "").split(",") if part.strip()]
+
+
+def _etags(header):
+    return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+
+def _nullable(values):
+    return [None if value != value else value for value in values]
+
+
+def _json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _npz(**arrays):
+    import numpy as np
+
+    buffer = io.BytesIO()
+    np.savez(buffer, **{name: np.asarray(array) for name, array in arrays.items()})
+    return buffer.getvalue()
+
+
+def _is_network_error(error):
+    import requests
+
+    return isinstance(error, requests.RequestException)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本地HTTP数据服务")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="取数线程数")
+    parser.add_argument("--offline", action="store_true", help="只使用本地缓存")
+    parser.add_argument("--panel", help="用导出的面板文件（见 main.py export）作为数据源")
+    args = parser.parse_args(argv)
+
+    from api.bulk import BulkStore
+    from api.cache import IndicatorCache
+    from api.countries import DEFAULT_COUNTRIES_PATH
+    from api.gdp_client import GdpClient
+    from api.panel_io import PanelStore
+
+    store = PanelStore(args.panel) if args.panel else BulkStore.open_default()
+    client = GdpClient(cache=IndicatorCache(offline=args.offline), store=store,
+                       countries_path=DEFAULT_COUNTRIES_PATH)
+    server = DataServer(client, args.host, args.port, args.workers)
+
+    async def serve():
+        await server.start()
+        print(f"服务已启动: http://{server.host}:{server.port}/v1/", flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""缓存指标的增量同步
+
+缓存过期后逐条重新下载每个 (国家, 指标) 要发出与条目数相同的请求，而
+World Bank 的数据一年只发布几次。同步任务先取每个数据源元数据中的
+lastupdated（一个数据源一个很小的请求），与上次同步时记录的值比较：
+
+- 没有变化：只刷新缓存条目的获取时间，不下载任何数据；
+- 有变化（或第一次同步）：只重新下载最近 RECENT_YEARS 年，更早的年份
+  视为已稳定，合并时保留缓存中的值；--full 时重新下载整个缓存区间。
+
+结束时报告实际的请求数和接收字节数，并与逐条全量刷新的估计值比较。
+适合每晚定时执行：
+
+    python main.py sync
+    python main.py sync --indicators GDP CPI --recent-years 3
+"""
+import argparse
+from datetime import date
+
+import requests
+
+from api.indicators import get_indicator
+
+# 数据源更新时重新下载的最近年数
+RECENT_YEARS = 5
+# 没有下载任何数据、无法实测时，每行（一国一指标一年）响应体的估计字节数
+ROW_BYTES = 220
+
+
+class SyncReport:
+    """一次同步的结果"""
+
+    def __init__(self):
+        self.sources = {}      # 数据源 -> (状态, lastupdated)，状态为 unchanged / changed / first / full
+        self.errors = {}       # 数据源 -> 异常，这些数据源下次会重新同步
+        self.revalidated = 0   # 确认未变化的条目数
+        self.refreshed = 0     # 重新下载的条目数（全量同步时为整个区间，否则为最近几年）
+        self.requests = 0
+        self.bytes_received = 0
+        self.full_requests = 0  # 逐条全量刷新所需的请求数
+        self.full_bytes = 0     # 逐条全量刷新的估计字节数
+
+    @property
+    def saved_bytes(self):
+        return max(self.full_bytes - self.bytes_received, 0)
+
+    @property
+    def saved_requests(self):
+        return max(self.full_requests - self.requests, 0)
+
+    def summary(self):
+        labels = {'unchanged': '未变化', 'changed': '已更新', 'first': '首次同步', 'full': '全量同步'}
+        lines = [f"数据源 {source}: {labels[state]} (lastupdated {last_updated})"
+                 for source, (state, last_updated) in self.sources.items()]
+        lines += [f"数据源 {source}: 同步失败 ({error})" for source, error in self.errors.items()]
+        lines.append(f"确认未变化 {self.revalidated} 条，重新下载 {self.refreshed} 条")
+        saved = self.saved_bytes / self.full_bytes if self.full_bytes else 0.0
+        lines.append(f"请求 {self.requests} 次、接收 {_size(self.bytes_received)}；"
+                     f"逐条全量刷新约需 {self.full_requests} 次请求、{_size(self.full_bytes)}，"
+                     f"节省 {_size(self.saved_bytes)} ({saved:.1%})")
+        return "\n".join(lines)
+
+
+class DeltaSync:
+    """按数据源的 lastupdated 增量刷新 IndicatorCache 中的全部条目"""
+
+    def __init__(self, client, recent_years=RECENT_YEARS):
+        if client.cache is None:
+            raise ValueError("增量同步需要 GdpClient 带有 IndicatorCache")
+        self.client = client
+        self.cache = client.cache
+        self.recent_years = recent_years
+
+    def run(self, indicators=None, full=False, today=None):
+        """同步缓存中的条目（indicators 为 None 时同步全部指标），返回 SyncReport
+
+        某个数据源请求失败时记入 report.errors 并继续其余数据源；它的同步
+        状态不更新，下次仍会重新下载。
+        """
+        codes = None if indicators is None else {get_indicator(i).code for i in indicators}
+        by_source = {}
+        for country, code, start_year, end_year in self.cache.ranges():
+            if codes is None or code in codes:
+                by_source.setdefault(get_indicator(code).source, []).append((country, code, start_year, end_year))
+
+        this_year = (today or date.today()).year
+        first_recent = this_year - self.recent_years + 1
+        transport = self.client.transport
+        report = SyncReport()
+        started = transport.stats()
+        data_bytes = 0
+        data_rows = 0
+        full_rows = 0
+        for source, entries in by_source.items():
+            report.full_requests += len(entries)
+            full_rows += sum(end - start + 1 for _, _, start, end in entries)
+            try:
+                last_updated = self.client.get_source_updated(source)
+            except requests.RequestException as e:
+                report.errors[source] = e
+                continue
+
+            synced = self.cache.source_updated(source)
+            if not full and last_updated is not None and last_updated == synced:
+                report.revalidated += self.cache.revalidate([(country, code) for country, code, _, _ in entries])
+                report.sources[source] = ('unchanged', last_updated)
+                continue
+
+            # 按需要重新下载的年份区间分组，同一区间的条目合并请求
+            windows = {}
+            stable = []
+            for country, code, start_year, end_year in entries:
+                window = (start_year if full else max(start_year, first_recent), end_year)
+                if window[0] > window[1]:
+                    stable.append((country, code))  # 整个区间都早于最近几年
+                else:
+                    windows.setdefault(window, []).append((country, code))
+
+            before = transport.stats()['bytes_received']
+            try:
+                for (start_year, end_year), pairs in windows.items():
+                    self.client.refresh(pairs, start_year, end_year)
+                    report.refreshed += len(pairs)
+                    data_rows += len(pairs) * (end_year - start_year + 1)
+            except requests.RequestException as e:
+                report.errors[source] = e
+                continue
+            finally:
+                data_bytes += transport.stats()['bytes_received'] - before
+
+            report.revalidated += self.cache.revalidate(stable)
+            if last_updated is not None:
+                self.cache.set_source_updated(source, last_updated)
+            state = 'full' if full else 'first' if synced is None else 'changed'
+            report.sources[source] = (state, last_updated)
+
+        finished = transport.stats()
+        report.requests = finished['requests'] - started['requests']
+        report.bytes_received = finished['bytes_received'] - started['bytes_received']
+        # 用本次实际下载的数据估计每行的字节数
+        report.full_bytes = full_rows * (data_bytes / data_rows if data_rows else ROW_BYTES)
+        return report
+
+
+def _size(n):
+    if n >= 1024 * 1024:
+        return f"{n / 1024 / 1024:.1f} MB"
+    return f"{n / 1024:.1f} KB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="按数据源的更新时间增量同步本地缓存")
+    parser.add_argument("--indicators", nargs="*", help="只同步这些指标（界面标识或代码），默认全部")
+    parser.add_argument("--recent-years", type=int, default=RECENT_YEARS,
+                        help="数据源更新时重新下载的最近年数")
+    parser.add_argument("--full", action="store_true", help="重新下载整个缓存区间")
+    args = parser.parse_args(argv)
+
+    from api.cache import IndicatorCache
+    from api.gdp_client import GdpClient
+
+    client = GdpClient(cache=IndicatorCache())
+    try:
+        report = DeltaSync(client, args.recent_years).run(args.indicators, full=args.full)
+    finally:
+        client.close()
+    print(report.summary())
+    return 1 if report.errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
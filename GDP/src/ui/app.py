@@ -1,21 +1,31 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import ttk, messagebox, filedialog
 import sys
 import os
 import threading
-import requests
-
-# 配置matplotlib支持中文显示
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial Unicode MS']
-plt.rcParams['axes.unicode_minus'] = False
 
 # 添加父目录到系统路径
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-from api.gdp_client import GdpClient
-from ui.charts import GDPChart
+# 启动时只导入轻量模块，窗口可以立即显示；requests、NumPy 和 matplotlib
+# 在后台线程中第一次用到时才导入（见 _get_client 和 _run_query）
+from api.countries import DEFAULT_COUNTRIES_PATH, IncrementalFilter, group_members, group_names
+from api.indicators import INDICATORS, get_indicator
+from api.trace import span
+from api.views import VIEWS
+from ui.jobs import JobScheduler
+from ui.prefetch import RECENT, RECENT_PRELOAD, Prefetcher, RecentCountries
+
+# 国家组下拉框中"不使用分组"的选项
+NO_GROUP = "无"
+# 停止输入多久后才过滤国家列表（毫秒）
+FILTER_DEBOUNCE_MS = 150
+# 导出/打开数据文件对话框中的文件类型
+PANEL_FILE_TYPES = [("NumPy 数据 (.npz)", "*.npz"), ("Arrow/Feather (需要 pyarrow)", "*.arrow *.feather"),
+                    ("所有文件", "*.*")]
+# 这些按键不改变输入内容，不触发过滤
+NAVIGATION_KEYS = {"Up", "Down", "Left", "Right", "Return", "KP_Enter", "Escape", "Tab",
+                   "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R", "Home", "End"}
 
 class GdpApp:
     def __init__(self, master):
@@ -24,44 +34,102 @@ class GdpApp:
         self.master.geometry("1000x800")
         self.master.configure(bg="#f0f0f0")
         
-        self.gdp_client = GdpClient()
+        self.gdp_client = None  # 在后台线程中创建，见 _get_client
+        self._client_lock = threading.Lock()
+        self._offline = False
+        self._panel_store = None  # PanelStore，打开导出的面板文件后优先于缓存和网络
+        self.chart = None  # ChartView，第一次显示结果时创建
+        self.metrics = None  # MetricEngine，第一次显示结果时创建
+        self._last_result = None  # (query, panel)，切换视图时直接重新绘制
+        self.ranking = None  # RankingIndex，第一次查看排名时建立，之后随缓存写入更新
+        self._ranking_listener = None  # self.ranking 订阅缓存写入的回调
+        self.country_index = None  # CountryIndex，加载完成前为 None
         self.countries_data = []  # 存储国家数据
         self.country_names = []   # 存储国家名称
-        self.all_country_names = []  # 存储完整的国家名称列表（用于过滤）
+        self._filters = {}  # 下拉框 -> IncrementalFilter
+        self._filter_pending = {}  # 下拉框 -> 尚未执行的过滤任务 (after id)
         self.data_type_var = tk.StringVar(value="GDP")  # 默认显示GDP数据
         self.comparison_mode_var = tk.BooleanVar(value=False)  # 是否启用比较模式
+        self.offline_mode_var = tk.BooleanVar(value=False)  # 离线模式：只使用本地缓存
+        self.view_var = tk.StringVar(value=VIEWS["RAW"].label)  # 数据视图（原始数据、同比增长率等）
+        self.log_scale_var = tk.BooleanVar(value=False)
+        self.debug_panel_var = tk.BooleanVar(value=False)
+        self.debug_panel = None  # DebugPanel，勾选"性能面板"时创建
         
         self.create_widgets()
+        self.jobs = JobScheduler(self.master)
+        # 后台预取：选中国家后预取全部指标，启动时预取最近常用的国家
+        self.recent_countries = RecentCountries()
+        self.prefetcher = Prefetcher(self._get_client, idle=lambda: not self.jobs.busy)
         
         self.load_countries_thread = threading.Thread(target=self.load_countries)
         self.load_countries_thread.daemon = True
         self.load_countries_thread.start()
         
     def load_countries(self):
-        self.status_var.set("正在加载国家列表...")
-        self.progressbar.start()
+        """后台线程：先用本地快照填充下拉框，快照过期或不存在时再从网络刷新"""
+        self.master.after(0, lambda: self.status_var.set("正在加载国家列表..."))
+        self.master.after(0, self.progressbar.start)
         
-        url = "https://api.worldbank.org/v2/country?format=json&per_page=300"
         try:
-            response = requests.get(url)
-            data = response.json()
+            client = self._get_client()
+            # 优先使用磁盘上缓存的国家列表，即使已经过期
+            index = client.get_country_index(stale_ok=True)
+            self._set_country_index(index)
             
-            if data and len(data) >= 2:
-                # 按国家名称排序
-                self.countries_data = sorted(data[1], key=lambda x: x['name'])
-                self.country_names = [country['name'] for country in self.countries_data]
-                self.all_country_names = self.country_names.copy()  # 保存完整列表
-                
-                # 更新下拉菜单
-                self.master.after(0, self.update_country_combobox)
+            if index.is_stale():
+                self.master.after(0, lambda: self.status_var.set("正在更新国家列表..."))
+                self._set_country_index(client.get_country_index(refresh=True), keep_selection=True)
         except Exception as e:
-            self.master.after(0, lambda: self.status_var.set(f"加载国家列表失败: {str(e)}"))
+            message = f"加载国家列表失败: {str(e)}"
+            if self.country_index is not None:
+                message = f"国家列表可能不是最新的，更新失败: {str(e)}"
+            self.master.after(0, lambda: self.status_var.set(message))
         
         self.master.after(0, self.progressbar.stop)
         
-    def update_country_combobox(self):
+    def _set_country_index(self, index, keep_selection=False):
+        if not len(index):
+            return
+        # 索引中的国家已按名称排序
+        self.country_index = index
+        self.countries_data = index.countries
+        self.country_names = index.names
+        
+        # 更新下拉菜单
+        self.master.after(0, lambda: self.update_country_combobox(keep_selection))
+        
+    def _get_client(self):
+        """第一次调用时创建 GdpClient（导入 requests、NumPy 等），应在后台线程中调用"""
+        with self._client_lock:
+            if self.gdp_client is None:
+                from api.bulk import BulkStore
+                from api.cache import IndicatorCache
+                from api.gdp_client import GdpClient
+                
+                store = self._panel_store if self._panel_store is not None else BulkStore.open_default()
+                self.gdp_client = GdpClient(cache=IndicatorCache(offline=self._offline),
+                                            store=store,
+                                            countries_path=DEFAULT_COUNTRIES_PATH)
+            return self.gdp_client
+        
+    def _get_chart(self):
+        """整个会话复用同一个图表，第一次显示结果时创建"""
+        if self.chart is None:
+            from ui.charts import ChartView, configure_fonts
+            configure_fonts()
+            self.chart = ChartView(self.chart_frame)
+        return self.chart
+        
+    def update_country_combobox(self, keep_selection=False):
         self.country_combobox['values'] = self.country_names
         self.country2_combobox['values'] = self.country_names
+        self.group_combobox['values'] = [NO_GROUP] + group_names(self.countries_data)
+        
+        if keep_selection:
+            # 后台刷新国家列表时不打断用户已经选好的国家
+            self.status_var.set(f"已更新国家列表，共 {len(self.country_names)} 个国家")
+            return
         
         if 'China' in self.country_names:
             self.country_combobox.current(self.country_names.index('China'))
@@ -79,30 +147,137 @@ class GdpApp:
                 self.country2_combobox.current(0)
                 
         self.status_var.set(f"已加载 {len(self.country_names)} 个国家")
+        self._warm_up()
+        
+    def _warm_up(self):
+        """启动后预取默认国家和最近常用国家的全部指标"""
+        self.prefetch_selection()
+        years = self._year_range()
+        if years is None or self._offline:
+            return
+        codes = [code for code in self.recent_countries.top(RECENT_PRELOAD) if self.country_index.get(code)]
+        self.prefetcher.warm(codes, [i.code for i in INDICATORS.values()], *years, priority=RECENT)
+        
+    def prefetch_selection(self, event=None):
+        """预取当前选择的国家和比较国家（即使没有启用比较）的全部指标"""
+        years = self._year_range()
+        if years is None or self._offline or self.country_index is None:
+            return
+        codes = [self.get_country_code(var.get()) for var in (self.country_var, self.country2_var)]
+        self.prefetcher.warm(codes, [i.code for i in INDICATORS.values()], *years)
+        
+    def _year_range(self):
+        try:
+            start_year = int(self.start_year.get())
+            end_year = int(self.end_year.get())
+        except ValueError:
+            return None
+        return (start_year, end_year) if start_year < end_year else None
         
     def filter_countries(self, event=None, combobox=None, var=None):
+        """按键后延迟过滤：快速连续输入时只在停顿后过滤一次"""
         if not combobox or not var:
             return
+        if event is not None and event.keysym in NAVIGATION_KEYS:
+            return
             
-        value = var.get().lower()
-        if value == '':
-            # 如果输入为空，显示所有国家
-            combobox['values'] = self.all_country_names
-        else:
-            # 否则过滤国家名称
-            filtered_countries = [country for country in self.all_country_names if value in country.lower()]
-            combobox['values'] = filtered_countries
+        pending = self._filter_pending.pop(combobox, None)
+        if pending is not None:
+            self.master.after_cancel(pending)
+        self._filter_pending[combobox] = self.master.after(
+            FILTER_DEBOUNCE_MS, lambda: self._apply_filter(combobox, var))
+        
+    def _apply_filter(self, combobox, var):
+        self._filter_pending.pop(combobox, None)
+        if self.country_index is None:
+            return
+            
+        country_filter = self._filters.get(combobox)
+        if country_filter is None or country_filter.index is not self.country_index:
+            country_filter = self._filters[combobox] = IncrementalFilter(self.country_index)
             
-        combobox.event_generate('<Down>')
+        # 输入为空时返回所有国家（前若干个），否则按匹配程度排序的过滤结果
+        values = country_filter.update(var.get())
+        if list(combobox['values']) != values:
+            combobox['values'] = values
+            combobox.event_generate('<Down>')
         
     def toggle_comparison_mode(self):
         comparison_mode = self.comparison_mode_var.get()
         if comparison_mode:
             self.country2_label.grid()
             self.country2_combobox.grid()
+            self.group_label.grid()
+            self.group_combobox.grid()
         else:
             self.country2_label.grid_remove()
             self.country2_combobox.grid_remove()
+            self.group_label.grid_remove()
+            self.group_combobox.grid_remove()
+        
+    def toggle_offline_mode(self):
+        self._offline = self.offline_mode_var.get()
+        if self.gdp_client is not None:
+            self.gdp_client.cache.offline = self._offline
+        
+    def export_panel(self):
+        """把上一次查询的面板（国家 × 指标 × 年份）保存为 NPZ 或 Arrow 文件"""
+        if self._last_result is None:
+            messagebox.showinfo("提示", "请先查询数据")
+            return
+        path = filedialog.asksaveasfilename(title="导出数据", defaultextension=".npz", filetypes=PANEL_FILE_TYPES)
+        if not path:
+            return
+        from api.panel_io import save_panel
+        
+        _, panel = self._last_result
+        try:
+            size = save_panel(panel, path)
+        except (OSError, ValueError, ImportError) as e:
+            messagebox.showerror("错误", f"导出失败: {e}")
+            return
+        self.status_var.set(f"已导出 {len(panel.countries)} 个国家 × {len(panel.indicators)} 个指标到 "
+                            f"{os.path.basename(path)}（{size / 1024:.0f} KB）")
+        
+    def open_panel_file(self):
+        path = filedialog.askopenfilename(title="打开数据文件", filetypes=PANEL_FILE_TYPES)
+        if path:
+            self.load_panel_file(path)
+        
+    def load_panel_file(self, path):
+        """把导出的面板文件作为数据源：其中有的国家和指标不再访问网络"""
+        from api.panel_io import PanelStore
+        
+        try:
+            store = PanelStore(path)
+        except (OSError, ValueError, KeyError, ImportError) as e:
+            messagebox.showerror("错误", f"无法打开 {path}: {e}")
+            return False
+        with self._client_lock:
+            self._panel_store = store
+            if self.gdp_client is not None:
+                self.gdp_client.store = store
+        # 数据来源变了，上一次的结果不能再复用
+        self._last_result = None
+        if store.start_year is not None:
+            for spinbox, year in ((self.start_year, store.start_year), (self.end_year, store.end_year)):
+                spinbox.delete(0, tk.END)
+                spinbox.insert(0, str(year))
+        self.status_var.set(f"已打开 {os.path.basename(path)}：{len(store.countries)} 个国家 × "
+                            f"{len(store.indicators)} 个指标 ({store.start_year}-{store.end_year})")
+        return True
+        
+    def toggle_debug_panel(self):
+        """打开或关闭性能面板；面板打开期间记录各阶段耗时"""
+        if self.debug_panel_var.get():
+            from ui.debug_panel import DebugPanel
+            self.debug_panel = DebugPanel(self.master, on_close=self._on_debug_panel_closed)
+        elif self.debug_panel is not None:
+            self.debug_panel.close()
+            
+    def _on_debug_panel_closed(self):
+        self.debug_panel = None
+        self.debug_panel_var.set(False)
         
     def create_widgets(self):
         # 创建顶部框架用于输入
@@ -115,12 +290,27 @@ class GdpApp:
         
         self.comparison_checkbox = ttk.Checkbutton(
             comparison_frame, 
-            text="启用双国家比较", 
+            text="启用多国家比较", 
             variable=self.comparison_mode_var,
             command=self.toggle_comparison_mode
         )
         self.comparison_checkbox.pack(side=tk.LEFT, padx=10)
         
+        self.offline_checkbox = ttk.Checkbutton(
+            comparison_frame,
+            text="离线模式(使用缓存)",
+            variable=self.offline_mode_var,
+            command=self.toggle_offline_mode
+        )
+        self.offline_checkbox.pack(side=tk.LEFT, padx=10)
+        
+        ttk.Checkbutton(
+            comparison_frame,
+            text="性能面板",
+            variable=self.debug_panel_var,
+            command=self.toggle_debug_panel
+        ).pack(side=tk.RIGHT, padx=10)
+        
         # 国家选择区域
         country_frame = ttk.Frame(self.master, padding="5")
         country_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -134,6 +324,7 @@ class GdpApp:
         self.country_combobox.current(0)
         
         self.country_combobox.bind('<KeyRelease>', lambda e: self.filter_countries(e, self.country_combobox, self.country_var))
+        self.country_combobox.bind('<<ComboboxSelected>>', self.prefetch_selection)
         
         self.country2_label = ttk.Label(country_frame, text="比较国家:")
         self.country2_label.grid(row=0, column=2, padx=(20, 5), pady=5, sticky=tk.W)
@@ -144,9 +335,20 @@ class GdpApp:
         self.country2_combobox.current(0)
 
         self.country2_combobox.bind('<KeyRelease>', lambda e: self.filter_countries(e, self.country2_combobox, self.country2_var))
+        self.country2_combobox.bind('<<ComboboxSelected>>', self.prefetch_selection)
+        
+        # 国家组：G7、G20 或某个地区的全部国家，与上面两个国家一起比较
+        self.group_label = ttk.Label(country_frame, text="国家组:")
+        self.group_label.grid(row=0, column=4, padx=(20, 5), pady=5, sticky=tk.W)
+        self.group_var = tk.StringVar(value=NO_GROUP)
+        self.group_combobox = ttk.Combobox(country_frame, textvariable=self.group_var, width=24, state="readonly")
+        self.group_combobox.grid(row=0, column=5, padx=5, pady=5)
+        self.group_combobox['values'] = [NO_GROUP]
         
         self.country2_label.grid_remove()
         self.country2_combobox.grid_remove()
+        self.group_label.grid_remove()
+        self.group_combobox.grid_remove()
         
         year_frame = ttk.Frame(self.master, padding="5")
         year_frame.pack(fill=tk.X, padx=10, pady=5)
@@ -166,13 +368,31 @@ class GdpApp:
         
         ttk.Label(data_frame, text="数据类型:").pack(side=tk.LEFT, padx=5, pady=5)
         
-        ttk.Radiobutton(data_frame, text="GDP", variable=self.data_type_var, value="GDP").pack(side=tk.LEFT, padx=10, pady=5)
-        ttk.Radiobutton(data_frame, text="人均GDP", variable=self.data_type_var, value="GDP_PER_CAPITA").pack(side=tk.LEFT, padx=10, pady=5)
-        ttk.Radiobutton(data_frame, text="CPI", variable=self.data_type_var, value="CPI").pack(side=tk.LEFT, padx=10, pady=5)
-        ttk.Radiobutton(data_frame, text="全部", variable=self.data_type_var, value="ALL").pack(side=tk.LEFT, padx=10, pady=5)
+        # 已有查询结果时切换数据类型直接重新查询（数据通常已预取或就在上一次的结果中）
+        for indicator in INDICATORS.values():
+            ttk.Radiobutton(data_frame, text=indicator.label, variable=self.data_type_var, value=indicator.key,
+                            command=self.change_data_type).pack(side=tk.LEFT, padx=10, pady=5)
+        ttk.Radiobutton(data_frame, text="全部", variable=self.data_type_var, value="ALL",
+                        command=self.change_data_type).pack(side=tk.LEFT, padx=10, pady=5)
         
         self.search_button = ttk.Button(data_frame, text="查询", command=self.fetch_data)
         self.search_button.pack(side=tk.RIGHT, padx=10, pady=5)
+        self.ranking_button = ttk.Button(data_frame, text="排名", command=self.show_ranking)
+        self.ranking_button.pack(side=tk.RIGHT, padx=5, pady=5)
+        ttk.Button(data_frame, text="导出数据...", command=self.export_panel).pack(side=tk.RIGHT, padx=5, pady=5)
+        ttk.Button(data_frame, text="打开数据文件...", command=self.open_panel_file).pack(side=tk.RIGHT, padx=5, pady=5)
+        
+        # 派生视图：切换时只重新绘制上一次的结果
+        view_frame = ttk.Frame(self.master)
+        view_frame.pack(fill=tk.X, padx=10, pady=5)
+        
+        ttk.Label(view_frame, text="视图:").pack(side=tk.LEFT, padx=5, pady=5)
+        self.view_combobox = ttk.Combobox(view_frame, textvariable=self.view_var, width=20, state="readonly",
+                                          values=[view.label for view in VIEWS.values()])
+        self.view_combobox.pack(side=tk.LEFT, padx=5, pady=5)
+        self.view_combobox.bind('<<ComboboxSelected>>', self.change_view)
+        ttk.Checkbutton(view_frame, text="对数坐标", variable=self.log_scale_var,
+                        command=self.change_view).pack(side=tk.LEFT, padx=10, pady=5)
         
         self.progressbar = ttk.Progressbar(self.master, orient="horizontal", length=980, mode="indeterminate")
         self.progressbar.pack(pady=5)
@@ -187,38 +407,38 @@ class GdpApp:
         self.statusbar.pack(side=tk.BOTTOM, fill=tk.X)
         
     def get_country_code(self, country_name):
-        for country in self.countries_data:
-            if country['name'] == country_name:
-                return country['id']
-        return None
+        if self.country_index is None:
+            return None
+        return self.country_index.code(country_name)
         
-    def fetch_data(self):
-        # 清除现有图表
-        for widget in self.chart_frame.winfo_children():
-            widget.destroy()
+    def resolve_country_name(self, country_name):
+        """把输入解析为列表中的国家名称（支持代码、别名、部分名称和近似拼写）"""
+        if self.country_index is None:
+            return country_name
+        country = self.country_index.resolve(country_name)
+        return country['name'] if country else country_name
         
+    def fetch_data(self):
         # 获取第一个国家
         country_name = self.country_var.get()
         if country_name == "加载中...":
             messagebox.showinfo("提示", "国家列表正在加载中，请稍后再试")
             return
             
-        if not self.all_country_names or country_name not in self.all_country_names:
-            matching_countries = [c for c in self.all_country_names if country_name.lower() in c.lower()]
-            if matching_countries:
-                country_name = matching_countries[0]
-                self.country_var.set(country_name)
+        resolved = self.resolve_country_name(country_name)
+        if resolved != country_name:
+            country_name = resolved
+            self.country_var.set(country_name)
         
         comparison_mode = self.comparison_mode_var.get()
         country2_name = None
         
         if comparison_mode:
             country2_name = self.country2_var.get()
-            if not self.all_country_names or country2_name not in self.all_country_names:
-                matching_countries = [c for c in self.all_country_names if country2_name.lower() in c.lower()]
-                if matching_countries:
-                    country2_name = matching_countries[0]
-                    self.country2_var.set(country2_name)
+            resolved = self.resolve_country_name(country2_name)
+            if resolved != country2_name:
+                country2_name = resolved
+                self.country2_var.set(country2_name)
             
         try:
             start_year = int(self.start_year.get())
@@ -233,145 +453,265 @@ class GdpApp:
             
         data_type = self.data_type_var.get()
         
+        # 参与查询的国家：[名称, 代码]，代码未知时由后台线程解析
+        countries = [[country_name, self.get_country_code(country_name)]]
         if comparison_mode:
-            self.status_var.set(f"正在获取 {country_name} 和 {country2_name} 的数据...")
+            countries.append([country2_name, self.get_country_code(country2_name)])
+            group = self.group_var.get()
+            if group != NO_GROUP:
+                known = {code for _, code in countries}
+                for code in group_members(self.countries_data, group):
+                    if code not in known:
+                        countries.append([self.country_index.name(code), code])
+                        known.add(code)
+        
+        if len(countries) > 3:
+            self.status_var.set(f"正在获取 {len(countries)} 个国家的数据...")
         else:
-            self.status_var.set(f"正在获取 {country_name} 的数据...")
+            self.status_var.set(f"正在获取 {'、'.join(name for name, _ in countries)} 的数据...")
         
-        self.progressbar.start()
-        
-        country_code = self.get_country_code(country_name)
-        if not country_code:
-            country_code = self.gdp_client.get_country_code(country_name)
-            
-        if not country_code:
-            self.progressbar.stop()
-            self.status_var.set("准备就绪")
-            messagebox.showerror("错误", f"找不到国家: {country_name}")
+        if data_type == "ALL":
+            indicators = list(INDICATORS.values())
+        else:
+            indicators = [INDICATORS[data_type]]
+        
+        # 按CPI平减的视图需要同时获取CPI，即使没有选择显示它
+        fetch_indicators = list(indicators)
+        if self._current_view().needs_inflation and INDICATORS["CPI"] not in fetch_indicators:
+            fetch_indicators.append(INDICATORS["CPI"])
+        
+        query = {
+            'countries': countries,
+            'comparison_mode': comparison_mode,
+            'data_type': data_type,
+            'indicators': indicators,
+            'fetch_indicators': fetch_indicators,
+            'start_year': start_year,
+            'end_year': end_year,
+        }
+        
+        self.recent_countries.record(code for _, code in countries[:2] if code)
+        # 上一次的结果已包含所需的全部数据（如先查了"全部"再切换到单个指标）时不必查询
+        panel = self._reuse_last_panel(query)
+        if panel is not None:
+            self._show_query_result(query, panel)
             return
         
-        country2_code = None
-        if comparison_mode:
-            country2_code = self.get_country_code(country2_name)
-            if not country2_code:
-                country2_code = self.gdp_client.get_country_code(country2_name)
-                
-            if not country2_code:
-                self.progressbar.stop()
-                self.status_var.set("准备就绪")
-                messagebox.showerror("错误", f"找不到国家: {country2_name}")
-                return
+        # 网络请求放到后台线程，再次点击查询会取消尚未完成的上一次查询
+        total = len(fetch_indicators) * len(countries)
+        self.progressbar.stop()
+        self.progressbar.configure(mode="determinate", maximum=total, value=0)
+        # 排名与查询共用一个任务槽，查询完成前打开排名会取消查询，所以先禁用排名按钮
+        self.ranking_button.state(['disabled'])
+        self.jobs.submit(
+            lambda job: self._run_query(job, query),
+            on_done=lambda result: self._on_query_done(query, result),
+            on_error=self._on_query_error,
+            on_progress=self._on_query_progress,
+        )
+        # 查询结束后预取其余指标和比较国家，接下来切换数据类型时直接命中缓存
+        self.prefetch_selection()
         
-        fig = plt.Figure(figsize=(10, 6), dpi=100)
+    def change_data_type(self):
+        if self._last_result is not None:
+            self.fetch_data()
         
-        if data_type in ["GDP", "ALL"]:
-            years1, gdp_values1 = self.gdp_client.get_gdp_data(country_code, start_year, end_year)
-            
-            years2, gdp_values2 = [], []
-            if comparison_mode:
-                years2, gdp_values2 = self.gdp_client.get_gdp_data(country2_code, start_year, end_year)
-            
-            if years1 and gdp_values1 or (comparison_mode and years2 and gdp_values2):
-                ax1 = fig.add_subplot(111 if data_type != "ALL" else 311)
-                
-                if years1 and gdp_values1:
-                    ax1.plot(years1, gdp_values1, 'b-', marker='o', label=f'{country_name} GDP')
-                
-                if comparison_mode and years2 and gdp_values2:
-                    ax1.plot(years2, gdp_values2, 'r-', marker='s', label=f'{country2_name} GDP')
-                
-                title = f"GDP趋势 ({start_year}-{end_year})"
-                if not comparison_mode:
-                    title = f"{country_name} " + title
-                    
-                ax1.set_title(title)
-                ax1.set_xlabel("年份")
-                ax1.set_ylabel("GDP (美元)")
-                ax1.grid(True)
-                ax1.legend()
-            elif data_type == "GDP":
-                self.progressbar.stop()
-                self.status_var.set("准备就绪")
-                messagebox.showwarning("警告", f"找不到所选国家在指定年份的GDP数据")
-                return
-        
-        if data_type in ["GDP_PER_CAPITA", "ALL"]:
-            per_capita_years1, per_capita_values1 = self.gdp_client.get_gdp_per_capita_data(country_code, start_year, end_year)
-            
-            per_capita_years2, per_capita_values2 = [], []
-            if comparison_mode:
-                per_capita_years2, per_capita_values2 = self.gdp_client.get_gdp_per_capita_data(country2_code, start_year, end_year)
-            
-            if per_capita_years1 and per_capita_values1 or (comparison_mode and per_capita_years2 and per_capita_values2):
-                ax2 = fig.add_subplot(111 if data_type != "ALL" else 312)
-                
-                if per_capita_years1 and per_capita_values1:
-                    ax2.plot(per_capita_years1, per_capita_values1, 'g-', marker='s', label=f'{country_name} 人均GDP')
-                
-                if comparison_mode and per_capita_years2 and per_capita_values2:
-                    ax2.plot(per_capita_years2, per_capita_values2, 'm-', marker='d', label=f'{country2_name} 人均GDP')
-                
-                title = f"人均GDP趋势 ({start_year}-{end_year})"
-                if not comparison_mode:
-                    title = f"{country_name} " + title
-                    
-                ax2.set_title(title)
-                ax2.set_xlabel("年份")
-                ax2.set_ylabel("人均GDP (美元)")
-                ax2.grid(True)
-                ax2.legend()
-            elif data_type == "GDP_PER_CAPITA":
-                self.progressbar.stop()
-                self.status_var.set("准备就绪")
-                messagebox.showwarning("警告", f"找不到所选国家在指定年份的人均GDP数据")
-                return
-        
-        if data_type in ["CPI", "ALL"]:
-            cpi_years1, cpi_values1 = self.gdp_client.get_cpi_data(country_code, start_year, end_year)
-            
-            cpi_years2, cpi_values2 = [], []
-            if comparison_mode:
-                cpi_years2, cpi_values2 = self.gdp_client.get_cpi_data(country2_code, start_year, end_year)
+    def _reuse_last_panel(self, query):
+        """上一次查询的面板覆盖本次查询的国家、指标和年份时返回其子面板，否则返回 None
+
+        上一次获取失败的序列在面板中全为 NaN，需要其中任何一条时都重新查询。
+        """
+        if self._last_result is None:
+            return None
+        _, panel = self._last_result
+        codes = [code for _, code in query['countries']]
+        indicators = [i.code for i in query['fetch_indicators']]
+        if (None in codes or not all(panel.has_country(code) for code in codes)
+                or not all(panel.has_indicator(code) for code in indicators)
+                or panel.start_year > query['start_year'] or panel.end_year < query['end_year']):
+            return None
+        panel = panel.select(codes, indicators).slice(query['start_year'], query['end_year'])
+        if not panel.mask.any(axis=2).all():
+            return None
+        return panel
+        
+    def _run_query(self, job, query):
+        """在后台线程中执行：解析国家代码并批量获取所需的全部序列"""
+        # 第一次查询时在这里加载绘图模块，主线程显示结果时无需再等待导入
+        from api.series import Panel
+        import ui.charts
+        
+        client = self._get_client()
+        with span("ui.resolve", countries=len(query['countries'])):
+            for country in query['countries']:
+                if country[1]:
+                    continue
+                country[1] = client.get_country_code(country[0])
+                if not country[1]:
+                    raise LookupError(f"找不到国家: {country[0]}")
+                if job.cancelled:
+                    return None
+        
+        pairs = [(code, i.code) for _, code in query['countries'] for i in query['fetch_indicators']]
+        
+        series = {}
+        errors = []  # [(国家代码, 指标代码, 异常)]，部分失败时在状态栏中提示
+        with span("ui.fetch", series=len(pairs)):
+            results = client.fetch_many(pairs, query['start_year'], query['end_year'])
+            for done, result in enumerate(results, 1):
+                if job.cancelled:
+                    results.close()  # 停止提交剩余请求
+                    return None
+                if not result.ok:
+                    errors.append((result.country_code, result.indicator, result.error))
+                series[(result.country_code, result.indicator)] = (result.years, result.values)
+                job.report_progress(done, len(pairs))
             
-            if cpi_years1 and cpi_values1 or (comparison_mode and cpi_years2 and cpi_values2):
-                ax3 = fig.add_subplot(111 if data_type != "ALL" else 313)
-                
-                if cpi_years1 and cpi_values1:
-                    ax3.plot(cpi_years1, cpi_values1, 'r-', marker='^', label=f'{country_name} CPI')
-                
-                if comparison_mode and cpi_years2 and cpi_values2:
-                    ax3.plot(cpi_years2, cpi_values2, 'c-', marker='x', label=f'{country2_name} CPI')
-                
-                title = f"CPI趋势 ({start_year}-{end_year})"
-                if not comparison_mode:
-                    title = f"{country_name} " + title
-                    
-                ax3.set_title(title)
-                ax3.set_xlabel("年份")
-                ax3.set_ylabel("CPI (%)")
-                ax3.grid(True)
-                ax3.legend()
-            elif data_type == "CPI":
-                self.progressbar.stop()
-                self.status_var.set("准备就绪")
-                messagebox.showwarning("警告", f"找不到所选国家在指定年份的CPI数据")
-                return
-        
-        fig.tight_layout()
-        
-        canvas = FigureCanvasTkAgg(fig, self.chart_frame)
+        if errors and len(errors) == len(series):
+            raise errors[0][2]
+        query['errors'] = errors
+        return Panel.from_results(series, query['start_year'], query['end_year'],
+                                  countries=[code for _, code in query['countries']],
+                                  indicators=[i.code for i in query['fetch_indicators']])
+        
+    def _on_query_done(self, query, panel):
+        self.ranking_button.state(['!disabled'])
+        self._show_query_result(query, panel)
+        
+    def _on_query_progress(self, done, total):
+        self.progressbar.configure(value=done)
+        self.status_var.set(f"正在获取数据... ({done}/{total})")
+        
+    def _on_query_error(self, error):
+        self.ranking_button.state(['!disabled'])
+        self.progressbar.configure(value=0)
+        self.status_var.set("准备就绪")
+        if isinstance(error, LookupError):
+            messagebox.showerror("错误", str(error))
+        else:
+            messagebox.showerror("错误", f"获取数据失败: {error}")
+        
+    def show_ranking(self):
+        """在新窗口中显示结束年份所选指标（"全部"时为人均GDP）的各国排名，标出当前国家"""
+        years = self._year_range()
+        if years is None:
+            messagebox.showerror("输入错误", "起始年份必须小于结束年份")
+            return
+        data_type = self.data_type_var.get()
+        key = "GDP_PER_CAPITA" if data_type == "ALL" else data_type
+        country_name = self.resolve_country_name(self.country_var.get())
+        self.status_var.set(f"正在获取全部国家的{INDICATORS[key].label}数据...")
+        self.progressbar.configure(mode="indeterminate")
+        self.progressbar.start()
+        self.jobs.submit(
+            lambda job: self._build_ranking(key, *years),
+            on_done=lambda ranking: self._show_ranking(ranking, country_name, key, years[1]),
+            on_error=self._on_ranking_error,
+        )
+        
+    def _build_ranking(self, key, start_year, end_year):
+        """在后台线程中执行：建立或补充排名索引；年份区间变化时重新建立"""
+        from api.ranking import RankingIndex
+        
+        client = self._get_client()
+        code = INDICATORS[key].code
+        ranking = self.ranking
+        if ranking is None or (ranking.start_year, ranking.end_year) != (start_year, end_year):
+            if self._ranking_listener is not None:
+                client.cache.unsubscribe(self._ranking_listener)
+            ranking = RankingIndex(client.get_country_index().countries, start_year, end_year)
+            self._ranking_listener = ranking.attach(client.cache)
+            self.ranking = ranking
+        if code not in ranking.indicators:
+            ranking.load(client, [code])
+        return ranking
+        
+    def _show_ranking(self, ranking, country_name, key, year):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from ui.charts import GDPChart, configure_fonts
+        
+        configure_fonts()
+        self.progressbar.stop()
+        self.progressbar.configure(mode="determinate", value=0)
+        code = INDICATORS[key].code
+        # 结束年份还没有数据时用最近有数据的一年
+        if not ranking.count(code, year):
+            year = ranking.latest_year(code)
+        if year is None:
+            self.status_var.set("准备就绪")
+            messagebox.showwarning("警告", f"没有任何国家的{INDICATORS[key].label}数据")
+            return
+        fig = GDPChart(country_name).create_ranking_figure(ranking, key, year)
+        window = tk.Toplevel(self.master)
+        window.title(f"{year}年{INDICATORS[key].label}排名")
+        canvas = FigureCanvasTkAgg(fig, window)
         canvas.draw()
         canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        self.status_var.set(f"显示 {year} 年{INDICATORS[key].label}排名（共 {ranking.count(code, year)} 个国家）")
         
+    def _on_ranking_error(self, error):
         self.progressbar.stop()
-        if comparison_mode:
-            self.status_var.set(f"显示 {country_name} 和 {country2_name} 的数据对比 ({start_year}-{end_year})")
+        self.progressbar.configure(mode="determinate", value=0)
+        self.status_var.set("准备就绪")
+        messagebox.showerror("错误", f"获取排名数据失败: {error}")
+        
+    def _current_view(self):
+        label = self.view_var.get()
+        return next((view for view in VIEWS.values() if view.label == label), VIEWS["RAW"])
+        
+    def change_view(self, event=None):
+        """切换视图或坐标类型：用上一次的查询结果重新绘制，不访问网络"""
+        if self._last_result is None:
+            return
+        query, panel = self._last_result
+        if self._current_view().needs_inflation and not panel.has_indicator(INDICATORS["CPI"].code):
+            # 上一次查询没有CPI数据，需要重新获取
+            self.fetch_data()
+            return
+        self._show_query_result(query, panel)
+        
+    def _show_query_result(self, query, panel):
+        """在Tk主线程中根据查询结果绘制图表"""
+        from api.metrics import MetricEngine
+        from ui.charts import query_specs
+        
+        self._last_result = (query, panel)
+        if self.metrics is None:
+            self.metrics = MetricEngine()
+        # 派生序列按视图对整个面板一次算完，并按输入内容缓存
+        view = self._current_view()
+        with span("ui.metrics", view=view.key):
+            panel = self.metrics.panel(view, panel)
+        with span("ui.specs"):
+            specs = query_specs(query, panel, view, self.log_scale_var.get())
+        if len(specs) == 1 and not specs[0].lines:
+            self.progressbar.configure(value=0)
+            self.status_var.set("准备就绪")
+            messagebox.showwarning("警告", f"找不到所选国家在指定年份的{specs[0].indicator.label}数据")
+            return
+        
+        self._get_chart().show(specs)
+        
+        self.progressbar.configure(value=0)
+        countries = query['countries']
+        start_year = query['start_year']
+        end_year = query['end_year']
+        if query['comparison_mode']:
+            names = '、'.join(name for name, _ in countries) if len(countries) <= 3 else f"{len(countries)} 个国家"
+            self.status_var.set(f"显示 {names} 的数据对比 ({start_year}-{end_year})")
         else:
-            self.status_var.set(f"显示 {country_name} 的数据 ({start_year}-{end_year})")
+            self.status_var.set(f"显示 {countries[0][0]} 的数据 ({start_year}-{end_year})")
+        errors = query.get('errors')
+        if errors:
+            country, indicator, error = errors[0]
+            self.status_var.set(f"{self.status_var.get()}；{len(errors)} 条数据获取失败"
+                                f"（{country} {get_indicator(indicator).label}: {error}）")
 
-def run_app():
+def run_app(panel_path=None):
     root = tk.Tk()
     app = GdpApp(root)
+    if panel_path:
+        app.load_panel_file(panel_path)
     root.mainloop()
 
 if __name__ == "__main__":
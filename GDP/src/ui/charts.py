@@ -1,28 +1,77 @@
-import matplotlib.pyplot as plt
+import functools
+
+import matplotlib
 import numpy as np
 from matplotlib.figure import Figure
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.ticker import FuncFormatter
+
+from api.indicators import INDICATORS, get_indicator
+from api.series import Series
+from api.trace import span
+from ui.lod import LodAxes, downsample
+
+# 图中的标题和坐标轴标签是中文，依次尝试这些字体（Windows、macOS、Linux）
+CJK_FONTS = ['SimHei', 'Microsoft YaHei', 'SimSun', 'PingFang SC', 'Heiti SC',
+             'Noto Sans CJK SC', 'WenQuanYi Micro Hei', 'Arial Unicode MS']
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_cjk_font():
+    """返回本机已安装的第一个中文字体，没有时返回 None；每个进程只查找一次"""
+    from matplotlib import font_manager
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    return next((name for name in CJK_FONTS if name in installed), None)
+
+
+def configure_fonts():
+    """配置matplotlib支持中文显示
+
+    只把实际安装的字体放在首位，matplotlib 不必在每次绘制时逐个查找
+    缺失的字体。
+    """
+    font = resolve_cjk_font()
+    if font is not None:
+        fallback = [name for name in matplotlib.rcParams['font.sans-serif'] if name != font]
+        matplotlib.rcParams['font.sans-serif'] = [font] + fallback
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
 
 class GDPChart:
     def __init__(self, country_name, years=None, gdp_values=None, 
                  per_capita_years=None, per_capita_values=None,
-                 cpi_years=None, cpi_values=None):
+                 cpi_years=None, cpi_values=None, series=None):
         self.country_name = country_name
-        self.years = years
-        self.gdp_values = gdp_values
-        self.per_capita_years = per_capita_years
-        self.per_capita_values = per_capita_values
-        self.cpi_years = cpi_years
-        self.cpi_values = cpi_values
+        
+        # 按指标标识保存的 Series {key: Series}，可包含任意已注册指标；
+        # series 参数中的值可以是 Series，也可以是 (years, values)
+        self.series = {
+            "GDP": _as_series((years, gdp_values)),
+            "GDP_PER_CAPITA": _as_series((per_capita_years, per_capita_values)),
+            "CPI": _as_series((cpi_years, cpi_values)),
+        }
+        for key, data in (series or {}).items():
+            self.series[get_indicator(key).key] = _as_series(data)
+    
+    @classmethod
+    def from_panel(cls, country_name, panel, country_code):
+        """从 Panel 中取出某个国家的全部指标"""
+        series = {indicator: panel.series(country_code, indicator) for indicator in panel.indicators}
+        return cls(country_name, series=series)
     
     def plot_gdp(self):
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(12, 8))
         
         # GDP总量
-        if self.years and self.gdp_values:
-            plt.subplot(2, 1, 1)
-            plt.plot(self.years, self.gdp_values, marker='o', color='blue', linewidth=2)
-            plt.title(f'GDP of {self.country_name} ({min(self.years)}-{max(self.years)})')
+        gdp = self.series["GDP"]
+        if gdp:
+            years, values = gdp.dropna()
+            ax = plt.subplot(2, 1, 1)
+            line, = plt.plot(years, values, marker='o', color='blue', linewidth=2)
+            _attach_lod(ax, line, years, values, 'o')
+            plt.title(f'GDP of {self.country_name} ({years[0]}-{years[-1]})')
             plt.xlabel('Year')
             plt.ylabel('GDP (current US$)')
             plt.grid(True, alpha=0.3)
@@ -36,10 +85,13 @@ class GDPChart:
             plt.xticks(rotation=45)
         
         # 人均GDP
-        if self.per_capita_years and self.per_capita_values:
-            plt.subplot(2, 1, 2)
-            plt.plot(self.per_capita_years, self.per_capita_values, marker='s', color='green', linewidth=2)
-            plt.title(f'GDP per Capita of {self.country_name} ({min(self.per_capita_years)}-{max(self.per_capita_years)})')
+        per_capita = self.series["GDP_PER_CAPITA"]
+        if per_capita:
+            years, values = per_capita.dropna()
+            ax = plt.subplot(2, 1, 2)
+            line, = plt.plot(years, values, marker='s', color='green', linewidth=2)
+            _attach_lod(ax, line, years, values, 's')
+            plt.title(f'GDP per Capita of {self.country_name} ({years[0]}-{years[-1]})')
             plt.xlabel('Year')
             plt.ylabel('GDP per Capita (current US$)')
             plt.grid(True, alpha=0.3)
@@ -50,36 +102,45 @@ class GDPChart:
 
     def create_figure(self):
         """创建包含GDP和人均GDP数据的图表"""
-        fig = plt.Figure(figsize=(10, 8), dpi=100)
-        
-        # 添加GDP子图
-        if self.years and self.gdp_values:
-            ax1 = fig.add_subplot(211)
-            ax1.plot(self.years, self.gdp_values, 'b-', marker='o')
-            ax1.set_title(f"{self.country_name} GDP趋势")
-            ax1.set_xlabel("年份")
-            ax1.set_ylabel("GDP (美元)")
-            ax1.grid(True)
+        return self.create_indicator_figure(["GDP", "GDP_PER_CAPITA"], figsize=(10, 8))
+    
+    def create_indicator_figure(self, keys=None, figsize=None):
+        """为任意一组已注册指标创建纵向排列的子图，keys 默认为全部已注册指标"""
+        keys = list(keys or INDICATORS)
+        fig = Figure(figsize=figsize or (10, 4 * len(keys)), dpi=100)
         
-        # 添加人均GDP子图
-        if self.per_capita_years and self.per_capita_values:
-            ax2 = fig.add_subplot(212)
-            ax2.plot(self.per_capita_years, self.per_capita_values, 'g-', marker='s')
-            ax2.set_title(f"{self.country_name} 人均GDP趋势")
-            ax2.set_xlabel("年份")
-            ax2.set_ylabel("人均GDP (美元)")
-            ax2.grid(True)
+        for position, key in enumerate(keys, 1):
+            series = self.series.get(get_indicator(key).key)
+            if series:
+                ax = fig.add_subplot(len(keys), 1, position)
+                self._plot_indicator(ax, get_indicator(key), *series.dropna())
         
         fig.tight_layout()
         return fig
     
+    def _plot_indicator(self, ax, indicator, years, values):
+        line_style, marker = indicator.style(0)
+        line, = ax.plot(years, values, line_style, marker=marker)
+        _attach_lod(ax, line, years, values, marker)
+        ax.set_title(f"{self.country_name} {indicator.title}")
+        ax.set_xlabel("年份")
+        ax.set_ylabel(indicator.axis_label)
+        ax.grid(True)
+        if indicator.key == "CPI":
+            ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
+    
     def create_cpi_figure(self):
         """创建CPI数据图表"""
-        fig = plt.Figure(figsize=(10, 6), dpi=100)
+        fig = Figure(figsize=(10, 6), dpi=100)
         
-        if self.cpi_years and self.cpi_values:
+        cpi = self.series["CPI"]
+        if cpi:
+            years, values = cpi.dropna()
             ax = fig.add_subplot(111)
-            ax.plot(self.cpi_years, self.cpi_values, 'r-', marker='^')
+            line, = ax.plot(years, values, 'r-', marker='^')
+            _attach_lod(ax, line, years, values, '^')
+            # 填充区域不随缩放更新，按整幅宽度降采样一次（minmax 保留正负极值）
+            years, values, _ = downsample(years, values, int(ax.bbox.width))
             ax.set_title(f"{self.country_name} 通货膨胀率(CPI)趋势")
             ax.set_xlabel("年份")
             ax.set_ylabel("通胀率 (%)")
@@ -88,13 +149,13 @@ class GDPChart:
             ax.axhline(y=0, color='k', linestyle='-', alpha=0.3)
             
             # 为高通胀区域添加红色背景
-            ax.fill_between(self.cpi_years, self.cpi_values, 0, 
-                           where=[v > 5 for v in self.cpi_values],
+            ax.fill_between(years, values, 0, 
+                           where=values > 5,
                            color='red', alpha=0.2, label='高通胀')
             
             # 为低通胀/通缩区域添加蓝色背景
-            ax.fill_between(self.cpi_years, self.cpi_values, 0,
-                           where=[v < 0 for v in self.cpi_values],
+            ax.fill_between(years, values, 0,
+                           where=values < 0,
                            color='blue', alpha=0.2, label='通货紧缩')
             
             ax.grid(True)
@@ -104,35 +165,251 @@ class GDPChart:
     
     def create_combined_figure(self):
         """创建包含GDP、人均GDP和CPI的组合图表"""
-        fig = plt.Figure(figsize=(10, 12), dpi=100)
-        
-        # 添加GDP子图
-        if self.years and self.gdp_values:
-            ax1 = fig.add_subplot(311)
-            ax1.plot(self.years, self.gdp_values, 'b-', marker='o')
-            ax1.set_title(f"{self.country_name} GDP趋势")
-            ax1.set_xlabel("年份")
-            ax1.set_ylabel("GDP (美元)")
-            ax1.grid(True)
-        
-        # 添加人均GDP子图
-        if self.per_capita_years and self.per_capita_values:
-            ax2 = fig.add_subplot(312)
-            ax2.plot(self.per_capita_years, self.per_capita_values, 'g-', marker='s')
-            ax2.set_title(f"{self.country_name} 人均GDP趋势")
-            ax2.set_xlabel("年份")
-            ax2.set_ylabel("人均GDP (美元)")
-            ax2.grid(True)
-        
-        # 添加CPI子图
-        if self.cpi_years and self.cpi_values:
-            ax3 = fig.add_subplot(313)
-            ax3.plot(self.cpi_years, self.cpi_values, 'r-', marker='^')
-            ax3.set_title(f"{self.country_name} 通货膨胀率(CPI)趋势")
-            ax3.set_xlabel("年份")
-            ax3.set_ylabel("通胀率 (%)")
-            ax3.axhline(y=0, color='k', linestyle='-', alpha=0.3)
-            ax3.grid(True)
+        return self.create_indicator_figure(["GDP", "GDP_PER_CAPITA", "CPI"], figsize=(10, 12))
+    
+    def create_ranking_figure(self, ranking, key, year, n=20):
+        """某年某指标排名前 n 的国家的横向条形图
+
+        ranking 为 api.ranking.RankingIndex；本国（按名称或代码匹配）用醒目的
+        颜色标出，不在前 n 名时追加在最后。
+        """
+        indicator = get_indicator(key)
+        rows = ranking.top(indicator.code, year, n)
+        own = next((row for row in rows if self.country_name in (row.name, row.country)), None)
+        if own is None:
+            code = next((code for code, name in ranking.names.items() if self.country_name in (name, code)), None)
+            own = ranking.rank(code, indicator.code, year) if code else None
+            if own is not None:
+                rows.append(own)
         
+        fig = Figure(figsize=(10, max(4, 0.3 * len(rows) + 1.5)), dpi=100)
+        ax = fig.add_subplot(111)
+        # 第一名在最上面
+        rows = rows[::-1]
+        ax.barh(range(len(rows)), [row.value for row in rows],
+                color=['C3' if row is own else 'C0' for row in rows])
+        ax.set_yticks(range(len(rows)))
+        ax.set_yticklabels([f"{row.rank}. {row.name}" for row in rows], fontsize='small')
+        ax.xaxis.set_major_formatter(FuncFormatter(lambda x, pos: indicator.format(x)))
+        ax.set_title(f"{year}年{indicator.label}排名（共 {ranking.count(indicator.code, year)} 个国家）")
+        ax.set_xlabel(indicator.axis_label)
+        ax.grid(True, axis='x', alpha=0.3)
+        if own is not None:
+            ax.annotate(f"第 {own.rank} 名，高于 {own.percentile:.0f}% 的国家",
+                        xy=(1, 0), xycoords='axes fraction', ha='right', va='bottom', fontsize='small')
         fig.tight_layout()
-        return fig
\ No newline at end of file
+        return fig
+
+
+class LineSpec:
+    """ChartView 中的一条折线"""
+
+    def __init__(self, label, years, values, fmt='-', marker=None, linewidth=None, color=None):
+        self.label = label
+        self.years = years
+        self.values = values
+        self.fmt = fmt
+        self.marker = marker
+        self.linewidth = linewidth
+        self.color = color
+
+    @property
+    def style(self):
+        return (self.fmt, self.marker, self.linewidth, self.color)
+
+
+class AxesSpec:
+    """ChartView 中的一个子图；lines 为空时该子图隐藏
+
+    ylabel、formatter 默认取自指标，派生视图（如同比增长率）可以覆盖。
+    """
+
+    def __init__(self, indicator, title, lines, legend_outside=False, ylabel=None, formatter=None,
+                 log_scale=False):
+        self.indicator = indicator
+        self.title = title
+        self.lines = lines
+        self.legend_outside = legend_outside  # 国家较多时把图例放到坐标轴右侧
+        self.ylabel = ylabel or indicator.axis_label
+        self.formatter = formatter or indicator.format
+        self.log_scale = log_scale  # 数据全为正数时使用对数坐标
+
+
+def query_specs(query, panel, view, log_scale=False):
+    """把界面的一次查询结果转换为 ChartView 的子图列表，每个指标一个子图
+
+    query 与 GdpApp.fetch_data 构造的字典相同，panel 为已按视图计算过的面板。
+    某个指标没有任何数据时对应子图的 lines 为空。
+    """
+    countries = query['countries']
+    start_year = query['start_year']
+    end_year = query['end_year']
+    specs = []
+    for indicator in query['indicators']:
+        lines = []
+        for i, (name, code) in enumerate(countries):
+            series = panel.series(code, indicator.code)
+            if not series:
+                continue
+            years, values = series.dropna()
+            if len(countries) <= len(indicator.styles):
+                line_style, marker = indicator.style(i)
+                lines.append(LineSpec(f'{name} {indicator.label}', years, values, line_style, marker=marker))
+            else:
+                # 国家较多时按默认颜色循环着色，不画标记
+                lines.append(LineSpec(name, years, values, '-', linewidth=1.2, color=f'C{i % 10}'))
+
+        title = f"{view.title(indicator)} ({start_year}-{end_year})"
+        if not query['comparison_mode']:
+            title = f"{countries[0][0]} " + title
+        specs.append(AxesSpec(indicator, title, lines, legend_outside=len(countries) > 4,
+                              ylabel=view.axis_label(indicator),
+                              formatter=lambda x, indicator=indicator: view.format(indicator, x),
+                              log_scale=log_scale))
+    return specs
+
+
+class ChartView:
+    """持久的图表视图：整个会话只有一个 Figure 和画布
+
+    新查询只用 set_data 更新已有的 Line2D 并重新计算坐标范围，然后
+    draw_idle；只有子图数量变化时才重建坐标轴，只有刻度格式或坐标轴外的
+    图例变化时才重新 tight_layout。master 为 None 时使用 Agg 画布（无界面）。
+
+    lod 为真时每个子图的折线按像素宽度降采样（见 ui.lod），缩放时从完整
+    数据重新截取；lod_method 为 'minmax' 或 'lttb'。
+    """
+
+    def __init__(self, master=None, figsize=(10, 6), dpi=100, lod=True, lod_method='minmax'):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master)
+            self.canvas.get_tk_widget().pack(fill='both', expand=True)
+        # Tk 画布的 draw_idle 在空闲时才真正绘制，所以在 draw 本身上计时
+        draw = self.canvas.draw
+
+        def traced_draw(*args, **kwargs):
+            with span("chart.draw"):
+                return draw(*args, **kwargs)
+
+        self.canvas.draw = traced_draw
+        self.lod = lod
+        self.lod_method = lod_method
+        self.axes = []
+        self._lines = []  # 与 axes 对应：每个子图上的 [(style, Line2D), ...]
+        self._lod = []    # 与 axes 对应：每个子图的 LodAxes（lod 为假时为 None）
+        self._decorations = None
+        self.rebuilds = 0  # 重建坐标轴的次数
+
+    def show(self, specs):
+        """按 AxesSpec 列表更新图表"""
+        with span("chart.update", axes=len(specs)):
+            if len(specs) != len(self.axes):
+                self._rebuild(len(specs))
+            for ax, lines, lod, spec in zip(self.axes, self._lines, self._lod, specs):
+                self._update_axes(ax, lines, lod, spec)
+
+        decorations = tuple(self._decoration(spec) for spec in specs)
+        if decorations != self._decorations:
+            self._decorations = decorations
+            with span("chart.layout"):
+                self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def clear(self):
+        self._rebuild(0)
+        self.canvas.draw_idle()
+
+    @staticmethod
+    def _decoration(spec):
+        """影响子图边距的部分：刻度格式、是否可见和坐标轴外的图例"""
+        outside = tuple(line.label for line in spec.lines) if spec.legend_outside else None
+        return (spec.ylabel, spec.log_scale, bool(spec.lines), outside)
+
+    def _rebuild(self, count):
+        self.figure.clear()
+        self.axes = [self.figure.add_subplot(count, 1, position) for position in range(1, count + 1)]
+        self._lines = [[] for _ in self.axes]
+        self._lod = [LodAxes(ax, self.lod_method) if self.lod else None for ax in self.axes]
+        self._decorations = None
+        self.rebuilds += 1
+        for ax in self.axes:
+            ax.set_xlabel("年份")
+            ax.grid(True)
+
+    @property
+    def drawn_points(self):
+        """当前实际绘制的点数（降采样之后）"""
+        if not self.lod:
+            return sum(len(line.get_xdata()) for lines in self._lines for _, line in lines)
+        return sum(lod.drawn_points for lod in self._lod)
+
+    def _update_axes(self, ax, lines, lod, spec):
+        ax.set_visible(bool(spec.lines))
+        if not spec.lines:
+            if lod is not None:
+                lod.set_lines([])
+            return
+
+        # 线型不变的折线原地更新数据，其余的删掉重画；降采样时数据由 LodAxes 设置
+        for i, line_spec in enumerate(spec.lines):
+            years, values = ([], []) if lod is not None else (line_spec.years, line_spec.values)
+            if i < len(lines) and lines[i][0] == line_spec.style:
+                line = lines[i][1]
+                line.set_data(years, values)
+                line.set_label(line_spec.label)
+                continue
+            if i < len(lines):
+                lines[i][1].remove()
+            kwargs = {'label': line_spec.label}
+            for name in ('marker', 'linewidth', 'color'):
+                if getattr(line_spec, name) is not None:
+                    kwargs[name] = getattr(line_spec, name)
+            line, = ax.plot(years, values, line_spec.fmt, **kwargs)
+            if i < len(lines):
+                lines[i] = (line_spec.style, line)
+            else:
+                lines.append((line_spec.style, line))
+        for _, line in lines[len(spec.lines):]:
+            line.remove()
+        del lines[len(spec.lines):]
+        if lod is not None:
+            # 先按全部数据的范围降采样，relim 得到完整的坐标范围；
+            # autoscale_view 改变 xlim 后 LodAxes 会按可见范围再降采样一次
+            lod.set_lines([(line, line_spec.years, line_spec.values, line_spec.marker)
+                           for line_spec, (_, line) in zip(spec.lines, lines)])
+            lod.refresh(full=True)
+
+        # 切换坐标类型会重置刻度格式，所以要在设置格式之前
+        positive = all(np.nanmin(line.values, initial=np.inf) > 0 for line in spec.lines)
+        scale = 'log' if spec.log_scale and positive else 'linear'
+        if ax.get_yscale() != scale:
+            ax.set_yscale(scale)
+        ax.relim()
+        ax.autoscale_view()
+        ax.set_title(spec.title)
+        ax.set_ylabel(spec.ylabel)
+        ax.yaxis.set_major_formatter(FuncFormatter(lambda x, pos, formatter=spec.formatter: formatter(x)))
+        if spec.legend_outside:
+            ax.legend(fontsize='x-small', ncol=2, loc='center left', bbox_to_anchor=(1.0, 0.5))
+        else:
+            ax.legend()
+
+
+def _attach_lod(ax, line, years, values, marker):
+    """按子图像素宽度降采样已画好的折线，缩放时从完整数据重新截取"""
+    lod = LodAxes(ax)
+    lod.add(line, years, values, marker)
+    lod.refresh()
+
+
+def _as_series(data):
+    if isinstance(data, Series):
+        return data
+    years, values = data
+    if years is None or values is None:
+        return Series.empty()
+    return Series.from_lists(years, values)
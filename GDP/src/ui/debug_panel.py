@@ -0,0 +1,94 @@
+"""性能面板：各阶段耗时的滚动统计
+
+打开时启用追踪（见 api.trace），每秒刷新一次，列出每种 span 最近的次数、
+平均值、分位数和耗时分布；可以把最近的事件导出为 Chrome trace JSON。
+关闭时恢复打开前的追踪状态。
+"""
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from api import trace
+
+# 刷新间隔（毫秒）
+REFRESH_MS = 1000
+SPARK = " ▁▂▃▄▅▆▇█"
+COLUMNS = [
+    ("count", "次数", 60),
+    ("mean", "平均(ms)", 80),
+    ("p50", "p50(ms)", 80),
+    ("p95", "p95(ms)", 80),
+    ("max", "最大(ms)", 80),
+    ("total", "合计(ms)", 90),
+    ("histogram", "分布", 110),
+]
+
+
+class DebugPanel:
+    def __init__(self, master, on_close=None):
+        self.on_close = on_close
+        self._was_enabled = trace.is_enabled()
+        trace.enable()
+
+        self.window = tk.Toplevel(master)
+        self.window.title("性能面板")
+        self.window.geometry("820x380")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        toolbar = ttk.Frame(self.window, padding="5")
+        toolbar.pack(fill=tk.X)
+        ttk.Button(toolbar, text="清空", command=self.clear).pack(side=tk.LEFT, padx=5)
+        ttk.Button(toolbar, text="导出 Chrome trace...", command=self.export).pack(side=tk.LEFT, padx=5)
+        edges = " ".join(f"{edge:g}" for edge in trace.BUCKETS_MS)
+        ttk.Label(toolbar, text=f"分布的分桶上界(ms): {edges} ∞").pack(side=tk.RIGHT, padx=5)
+
+        self.tree = ttk.Treeview(self.window, columns=[key for key, _, _ in COLUMNS])
+        self.tree.heading("#0", text="阶段")
+        self.tree.column("#0", width=180)
+        for key, title, width in COLUMNS:
+            self.tree.heading(key, text=title)
+            self.tree.column(key, width=width, anchor=tk.E if key != "histogram" else tk.W)
+        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+        self._after = None
+        self.refresh()
+
+    def refresh(self):
+        self.tree.delete(*self.tree.get_children())
+        for row in trace.TRACER.summary():
+            self.tree.insert("", tk.END, text=row['name'], values=(
+                row['count'],
+                f"{row['mean_ms']:.2f}",
+                f"{row['p50_ms']:.2f}",
+                f"{row['p95_ms']:.2f}",
+                f"{row['max_ms']:.2f}",
+                f"{row['total_ms']:.1f}",
+                _spark(row['histogram']),
+            ))
+        self._after = self.window.after(REFRESH_MS, self.refresh)
+
+    def clear(self):
+        trace.TRACER.clear()
+        self.tree.delete(*self.tree.get_children())
+
+    def export(self):
+        path = filedialog.asksaveasfilename(parent=self.window, defaultextension=".json",
+                                            filetypes=[("Chrome trace", "*.json")],
+                                            initialfile="gdp-trace.json")
+        if path:
+            trace.TRACER.export_chrome(path)
+            messagebox.showinfo("导出完成", f"已写入 {path}\n可在 chrome://tracing 或 Perfetto 中打开",
+                                parent=self.window)
+
+    def close(self):
+        if self._after is not None:
+            self.window.after_cancel(self._after)
+        if not self._was_enabled:
+            trace.disable()
+        self.window.destroy()
+        if self.on_close:
+            self.on_close()
+
+
+def _spark(counts):
+    peak = max(counts) or 1
+    return "".join(SPARK[0] if n == 0 else SPARK[max(1, round(n / peak * (len(SPARK) - 1)))] for n in counts)
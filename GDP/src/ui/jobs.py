@@ -0,0 +1,113 @@
+import itertools
+import queue
+import threading
+
+
+class Job:
+    """一个后台查询任务，工作函数应在适当位置检查 cancelled 并尽早退出"""
+
+    def __init__(self, job_id, scheduler):
+        self.id = job_id
+        self._scheduler = scheduler
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def report_progress(self, done, total):
+        """在工作线程中调用，进度会被送回Tk主线程"""
+        if not self.cancelled:
+            self._scheduler._post(self, 'progress', (done, total))
+
+
+class JobScheduler:
+    """在后台线程执行查询，并把进度和结果送回Tk主线程
+
+    工作线程只往队列里放消息，主线程用 master.after 定时取出并调用回调，
+    所以回调里可以安全地操作Tk控件。提交新任务时会取消上一个尚未完成的任务，
+    被取代任务的进度和结果都会被丢弃。
+    """
+
+    def __init__(self, master, poll_interval=20):
+        self.master = master
+        self.poll_interval = poll_interval  # 毫秒
+        self._queue = queue.Queue()
+        self._ids = itertools.count(1)
+        self._current = None
+        self._callbacks = {}
+        self._polling = False
+
+    @property
+    def busy(self):
+        return self._current is not None
+
+    def submit(self, work, on_done, on_error=None, on_progress=None):
+        """在后台线程中执行 work(job)，完成后在主线程调用 on_done(result)"""
+        self.cancel()
+
+        job = Job(next(self._ids), self)
+        self._current = job
+        self._callbacks[job.id] = (on_done, on_error, on_progress)
+
+        thread = threading.Thread(target=self._run, args=(job, work), daemon=True)
+        thread.start()
+        self._ensure_polling()
+        return job
+
+    def cancel(self):
+        """取消当前任务（如果有）"""
+        if self._current is not None:
+            self._current.cancel()
+            self._callbacks.pop(self._current.id, None)
+            self._current = None
+
+    def _run(self, job, work):
+        try:
+            result = work(job)
+        except Exception as e:
+            self._post(job, 'error', e)
+        else:
+            self._post(job, 'done', result)
+
+    def _post(self, job, kind, payload):
+        self._queue.put((job, kind, payload))
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.master.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        while True:
+            try:
+                job, kind, payload = self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+            callbacks = self._callbacks.get(job.id)
+            if callbacks is None or job.cancelled:
+                continue
+            on_done, on_error, on_progress = callbacks
+
+            if kind == 'progress':
+                if on_progress:
+                    on_progress(*payload)
+                continue
+
+            # 任务结束
+            self._callbacks.pop(job.id, None)
+            if self._current is job:
+                self._current = None
+            if kind == 'done':
+                on_done(payload)
+            elif on_error:
+                on_error(payload)
+
+        if self._current is not None:
+            self.master.after(self.poll_interval, self._poll)
+        else:
+            self._polling = False
@@ -0,0 +1,165 @@
+"""折线的细节层次（LOD）：按像素宽度降采样
+
+年度数据每条线只有几十个点，但月度、季度序列或几十个国家叠加时，逐点
+绘制（尤其是带标记）的耗时和杂乱程度都随点数线性增长。这里让每条线
+最多画出与像素宽度相当的点数：
+
+- minmax_indices：把 x 范围按像素分桶，每桶保留最小值和最大值所在的点，
+  折线的包络和坐标范围与原数据完全一致（默认）；
+- lttb_indices：Largest-Triangle-Three-Buckets，每桶保留一个与前后两桶
+  围成三角形面积最大的点，点数减半、形状更平滑，但不保证保留极值。
+
+LodAxes 保存子图上每条线的全部数据，坐标范围变化（缩放、平移）时从
+全部数据中重新截取可见部分再降采样，放大后看到的仍是完整分辨率。一个
+子图上所有线共享 MAX_POINTS 的点数预算，所以无论序列多长、叠加多少条，
+一次重绘的点数都有上限。可见点过密时不画标记。
+"""
+import numpy as np
+
+# 每个子图最多绘制的点数（所有线合计）
+MAX_POINTS = 10_000
+# 每条线至少保留的分桶数，线很多时也能看出大致形状
+MIN_BUCKETS = 16
+# 相邻标记的平均间距小于这么多像素时不画标记
+MARKER_SPACING_PX = 6
+
+
+def minmax_indices(x, y, buckets):
+    """按 x 等宽分成 buckets 桶，返回各桶最小值、最大值及首尾点的下标（升序）
+
+    x 必须升序且不含 NaN，y 不含 NaN（即 Series.dropna() 的结果）。
+    """
+    n = len(x)
+    if n <= 2 * buckets + 2:
+        return np.arange(n)
+    edges = np.linspace(x[0], x[-1], buckets + 1)[:-1]
+    starts = np.unique(np.searchsorted(x, edges, side='left'))  # 非空桶的起点
+    bucket = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+    picked = [[0, n - 1]]
+    for reduce in (np.minimum, np.maximum):
+        # 每桶第一个等于桶内极值的点
+        hits = np.flatnonzero(y == reduce.reduceat(y, starts)[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        picked.append(hits[first])
+    return np.unique(np.concatenate(picked))
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets：返回 threshold 个点的下标（升序）"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # 首尾点固定，中间 n-2 个点按下标均分为 threshold-2 桶
+    bounds = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+    previous = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # 下一桶的平均点（最后一桶之后是末尾点）
+        if i + 2 < len(bounds):
+            next_x = x[end:bounds[i + 2]].mean()
+            next_y = y[end:bounds[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        px, py = x[previous], y[previous]
+        area = np.abs((px - next_x) * (y[start:end] - py) - (px - x[start:end]) * (next_y - py))
+        previous = start + int(np.argmax(area))
+        indices[i + 1] = previous
+    return indices
+
+
+METHODS = {
+    'minmax': minmax_indices,
+    # 与 minmax 点数相当：每桶一个点，桶数翻倍
+    'lttb': lambda x, y, buckets: lttb_indices(x, y, 2 * buckets + 2),
+}
+
+
+def visible_range(x, xlim):
+    """x 中落在 xlim 内的下标范围，两侧各多留一个点，让折线延伸到边缘"""
+    low, high = sorted(xlim)
+    start = max(int(np.searchsorted(x, low, side='left')) - 1, 0)
+    end = min(int(np.searchsorted(x, high, side='right')) + 1, len(x))
+    return start, end
+
+
+def downsample(x, y, buckets, method='minmax', xlim=None):
+    """截取 xlim 内的部分并降采样到约 2*buckets 个点，返回 (x, y, 可见的原始点数)"""
+    start, end = (0, len(x)) if xlim is None else visible_range(x, xlim)
+    x, y = x[start:end], y[start:end]
+    indices = METHODS[method](x, y, buckets)
+    if len(indices) == len(x):
+        return x, y, len(x)
+    return x[indices], y[indices], len(x)
+
+
+def show_markers(count, width_px):
+    """count 个点铺满 width_px 像素时是否还画得下标记"""
+    return count * MARKER_SPACING_PX <= width_px
+
+
+class LodLine:
+    """一条 Line2D 及其全部数据"""
+
+    __slots__ = ('line', 'x', 'y', 'marker', 'drawn', '_key')
+
+    def __init__(self, line, x, y, marker=None):
+        self.line = line
+        self.x = np.asarray(x)
+        self.y = np.asarray(y)
+        self.marker = marker  # 稀疏时使用的标记
+        self.drawn = len(self.x)  # 当前实际绘制的点数
+        self._key = None
+
+    def refresh(self, buckets, width_px, method, xlim):
+        start, end = (0, len(self.x)) if xlim is None else visible_range(self.x, xlim)
+        key = (start, end, buckets, width_px, method)
+        if key == self._key:
+            return
+        self._key = key
+        x, y, visible = downsample(self.x[start:end], self.y[start:end], buckets, method)
+        self.line.set_data(x, y)
+        self.drawn = len(x)
+        if self.marker is not None:
+            self.line.set_marker(self.marker if show_markers(visible, width_px) else 'None')
+
+
+class LodAxes:
+    """一个子图上按像素宽度降采样的折线
+
+    坐标范围变化时自动按新的可见范围重新降采样。set_lines 之后调用
+    refresh(full=True) 使用全部数据的范围，以便随后 relim/autoscale。
+    """
+
+    def __init__(self, ax, method='minmax', max_points=MAX_POINTS):
+        self.ax = ax
+        self.method = method
+        self.max_points = max_points
+        self.lines = []
+        # 用闭包而不是绑定方法：matplotlib 对绑定方法只保留弱引用
+        ax.callbacks.connect('xlim_changed', lambda ax: self.refresh())
+
+    def set_lines(self, entries):
+        """entries 为 [(Line2D, x, y, marker), ...]，x 升序且不含 NaN"""
+        self.lines = [LodLine(*entry) for entry in entries]
+
+    def add(self, line, x, y, marker=None):
+        self.lines.append(LodLine(line, x, y, marker))
+
+    @property
+    def drawn_points(self):
+        return sum(line.drawn for line in self.lines)
+
+    def refresh(self, full=False):
+        if not self.lines:
+            return
+        width = max(self.ax.bbox.width, 1.0)
+        share = self.max_points // (2 * len(self.lines))
+        buckets = int(max(MIN_BUCKETS, min(width, share)))
+        xlim = None if full else self.ax.get_xlim()
+        for line in self.lines:
+            line.refresh(buckets, width, self.method, xlim)
@@ -0,0 +1,244 @@
+"""后台预取：提前把接下来很可能查询的数据放进缓存
+
+用户通常先看默认的中国/美国，再在 GDP、人均GDP、CPI、全部之间来回切换。
+选中国家后，Prefetcher 在后台把这些国家（包括比较国家）的全部已注册
+指标取进 IndicatorCache，切换数据类型时查询直接命中缓存。启动时还会预取
+最近常用的国家（RecentCountries 按使用次数和时间衰减排序，在后台延迟写入
+磁盘，不阻塞Tk主线程）。
+
+预取是低优先级的：
+
+- 只用 workers 个自己的线程，不占用 GdpClient 的前台线程池；
+- 有前台查询在进行时暂停（idle 回调返回 False）；
+- 每分钟接收的字节数不超过 bytes_per_minute，超出后等待；一个任务开始前
+  只检查预算，所以最多超出一个任务的量；
+- 选择的国家变化后，尚未开始的上一次选择的任务直接丢弃；
+- 缓存处于离线模式时没有可以下载的数据，任务直接跳过。
+
+与前台查询下载相同的数据时，两者经 GdpClient 的 single-flight 表共用一次
+下载。预取失败只计数，不打扰用户。
+"""
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+from api.cache import DEFAULT_CACHE_DIR
+from api.trace import span
+
+DEFAULT_RECENT_PATH = os.path.join(DEFAULT_CACHE_DIR, "recent_countries.json")
+# 预取线程数
+PREFETCH_WORKERS = 1
+# 每分钟最多接收的字节数（解压后）
+PREFETCH_BYTES_PER_MINUTE = 2 * 1024 * 1024
+# 前台忙时每隔多久检查一次（秒）
+IDLE_POLL = 0.1
+# 启动时预取的最近常用国家数
+RECENT_PRELOAD = 5
+# 最多记住的国家数
+RECENT_LIMIT = 50
+# 使用次数的半衰期（天）
+RECENT_HALF_LIFE_DAYS = 30
+# 记录使用后延迟多久写入磁盘（秒），期间的多次记录合并为一次写入
+RECENT_SAVE_DELAY = 1.0
+
+# 任务优先级：数值越小越先执行
+SELECTION = 0  # 当前选择的国家
+RECENT = 1     # 启动时的最近常用国家
+
+
+class RecentCountries:
+    """最近常用的国家：{国家代码: [使用次数, 最后使用时间]}，按衰减后的次数排序"""
+
+    def __init__(self, path=DEFAULT_RECENT_PATH, limit=RECENT_LIMIT, save_delay=RECENT_SAVE_DELAY):
+        self.path = path
+        self.limit = limit
+        self.save_delay = save_delay
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()  # 写入按顺序进行，后取的快照后写
+        self._timer = None  # 等待写入磁盘的定时器
+        self._usage = {}
+        if path is not None:
+            try:
+                with open(path, encoding="utf-8") as f:
+                    self._usage = {code: list(usage) for code, usage in json.load(f).items()}
+            except (OSError, ValueError, TypeError):
+                self._usage = {}
+
+    def record(self, codes, now=None):
+        """记录一次使用；只更新内存，save_delay 秒后在后台线程写入磁盘"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for code in dict.fromkeys(codes):
+                usage = self._usage.setdefault(code, [0, now])
+                usage[0] += 1
+                usage[1] = now
+            if len(self._usage) > self.limit:
+                self._usage = {code: self._usage[code] for code in self._top(self.limit, now)}
+            if self.path is None or self._timer is not None:
+                return
+            # 非守护线程：程序退出前等待最后一次写入完成
+            self._timer = threading.Timer(self.save_delay, self.flush)
+            self._timer.start()
+
+    def top(self, n, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return self._top(n, now)
+
+    def _top(self, n, now):
+        def score(code):
+            count, last = self._usage[code]
+            return count * 0.5 ** ((now - last) / (RECENT_HALF_LIFE_DAYS * 86400))
+
+        return sorted(self._usage, key=score, reverse=True)[:n]
+
+    def flush(self):
+        """立即写入尚未保存的使用记录"""
+        with self._save_lock:
+            with self._lock:
+                if self._timer is None:
+                    return
+                self._timer.cancel()
+                self._timer = None
+                data = json.dumps(self._usage)
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass  # 记不住最近的国家不影响使用
+
+
+class Prefetcher:
+    """低优先级的后台预取队列
+
+    get_client 返回 GdpClient（在预取线程中第一次调用，可以很慢）；idle 在
+    预取线程中调用，返回 False 时暂停预取。
+    """
+
+    def __init__(self, get_client, idle=None, workers=PREFETCH_WORKERS,
+                 bytes_per_minute=PREFETCH_BYTES_PER_MINUTE):
+        self.get_client = get_client
+        self.idle = idle or (lambda: True)
+        self.workers = workers
+        self.bytes_per_minute = bytes_per_minute
+        self._queue = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._generation = 0  # 每次选择变化加一，旧选择的任务作废
+        self._received = deque()  # 最近一分钟的 (时间, 字节数)
+        self._stop = threading.Event()
+        self._threads = []
+        self._stats = {'queued': 0, 'done': 0, 'dropped': 0, 'errors': 0, 'series': 0, 'bytes': 0,
+                       'throttled': 0, 'offline': 0}
+
+    def warm(self, countries, indicators, start_year, end_year, priority=SELECTION):
+        """排队预取 countries × indicators（代码）在 [start_year, end_year] 的数据
+
+        priority 为 SELECTION 时作废之前尚未开始的 SELECTION 任务。
+        """
+        countries = [code for code in dict.fromkeys(countries) if code]
+        indicators = list(dict.fromkeys(indicators))
+        if not countries or not indicators:
+            return
+        with self._lock:
+            if priority == SELECTION:
+                self._generation += 1
+            generation = self._generation if priority == SELECTION else None
+            self._stats['queued'] += 1
+        self._queue.put((priority, next(self._order), generation,
+                         (countries, indicators, start_year, end_year)))
+        self._ensure_started()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['pending'] = self._queue.qsize()
+        return stats
+
+    def stop(self):
+        self._stop.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._run, name=f"gdp-prefetch_{len(self._threads)}",
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                _, _, generation, task = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if not self._wait_until_allowed(generation):
+                with self._lock:
+                    self._stats['dropped'] += 1
+                continue
+            self._prefetch(*task)
+
+    def _current(self, generation):
+        return generation is None or generation == self._generation
+
+    def _wait_until_allowed(self, generation):
+        """等到前台空闲且预算允许；任务在等待期间作废时返回 False"""
+        throttled = False
+        while not self._stop.is_set():
+            if not self._current(generation):
+                return False
+            if not self.idle():
+                self._stop.wait(IDLE_POLL)
+                continue
+            wait = self._budget_wait()
+            if wait <= 0:
+                return True
+            if not throttled:
+                throttled = True
+                with self._lock:
+                    self._stats['throttled'] += 1
+            self._stop.wait(min(wait, 1.0))
+        return False
+
+    def _budget_wait(self):
+        """还要等多少秒才能在预算内开始下一个任务"""
+        now = time.monotonic()
+        with self._lock:
+            while self._received and now - self._received[0][0] >= 60:
+                self._received.popleft()
+            used = sum(size for _, size in self._received)
+            if used < self.bytes_per_minute:
+                return 0
+            return 60 - (now - self._received[0][0])
+
+    def _prefetch(self, countries, indicators, start_year, end_year):
+        client = self.get_client()
+        if client.cache is not None and client.cache.offline:
+            with self._lock:
+                self._stats['offline'] += 1
+            return
+        transport = client.transport
+        # 前台查询在预取期间开始时，它的流量也会计入；预取只在空闲时开始，误差很小
+        before = transport.stats()['bytes_received']
+        try:
+            with span("prefetch.warm", countries=len(countries), indicators=len(indicators)):
+                client.get_panel(countries, indicators, start_year, end_year)
+        except Exception:
+            with self._lock:
+                self._stats['errors'] += 1
+            return
+        finally:
+            received = transport.stats()['bytes_received'] - before
+            with self._lock:
+                self._received.append((time.monotonic(), received))
+                self._stats['bytes'] += received
+        with self._lock:
+            self._stats['done'] += 1
+            self._stats['series'] += len(countries) * len(indicators)
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+# 模拟服务器（bench/stub_server.py）
+sys.path.insert(0, os.path.join(ROOT, "bench"))
@@ -0,0 +1,95 @@
+import csv
+import os
+
+import numpy as np
+import pytest
+
+import api.bulk as bulk
+from api.bulk import BulkStore, import_wdi
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer, synthetic_value
+
+YEARS = list(range(2000, 2006))
+COUNTRIES = [("China", "CHN"), ("United States", "USA"), ("India", "IND"), ("Brazil", "BRA")]
+INDICATORS = [("GDP", "NY.GDP.MKTP.CD"), ("GDP per capita", "NY.GDP.PCAP.CD"), ("CPI", "FP.CPI.TOTL.ZG")]
+
+
+def value(ci, ii, year):
+    if (ci + ii + year) % 5 == 0:
+        return None
+    return ci * 1000 + ii * 100 + (year - 2000) + 0.5
+
+
+@pytest.fixture
+def wdi_csv(tmp_path):
+    path = tmp_path / "WDICSV.csv"
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Country Name", "Country Code", "Indicator Name", "Indicator Code"]
+                        + [str(year) for year in YEARS])
+        for ci, (name, code) in enumerate(COUNTRIES):
+            for ii, (indicator_name, indicator_code) in enumerate(INDICATORS):
+                writer.writerow([name, code, indicator_name, indicator_code]
+                                + ["" if (v := value(ci, ii, year)) is None else repr(v) for year in YEARS])
+    return str(path)
+
+
+@pytest.mark.parametrize("batch_rows", [1, 5, 4096])
+def test_import_round_trip(wdi_csv, tmp_path, monkeypatch, batch_rows):
+    # 小批量时行号跨越多个批次
+    monkeypatch.setattr(bulk, "WRITE_BATCH_ROWS", batch_rows)
+    progress = []
+    store = import_wdi(wdi_csv, str(tmp_path / "store"), progress=progress.append)
+    assert progress[-1] == len(COUNTRIES) * len(INDICATORS)
+    assert (store.start_year, store.end_year) == (YEARS[0], YEARS[-1])
+    for ci, (_, code) in enumerate(COUNTRIES):
+        for ii, (_, indicator) in enumerate(INDICATORS):
+            series = store.series(code, indicator)
+            expected = [np.nan if (v := value(ci, ii, year)) is None else v for year in YEARS]
+            np.testing.assert_array_equal(series.values, expected)
+    # 临时文件不留在存储目录中
+    assert sorted(os.listdir(tmp_path / "store")) == sorted([bulk.VALUES_FILE, bulk.INDEX_FILE, bulk.META_FILE])
+
+
+def test_import_subset(wdi_csv, tmp_path):
+    store = import_wdi(wdi_csv, str(tmp_path / "store"), indicators=["FP.CPI.TOTL.ZG"], countries=["ind", "USA"])
+    assert [c["code"] for c in store.countries] == ["USA", "IND"]
+    assert not store.has("CHN", "FP.CPI.TOTL.ZG")
+    assert not store.has("USA", "NY.GDP.MKTP.CD")
+    panel = store.panel(["IND", "CHN"], ["FP.CPI.TOTL.ZG"], 2001, 2003)
+    np.testing.assert_array_equal(panel.data[0, 0], [value(2, 2, year) or np.nan for year in (2001, 2002, 2003)])
+    assert np.isnan(panel.data[1]).all()
+    reopened = BulkStore(str(tmp_path / "store"))
+    assert reopened.row("USA", "FP.CPI.TOTL.ZG") == 0
+
+
+def test_years_outside_the_store(wdi_csv, tmp_path):
+    store = import_wdi(wdi_csv, str(tmp_path / "store"))
+    assert store.has("CHN", "NY.GDP.MKTP.CD", 2001, 2004)
+    assert not store.has("CHN", "NY.GDP.MKTP.CD", 1990, 2004)
+    assert not store.has("CHN", "NY.GDP.MKTP.CD", 2024, 2025)
+    # 与数据没有交集的区间得到空序列和空面板，而不是负的维度或绕回的切片
+    for start_year, end_year in ((2024, 2025), (1980, 1990), (2007, 2030)):
+        assert len(store.series("CHN", "NY.GDP.MKTP.CD", start_year, end_year).years) == 0
+        panel = store.panel(["CHN", "USA"], ["NY.GDP.MKTP.CD"], start_year, end_year)
+        assert panel.data.shape == (2, 1, 0)
+    np.testing.assert_array_equal(store.series("CHN", "NY.GDP.MKTP.CD", 1990, 2001).years, [2000, 2001])
+
+
+def test_client_falls_through_when_store_does_not_cover_range(wdi_csv, tmp_path):
+    store = import_wdi(wdi_csv, str(tmp_path / "store"))
+    with StubWorldBankServer() as server:
+        client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport(), store=store)
+        client.base_url = server.base_url
+        years, values = client.get_indicator_data("CHN", "GDP", 2001, 2003)
+        assert server.request_count == 0
+        assert values == [value(0, 0, year) for year in years]
+
+        years, _ = client.get_indicator_data("CHN", "GDP", 1990, 2022)
+        assert server.request_count == 1
+        assert years == [y for y in range(1990, 2023) if synthetic_value("CHN", "NY.GDP.MKTP.CD", y) is not None]
+        panel = client.fetch_panel(["CHN", "USA"], ["GDP"], 2020, 2022)
+        assert (panel.start_year, panel.end_year) == (2020, 2022)
+        client.close()
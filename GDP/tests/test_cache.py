@@ -0,0 +1,90 @@
+import pytest
+
+from api.cache import IndicatorCache
+
+CODE = "NY.GDP.MKTP.CD"
+
+
+def points(start_year, end_year, offset=0.0):
+    return [(year, year + offset) for year in range(start_year, end_year + 1)]
+
+
+@pytest.fixture
+def cache():
+    return IndicatorCache(":memory:")
+
+
+def test_lookup_narrower_range_is_sliced_from_wider_entry(cache):
+    cache.put("chn", CODE, 1990, 2000, points(1990, 2000))
+    entry = cache.lookup("CHN", CODE, 1995, 1997)
+    assert entry is not None
+    assert entry.slice(1995, 1997) == ([1995, 1996, 1997], [1995.0, 1996.0, 1997.0])
+    assert cache.lookup("CHN", CODE, 1985, 1995) is None
+    assert cache.lookup("USA", CODE, 1995, 1997) is None
+
+
+@pytest.mark.parametrize("new_range, merged_range", [
+    ((1995, 2010), (1990, 2010)),   # 相交
+    ((2001, 2005), (1990, 2005)),   # 相邻
+    ((1980, 1989), (1980, 2000)),   # 在前面相邻
+    ((1992, 1994), (1990, 2000)),   # 被覆盖
+    ((1980, 2010), (1980, 2010)),   # 覆盖旧区间
+])
+def test_touching_ranges_merge(cache, new_range, merged_range):
+    cache.put("CHN", CODE, 1990, 2000, points(1990, 2000))
+    entry = cache.put("CHN", CODE, *new_range, points(*new_range, offset=0.5))
+    assert (entry.start_year, entry.end_year) == merged_range
+    lo, hi = new_range
+    expected = {year: year + 0.5 if lo <= year <= hi else float(year)
+                for year in range(merged_range[0], merged_range[1] + 1)}
+    assert dict(entry.points) == expected
+    assert [year for year, _ in entry.points] == sorted(expected)
+
+
+def test_new_data_wins_including_deleted_years(cache):
+    cache.put("CHN", CODE, 1990, 2000, points(1990, 2000))
+    # 新下载中 1996 已没有数据：合并后也不应保留旧值
+    fresh = [(year, value) for year, value in points(1995, 1998, offset=0.5) if year != 1996]
+    entry = cache.put("CHN", CODE, 1995, 1998, fresh)
+    years = [year for year, _ in entry.points]
+    assert 1996 not in years
+    assert dict(entry.points)[1995] == 1995.5 and dict(entry.points)[1999] == 1999.0
+
+
+def test_disjoint_range_replaces_entry(cache):
+    cache.put("CHN", CODE, 1990, 2000, points(1990, 2000))
+    entry = cache.put("CHN", CODE, 2005, 2010, points(2005, 2010))
+    assert (entry.start_year, entry.end_year) == (2005, 2010)
+    assert cache.lookup("CHN", CODE, 1990, 2000) is None
+
+
+def test_merged_range_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = IndicatorCache(path)
+    cache.put("CHN", CODE, 1990, 2000, points(1990, 2000), etag='"a"')
+    cache.put("CHN", CODE, 1998, 2005, points(1998, 2005, offset=0.5))
+    reopened = IndicatorCache(path)
+    entry = reopened.get("CHN", CODE)
+    assert (entry.start_year, entry.end_year) == (1990, 2005)
+    assert entry.points == cache.get("CHN", CODE).points
+    assert reopened.ranges() == [("CHN", CODE, 1990, 2005)]
+
+
+def test_listeners_see_merged_entry(cache):
+    seen = []
+    cache.subscribe(seen.append)
+    cache.put("CHN", CODE, 1990, 2000, points(1990, 2000))
+    cache.put("CHN", CODE, 2001, 2002, points(2001, 2002))
+    assert [(e.start_year, e.end_year) for e in seen] == [(1990, 2000), (1990, 2002)]
+    cache.unsubscribe(seen.append)
+    cache.put("CHN", CODE, 2003, 2004, points(2003, 2004))
+    assert len(seen) == 2
+
+
+def test_freshness_and_revalidate(cache):
+    entry = cache.put("CHN", CODE, 1990, 2000, points(1990, 2000))
+    assert entry.is_fresh(cache.ttl)
+    assert not entry.is_fresh(cache.ttl, now=entry.fetched_at + cache.ttl)
+    entry.fetched_at -= cache.ttl
+    assert cache.revalidate([("chn", CODE)]) == 1
+    assert cache.get("CHN", CODE).is_fresh(cache.ttl)
@@ -0,0 +1,100 @@
+"""ChartView 连续查询的内存泄漏检查（Agg 画布，无界面）"""
+import gc
+import tracemalloc
+import warnings
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pytest
+
+from api.indicators import INDICATORS
+from ui.charts import AxesSpec, ChartView, LineSpec
+
+QUERIES = 1000
+WARMUP = 100
+# 每隔这么多次查询切换一次"全部"指标的多子图布局
+LAYOUT_EVERY = 250
+# 每隔这么多次查询真正绘制一次；每次都绘制在这台机器上要几分钟
+DRAW_EVERY = 50
+MAX_GROWTH = 512 * 1024
+COUNTRIES = ["China", "United States", "Japan"]
+
+
+def make_query(n, rng):
+    """第 n 次查询：年份区间和国家数每次都变，每 LAYOUT_EVERY 次换成三个子图"""
+    indicators = list(INDICATORS.values()) if n % LAYOUT_EVERY == LAYOUT_EVERY - 1 else [INDICATORS["GDP"]]
+    start = 1960 + n % 30
+    years = np.arange(start, 2023)
+    specs = []
+    for indicator in indicators:
+        lines = []
+        for i, name in enumerate(COUNTRIES[:1 + n % len(COUNTRIES)]):
+            fmt, marker = indicator.style(i)
+            values = np.cumsum(rng.normal(1.0, 0.3, len(years)))
+            lines.append(LineSpec(f"{name} {indicator.label}", years, values, fmt, marker=marker))
+        specs.append(AxesSpec(indicator, f"{indicator.title} ({start}-2022)", lines))
+    return specs
+
+
+def artist_count(view):
+    return sum(1 for _ in view.figure.findobj())
+
+
+def check_structure(view, specs):
+    assert len(view.figure.axes) == len(view.axes) == len(specs)
+    for ax, lines, spec in zip(view.axes, view._lines, specs):
+        assert len(lines) == len(spec.lines)
+        assert len(ax.get_lines()) == len(spec.lines)
+        # LodAxes 在每个子图上只注册一次 xlim_changed 回调
+        assert len(ax.callbacks.callbacks.get('xlim_changed', {})) <= 1
+
+
+@pytest.fixture(autouse=True)
+def no_glyph_warnings():
+    # 没有中文字体的环境下每次绘制都会对缺失的字形发出警告
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="Glyph .* missing")
+        yield
+
+
+def test_chart_view_does_not_leak_over_1000_queries():
+    rng = np.random.default_rng(1)
+    view = ChartView(figsize=(4, 3), dpi=40)
+    draw = view.canvas.draw
+    calls = [0]
+
+    def draw_idle():
+        calls[0] += 1
+        if calls[0] % DRAW_EVERY == 0:
+            draw()
+
+    view.canvas.draw_idle = draw_idle
+
+    tracemalloc.start()
+    try:
+        for n in range(WARMUP):
+            specs = make_query(n, rng)
+            view.show(specs)
+            check_structure(view, specs)
+        gc.collect()
+        baseline = tracemalloc.get_traced_memory()[0]
+        artists = artist_count(view)
+        for n in range(WARMUP, QUERIES):
+            specs = make_query(n, rng)
+            view.show(specs)
+            check_structure(view, specs)
+        # 与预热结束时相同的布局和国家数，对象数才有可比性
+        view.show(make_query(WARMUP - 1, rng))
+        draw()
+        gc.collect()
+        growth = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+
+    assert calls[0] == QUERIES + 1
+    assert view.rebuilds <= 2 * (QUERIES // LAYOUT_EVERY) + 1
+    assert artist_count(view) == artists
+    assert growth < MAX_GROWTH, f"{QUERIES} 次查询后堆增长 {growth / 1024:.0f} KB"
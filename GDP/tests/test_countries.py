@@ -0,0 +1,83 @@
+import random
+
+import pytest
+
+from api.countries import CountryIndex, IncrementalFilter
+
+WORDS = ["north", "south", "east", "central", "islands", "republic", "coast"]
+BASES = ["China", "United States", "United Kingdom", "Korea, Rep.", "Egypt, Arab Rep.", "Germany",
+         "South Africa", "Country 101", "Country 110"]
+
+
+def make_countries(size=2000):
+    rng = random.Random(7)
+    countries = [{"id": "CHN", "iso2Code": "CN", "name": "China"},
+                 {"id": "USA", "iso2Code": "US", "name": "United States"},
+                 {"id": "GBR", "iso2Code": "GB", "name": "United Kingdom"}]
+    for i in range(size - len(countries)):
+        name = f"{rng.choice(WORDS).title()} {rng.choice(BASES)} {rng.choice(WORDS).title()} {i}"
+        countries.append({"id": f"S{i:05d}", "iso2Code": "", "name": name})
+    return countries
+
+
+def reference_search(index, query, limit):
+    """逐个名称线性比较的排序：代码/别名 > 名称开头 > 单词开头 > 其他位置，同级按字母序"""
+    query = query.strip().lower()
+    ranked = []
+    exact = index.get(query) if query else None
+    if exact is not None:
+        ranked.append(exact["name"])
+    tiers = ([], [], [])
+    for name in index.names:
+        lower = name.lower()
+        if query not in lower or name in ranked:
+            continue
+        if lower.startswith(query):
+            tiers[0].append(name)
+        elif any(not lower[pos - 1].isalnum() for pos in range(1, len(lower))
+                 if lower.startswith(query, pos)):
+            tiers[1].append(name)
+        else:
+            tiers[2].append(name)
+    for tier in tiers:
+        ranked.extend(tier)
+    return ranked[:limit] if limit else ranked
+
+
+QUERIES = ["", "c", "co", "cou", "country", "country 1", "country 11", "united", "united s", "un",
+           "rep", "rep.", "korea", "n", "th ", "us", "gb", "egypt, arab", "zzz", "ates u", "islands 1"]
+
+
+@pytest.fixture(scope="module")
+def index():
+    return CountryIndex(make_countries())
+
+
+@pytest.mark.parametrize("query", QUERIES)
+@pytest.mark.parametrize("limit", [1, 50, None])
+def test_search_matches_linear_reference(index, query, limit):
+    assert index.search(query, limit=limit) == reference_search(index, query, limit)
+
+
+def test_incremental_filter_matches_search(index):
+    for word in ["country 11", "united states", "egypt, arab rep", "south c"]:
+        state = IncrementalFilter(index, limit=50)
+        for n in range(1, len(word) + 1):
+            assert state.update(word[:n]) == index.search(word[:n], limit=50)
+        # 删除字符后回到完整索引
+        assert state.update(word[:2]) == index.search(word[:2], limit=50)
+
+
+def test_search_does_not_mutate_index(index):
+    before = {gram: set(ids) for gram, ids in index._grams.items() if len(gram) == 1}
+    IncrementalFilter(index).update("c")
+    IncrementalFilter(index).update("")
+    index.search("country 1", limit=5)
+    assert {gram: set(ids) for gram, ids in index._grams.items() if len(gram) == 1} == before
+
+
+def test_resolve_prefers_codes_then_substrings_then_fuzzy(index):
+    assert index.resolve("us")["id"] == "USA"
+    assert index.resolve("united k")["id"] == "GBR"
+    assert index.resolve("Chian")["id"] == "CHN"
+    assert index.resolve("   ") is None
@@ -0,0 +1,105 @@
+import pytest
+
+import api.gdp_client
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient, MAX_COUNTRIES_PER_REQUEST
+from api.indicators import get_indicator
+from api.transport import HttpTransport
+from stub_server import COUNTRIES, StubWorldBankServer, synthetic_value
+
+START, END = 2000, 2009
+# 超过一个请求能合并的国家数，至少要拆成两批
+COUNTRY_CODES = [c["id"] for c in COUNTRIES if c["region"]["value"] != "Aggregates"][:MAX_COUNTRIES_PER_REQUEST + 10]
+
+
+@pytest.fixture
+def stub():
+    with StubWorldBankServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+    client.base_url = stub.base_url
+    return client
+
+
+@pytest.fixture
+def urls(client):
+    """记录客户端请求的每个URL"""
+    seen = []
+    get = client.transport.get
+
+    def recording_get(url, *args, **kwargs):
+        seen.append(url)
+        return get(url, *args, **kwargs)
+
+    client.transport.get = recording_get
+    return seen
+
+
+def expected(country, indicator):
+    code = get_indicator(indicator).code
+    points = [(year, synthetic_value(country, code, year)) for year in range(START, END + 1)]
+    return [year for year, value in points if value is not None], [value for _, value in points if value is not None]
+
+
+def requested_pairs(url):
+    """从 country/A;B/indicator/X;Y 请求中取出请求的组合"""
+    path = url.split("?")[0].split("/")
+    countries = path[path.index("country") + 1].split(";")
+    codes = path[path.index("indicator") + 1].split(";")
+    return {(country, code) for country in countries for code in codes}
+
+
+@pytest.mark.parametrize("per_page", [7, 1000])
+def test_get_panel_reads_every_page_of_every_batch(client, stub, urls, monkeypatch, per_page):
+    monkeypatch.setattr(api.gdp_client, "PER_PAGE", per_page)
+    results = client.get_panel(COUNTRY_CODES, ["GDP", "CPI"], START, END)
+    assert len(results) == len(COUNTRY_CODES) * 2
+    for country in COUNTRY_CODES:
+        for indicator in ("GDP", "CPI"):
+            assert results[(country, get_indicator(indicator).code)] == expected(country, indicator)
+    first_pages = [url for url in urls if url.endswith("&page=1")]
+    assert len(first_pages) == 2
+    # 两批分别有 2 个指标 × 50/10 国 × 10 年行，每一页都要取到
+    pages = -(-1000 // per_page) + -(-200 // per_page)
+    assert len(urls) == pages
+
+
+def test_fetch_many_across_pages(client, monkeypatch):
+    monkeypatch.setattr(api.gdp_client, "PER_PAGE", 9)
+    pairs = [(country, "NY.GDP.PCAP.CD") for country in COUNTRY_CODES]
+    results = list(client.fetch_many(pairs, START, END))
+    assert len(results) == len(pairs)
+    for result in results:
+        assert result.ok, result.error
+        assert (result.years, result.values) == expected(result.country_code, "NY.GDP.PCAP.CD")
+
+
+def test_fetch_many_only_downloads_requested_pairs(client, urls):
+    # 稀疏的组合：每个国家只要一个指标，两组国家各要不同的指标
+    pairs = [(country, "GDP" if i % 2 else "CPI") for i, country in enumerate(COUNTRY_CODES[:20])]
+    pairs.append((COUNTRY_CODES[0], "GDP_PER_CAPITA"))
+    results = list(client.fetch_many(pairs, START, END))
+    assert all(result.ok for result in results)
+    for result in results:
+        assert (result.years, result.values) == expected(result.country_code, result.indicator)
+
+    wanted = {(country, get_indicator(indicator).code) for country, indicator in pairs}
+    downloaded = set()
+    for url in urls:
+        assert requested_pairs(url) <= wanted
+        downloaded |= requested_pairs(url)
+    assert downloaded == wanted
+    # 需要相同指标组合的国家合并在同一个请求里
+    assert len(urls) == 3
+
+
+def test_refresh_only_downloads_requested_pairs(client, urls):
+    pairs = [("CHN", "NY.GDP.MKTP.CD"), ("USA", "FP.CPI.TOTL.ZG"), ("JPN", "FP.CPI.TOTL.ZG")]
+    client.refresh(pairs, START, END)
+    assert set().union(*map(requested_pairs, urls)) == set(pairs)
+    for country, code in pairs:
+        assert client.cache.get(country, code).slice(START, END) == expected(country, code)
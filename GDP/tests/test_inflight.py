@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.inflight import FlightTable
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer, synthetic_value
+
+KEY = ("CHN", "NY.GDP.MKTP.CD")
+OTHER = ("USA", "NY.GDP.MKTP.CD")
+
+
+def test_covered_request_joins():
+    table = FlightTable()
+    _, flight = table.claim([KEY], 1990, 2022)
+    joined, own = table.claim([KEY], 2000, 2010)
+    assert own is None and joined == {KEY: flight}
+    assert table.finish(flight, {KEY: "data"}, 1990, 2022) is None
+    assert joined[KEY].result() == {KEY: "data"}
+    assert table.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("ranges", [
+    [(2015, 2023)],
+    [(2015, 2023), (1980, 1995)],
+    # 只有与扩大后的区间才相邻
+    [(2023, 2030), (2031, 2035)],
+])
+def test_overlapping_requests_extend_the_flight(ranges):
+    table = FlightTable()
+    _, flight = table.claim([KEY], 1990, 2022)
+    for start_year, end_year in ranges:
+        joined, own = table.claim([KEY], start_year, end_year)
+        assert own is None and joined == {KEY: flight}
+    start_year = min([1990] + [start for start, _ in ranges])
+    end_year = max([2022] + [end for _, end in ranges])
+    # 下载方完成原区间后得到扩大后的区间，再下载一次即可
+    assert table.finish(flight, {KEY: "partial"}, 1990, 2022) == (start_year, end_year)
+    assert not flight._future.done()
+    assert table.finish(flight, {KEY: "full"}, start_year, end_year) is None
+    assert flight.result() == {KEY: "full"}
+    stats = table.stats()
+    assert (stats["issued"], stats["widened"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_disjoint_request_gets_its_own_flight():
+    table = FlightTable()
+    _, first = table.claim([KEY], 1990, 2000)
+    joined, second = table.claim([KEY, OTHER], 2005, 2010)
+    assert not joined and second is not first
+    assert second.keys == [KEY, OTHER]
+    assert (first.start_year, first.end_year) == (1990, 2000)
+
+
+def test_mixed_keys_split_between_join_and_own():
+    table = FlightTable()
+    _, first = table.claim([KEY], 1990, 2000)
+    joined, own = table.claim([KEY, OTHER], 1995, 2005)
+    assert joined == {KEY: first} and own.keys == [OTHER]
+    assert (first.start_year, first.end_year) == (1990, 2005)
+
+
+def test_failure_reaches_extended_waiters():
+    table = FlightTable()
+    _, flight = table.claim([KEY], 1990, 2000)
+    joined, _ = table.claim([KEY], 1995, 2010)
+    table.fail(flight, RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        joined[KEY].result()
+    assert table.stats()["in_flight"] == 0
+
+
+@pytest.mark.parametrize("cache", [False, True])
+def test_concurrent_overlapping_ranges_share_downloads(cache):
+    """先发出的下载进行中时到达的所有重叠请求，只需再一个补充请求"""
+    ranges = [(2000, 2010), (2015, 2023), (1980, 1995), (1985, 2023)]
+    with StubWorldBankServer(delay=0.3) as server:
+        client = GdpClient(cache=IndicatorCache(":memory:") if cache else None, transport=HttpTransport())
+        client.base_url = server.base_url
+        results = {}
+
+        def fetch(start_year, end_year):
+            results[(start_year, end_year)] = client.get_series("CHN", "GDP", start_year, end_year)
+
+        first = threading.Thread(target=fetch, args=(1990, 2022))
+        first.start()
+        time.sleep(0.1)
+        threads = [threading.Thread(target=fetch, args=r) for r in ranges]
+        for thread in threads:
+            thread.start()
+        for thread in [first] + threads:
+            thread.join()
+        assert server.request_count == 2
+        client.close()
+
+    for (start_year, end_year), series in results.items():
+        years, values = series.to_lists()
+        expected = [(year, value) for year in range(start_year, end_year + 1)
+                    if (value := synthetic_value("CHN", "NY.GDP.MKTP.CD", year)) is not None]
+        assert list(zip(years, values)) == pytest.approx(expected)
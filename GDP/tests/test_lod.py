@@ -0,0 +1,115 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pytest
+
+from ui.lod import LodAxes, downsample, lttb_indices, minmax_indices, show_markers
+
+
+def make_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.cumsum(rng.uniform(0.5, 1.5, n))  # 升序、不等距
+    y = np.cumsum(rng.normal(size=n))
+    # 几个孤立的尖峰，降采样后必须还在
+    y[n // 3] = y.max() + 100
+    y[2 * n // 3] = y.min() - 100
+    return x, y
+
+
+def assert_valid_indices(indices, n):
+    assert np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == n - 1
+
+
+@pytest.mark.parametrize("n, buckets", [(1000, 16), (10_000, 100), (257, 64), (50_000, 7)])
+def test_minmax_keeps_ends_and_extremes(n, buckets):
+    x, y = make_series(n)
+    indices = minmax_indices(x, y, buckets)
+    assert_valid_indices(indices, n)
+    assert len(indices) <= 2 * buckets + 2
+    assert np.argmax(y) in indices and np.argmin(y) in indices
+    # 每个桶的极值都保留，包络与原数据一致；最后一桶包含末尾点
+    bucket = np.searchsorted(np.linspace(x[0], x[-1], buckets + 1)[1:-1], x, side='right')
+    for i in range(buckets):
+        inside = np.flatnonzero(bucket == i)
+        if len(inside):
+            kept = np.intersect1d(inside, indices)
+            assert y[kept].max() == y[inside].max()
+            assert y[kept].min() == y[inside].min()
+
+
+@pytest.mark.parametrize("n, threshold", [(1000, 34), (10_000, 202), (100, 99), (5, 3)])
+def test_lttb_keeps_ends_and_threshold(n, threshold):
+    x, y = make_series(n)
+    indices = lttb_indices(x, y, threshold)
+    assert_valid_indices(indices, n)
+    assert len(indices) == threshold
+
+
+def test_lttb_keeps_isolated_spikes():
+    x, y = make_series(2000)
+    indices = lttb_indices(x, y, 100)
+    assert np.argmax(y) in indices and np.argmin(y) in indices
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 10, 34])
+def test_short_input_passes_through(n):
+    x, y = make_series(max(n, 3))
+    x, y = x[:n], y[:n]
+    # 不超过目标点数时原样返回
+    np.testing.assert_array_equal(minmax_indices(x, y, 16), np.arange(n))
+    np.testing.assert_array_equal(lttb_indices(x, y, 34), np.arange(n))
+    for method in ("minmax", "lttb"):
+        x2, y2, visible = downsample(x, y, 16, method)
+        np.testing.assert_array_equal(x2, x)
+        np.testing.assert_array_equal(y2, y)
+        assert visible == n
+
+
+def test_lttb_threshold_below_three_passes_through():
+    x, y = make_series(100)
+    np.testing.assert_array_equal(lttb_indices(x, y, 2), np.arange(100))
+
+
+@pytest.mark.parametrize("method", ["minmax", "lttb"])
+def test_downsample_visible_range(method):
+    x, y = make_series(10_000)
+    lo, hi = x[4000], x[6000]
+    x2, y2, visible = downsample(x, y, 50, method, xlim=(hi, lo))
+    # 两侧各多一个点，让折线延伸到可见范围边缘
+    assert visible == 2003
+    assert x2[0] == x[3999] and x2[-1] == x[6001]
+    assert len(x2) <= 2 * 50 + 2
+    np.testing.assert_array_equal(y2, y[np.searchsorted(x, x2)])
+
+
+def test_show_markers():
+    assert show_markers(100, 600)
+    assert not show_markers(101, 600)
+
+
+def test_lod_axes_respects_point_budget_and_zoom():
+    fig, ax = plt.subplots(figsize=(8, 4), dpi=100)
+    try:
+        lod = LodAxes(ax, max_points=2000)
+        series = [make_series(20_000, seed) for seed in range(4)]
+        entries = []
+        for x, y in series:
+            line, = ax.plot(x[:1], y[:1], marker='o')
+            entries.append((line, x, y, 'o'))
+        lod.set_lines(entries)
+        lod.refresh(full=True)
+        assert lod.drawn_points <= 2000 + 2 * len(series)
+        assert all(line.line.get_marker() == 'None' for line in lod.lines)
+
+        # 放大到只剩几十个点：完整分辨率，重新画标记
+        x = series[0][0]
+        ax.set_xlim(x[100], x[130])
+        first = lod.lines[0]
+        np.testing.assert_array_equal(first.line.get_xdata(), x[99:132])
+        assert first.line.get_marker() == 'o'
+    finally:
+        plt.close(fig)
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from api.indicators import INDICATORS
+from api.metrics import MetricEngine, cagr, deflate, index_to_base, price_index, rolling_mean, yoy_growth
+from api.series import Panel, year_range
+from api.views import VIEWS
+
+YEARS = year_range(2000, 2003)
+NOMINAL = [100.0, 110.0, 120.0, 130.0]
+nan = np.nan
+
+
+def test_deflate_full_chain_uses_last_year_prices():
+    real = deflate(NOMINAL, YEARS, [2, 3, 4, 5])
+    np.testing.assert_allclose(real, [100 * 1.03 * 1.04 * 1.05, 110 * 1.04 * 1.05, 120 * 1.05, 130])
+
+
+def test_deflate_trailing_gap_uses_last_year_with_inflation():
+    # 最近一年的CPI还没有发布：以2002年为基准，只有2003年为 NaN
+    real = deflate(NOMINAL, YEARS, [2, 3, 4, nan])
+    np.testing.assert_allclose(real, [100 * 1.03 * 1.04, 110 * 1.04, 120, nan])
+
+
+def test_deflate_interior_gap_only_drops_unlinked_years():
+    # 2001年缺失：2000年与之后的年份无法比较，其余年份不受影响
+    real = deflate(NOMINAL, YEARS, [2, nan, 4, 5])
+    np.testing.assert_allclose(real, [nan, 110 * 1.04 * 1.05, 120 * 1.05, 130])
+
+
+def test_deflate_explicit_base_year_across_gap():
+    real = deflate(NOMINAL, YEARS, [2, nan, 4, 5], base_year=2001)
+    np.testing.assert_allclose(real, [nan, 110, 120 / 1.04, 130 / 1.04 / 1.05])
+
+
+def test_deflate_without_inflation_is_all_nan():
+    assert np.isnan(deflate(NOMINAL, YEARS, [nan] * 4)).all()
+    with pytest.raises(ValueError):
+        deflate(NOMINAL, YEARS)
+
+
+def test_price_index_is_per_series_on_panels():
+    inflation = np.array([[2, 3, 4, nan], [2, nan, 4, 5]])
+    index = price_index(inflation)
+    np.testing.assert_allclose(index, [[1 / 1.03 / 1.04, 1 / 1.04, 1, nan], [nan, 1 / 1.04 / 1.05, 1 / 1.05, 1]])
+
+
+def test_yoy_growth_and_rolling_mean_propagate_gaps():
+    values = np.array([100, 110, nan, 121, 133.1])
+    np.testing.assert_allclose(yoy_growth(values), [nan, 10, nan, nan, 10])
+    np.testing.assert_allclose(rolling_mean(values, window=2), [nan, 105, nan, nan, 127.05])
+    assert np.isnan(rolling_mean(values, window=6)).all()
+
+
+def test_cagr_and_index_to_base_use_first_valid_year():
+    values = np.array([[nan, 100, 110, 121], [nan, nan, nan, nan]])
+    np.testing.assert_allclose(cagr(values), [10, nan])
+    np.testing.assert_allclose(index_to_base(values[0]), [nan, 100, 110, 121])
+    np.testing.assert_allclose(index_to_base(values[0], YEARS, base_year=2002), [nan, 100 / 1.1, 100, 110])
+
+
+def test_engine_real_view_on_panel_with_missing_latest_cpi():
+    gdp, cpi = INDICATORS["GDP"].code, INDICATORS["CPI"].code
+    data = np.array([[NOMINAL, [2, 3, 4, nan]]])
+    panel = Panel(["CHN"], [gdp, cpi], YEARS, data)
+    engine = MetricEngine()
+    real = engine.panel(VIEWS["REAL"], panel)
+    np.testing.assert_allclose(real.series("CHN", gdp).values, [100 * 1.03 * 1.04, 110 * 1.04, 120, nan])
+    # CPI 本身不做平减
+    np.testing.assert_array_equal(real.series("CHN", cpi).values, data[0, 1])
+    engine.panel(VIEWS["REAL"], panel)
+    assert engine.hits == 1
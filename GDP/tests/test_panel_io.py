@@ -0,0 +1,149 @@
+import os
+import zipfile
+
+import numpy as np
+import pytest
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.panel_io import PanelStore, _memmap_member, load_panel, panel_format, save_panel
+from api.series import Panel
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer, synthetic_value
+
+COUNTRIES = ["CHN", "USA", "IND"]
+INDICATORS = ["NY.GDP.MKTP.CD", "FP.CPI.TOTL.ZG"]
+
+
+def make_panel(start_year=2000, end_year=2005):
+    years = list(range(start_year, end_year + 1))
+    data = np.array([[[np.nan if (v := synthetic_value(c, i, y)) is None else v for y in years]
+                      for i in INDICATORS] for c in COUNTRIES])
+    return Panel(COUNTRIES, INDICATORS, years, data)
+
+
+def memmap_base(array):
+    """沿 base 链找到 np.memmap，没有时返回 None"""
+    while array is not None:
+        if isinstance(array, np.memmap):
+            return array
+        array = array.base
+    return None
+
+
+def assert_same(a, b):
+    assert a.countries == b.countries and a.indicators == b.indicators
+    np.testing.assert_array_equal(a.years, b.years)
+    np.testing.assert_array_equal(a.data, b.data)
+
+
+def test_stored_npz_is_memory_mapped(tmp_path):
+    panel = make_panel()
+    path = str(tmp_path / "panel.npz")
+    size = save_panel(panel, path)
+    assert size == os.path.getsize(path)
+    assert not os.path.exists(path + ".tmp")
+    loaded = load_panel(path)
+    assert_same(loaded, panel)
+    assert memmap_base(loaded.data) is not None
+    assert memmap_base(load_panel(path, mmap=False).data) is None
+
+
+def test_compressed_npz_is_loaded_into_memory(tmp_path):
+    panel = make_panel()
+    path = str(tmp_path / "panel.npz")
+    save_panel(panel, path, compress=True)
+    with zipfile.ZipFile(path) as archive:
+        assert archive.getinfo("data.npy").compress_type == zipfile.ZIP_DEFLATED
+    assert _memmap_member(path, "data.npy") is None
+    loaded = load_panel(path)
+    assert_same(loaded, panel)
+    assert memmap_base(loaded.data) is None
+
+
+@pytest.mark.parametrize("version", [(1, 0), (2, 0)])
+@pytest.mark.parametrize("extra", [b"", b"\xfe\xca\x04\x00abcd"])
+def test_memmap_member_parses_local_header(tmp_path, version, extra):
+    """本地文件头带扩展字段、.npy 头为 1.0 或 2.0 版时都能定位数据"""
+    array = np.arange(24, dtype=np.float64).reshape(2, 3, 4)
+    path = str(tmp_path / "custom.npz")
+    info = zipfile.ZipInfo("data.npy")
+    info.compress_type = zipfile.ZIP_STORED
+    info.extra = extra
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("padding.txt", b"x" * 37)
+        with archive.open(info, "w") as f:
+            np.lib.format.write_array(f, array, version=version)
+    mapped = _memmap_member(path, "data.npy")
+    assert isinstance(mapped, np.memmap)
+    np.testing.assert_array_equal(mapped, array)
+
+
+def test_memmap_member_rejects_empty_arrays(tmp_path):
+    path = str(tmp_path / "empty.npz")
+    with open(path, "wb") as f:
+        np.savez(f, data=np.empty((0, 2, 3)))
+    assert _memmap_member(path, "data.npy") is None
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_arrow_round_trip(tmp_path, compress):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.feather as feather
+
+    panel = make_panel()
+    path = str(tmp_path / "panel.feather")
+    save_panel(panel, path, compress=compress)
+    loaded = load_panel(path)
+    assert_same(loaded, panel)
+    # 长表可以被其他工具直接读取
+    table = feather.read_table(path)
+    assert table.num_rows == panel.data.size
+    assert table.column("country").type == pa.dictionary(pa.int32(), pa.string())
+
+
+def test_panel_format():
+    assert panel_format("a.NPZ") == "npz"
+    assert panel_format("a.feather") == "arrow"
+    assert panel_format("a.bin", "npz") == "npz"
+    with pytest.raises(ValueError):
+        panel_format("a.csv")
+    with pytest.raises(ValueError):
+        panel_format("a.npz", "parquet")
+
+
+def test_panel_store_ranges(tmp_path):
+    path = str(tmp_path / "panel.npz")
+    save_panel(make_panel(2000, 2005), path)
+    store = PanelStore(path)
+    assert store.has("chn", "NY.GDP.MKTP.CD")
+    assert store.has("CHN", "NY.GDP.MKTP.CD", 2001, 2004)
+    assert not store.has("CHN", "NY.GDP.MKTP.CD", 1990, 2022)
+    assert not store.has("CHN", "NY.GDP.MKTP.CD", 2010, 2015)
+    assert not store.has("BRA", "NY.GDP.MKTP.CD", 2001, 2004)
+    # 区间外的部分为空，不会因为年份在数据之前或之后而出错
+    assert len(store.series("CHN", "NY.GDP.MKTP.CD", 2010, 2015).years) == 0
+    assert len(store.series("CHN", "NY.GDP.MKTP.CD", 1980, 1990).years) == 0
+    assert store.panel(["CHN"], ["NY.GDP.MKTP.CD"], 2010, 2015).data.shape == (1, 1, 0)
+
+
+def test_client_only_uses_store_when_it_covers_the_range(tmp_path):
+    path = str(tmp_path / "panel.npz")
+    save_panel(make_panel(2000, 2005), path)
+    with StubWorldBankServer() as server:
+        client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport(), store=PanelStore(path))
+        client.base_url = server.base_url
+
+        years, _ = client.get_indicator_data("CHN", "GDP", 2001, 2004)
+        assert server.request_count == 0
+        assert set(years) <= set(range(2001, 2005))
+
+        for start_year, end_year in ((1990, 2022), (2010, 2015)):
+            years, values = client.get_indicator_data("CHN", "GDP", start_year, end_year)
+            expected = [y for y in range(start_year, end_year + 1)
+                        if synthetic_value("CHN", "NY.GDP.MKTP.CD", y) is not None]
+            assert years == expected
+        panel = client.fetch_panel(["CHN", "USA"], ["GDP"], 1995, 2010)
+        assert panel.start_year == 1995 and panel.end_year == 2010
+        assert np.isfinite(panel.data[:, 0, 0]).any()
+        client.close()
@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+
+import pytest
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer
+from ui.prefetch import RECENT, Prefetcher, RecentCountries
+
+START, END = 2000, 2009
+CODES = ["NY.GDP.MKTP.CD", "FP.CPI.TOTL.ZG"]
+DAY = 86400
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture
+def stub():
+    with StubWorldBankServer() as server:
+        yield server
+
+
+def make_client(stub, offline=False):
+    client = GdpClient(cache=IndicatorCache(":memory:", offline=offline), transport=HttpTransport())
+    client.base_url = stub.base_url
+    return client
+
+
+@pytest.fixture
+def prefetcher_factory():
+    prefetchers = []
+
+    def make(client, **kwargs):
+        prefetcher = Prefetcher(lambda: client, **kwargs)
+        prefetchers.append(prefetcher)
+        return prefetcher
+
+    yield make
+    for prefetcher in prefetchers:
+        prefetcher.stop()
+
+
+def test_warms_cache(stub, prefetcher_factory):
+    client = make_client(stub)
+    prefetcher = prefetcher_factory(client)
+    prefetcher.warm(["CHN", "USA"], CODES, START, END)
+    assert wait_for(lambda: prefetcher.stats()['done'] == 1)
+    assert prefetcher.stats()['series'] == 4
+    requests_before = stub.request_count
+    client.get_panel(["CHN", "USA"], CODES, START, END)
+    assert stub.request_count == requests_before
+
+
+def test_waits_until_idle(stub, prefetcher_factory):
+    idle = threading.Event()
+    prefetcher = prefetcher_factory(make_client(stub), idle=idle.is_set)
+    prefetcher.warm(["CHN"], CODES, START, END)
+    time.sleep(0.3)
+    assert stub.request_count == 0
+    assert prefetcher.stats()['done'] == 0
+    idle.set()
+    assert wait_for(lambda: prefetcher.stats()['done'] == 1)
+    assert stub.request_count > 0
+
+
+def test_new_selection_drops_pending_selection(stub, prefetcher_factory):
+    idle = threading.Event()
+    prefetcher = prefetcher_factory(make_client(stub), idle=idle.is_set)
+    prefetcher.warm(["CHN"], CODES, START, END)
+    prefetcher.warm(["JPN"], CODES, START, END, priority=RECENT)
+    prefetcher.warm(["USA"], CODES, START, END)
+    idle.set()
+    assert wait_for(lambda: prefetcher.stats()['done'] == 2)
+    assert wait_for(lambda: prefetcher.stats()['dropped'] == 1)
+
+
+def test_byte_budget_throttles(stub, prefetcher_factory):
+    # 第一个任务就用完了预算，第二个要等到一分钟后
+    prefetcher = prefetcher_factory(make_client(stub), bytes_per_minute=1)
+    prefetcher.warm(["CHN"], CODES, START, END, priority=RECENT)
+    prefetcher.warm(["USA"], CODES, START, END, priority=RECENT)
+    assert wait_for(lambda: prefetcher.stats()['throttled'] == 1)
+    stats = prefetcher.stats()
+    assert stats['done'] == 1
+    assert stats['bytes'] > 1
+
+
+def test_offline_skips(stub, prefetcher_factory):
+    prefetcher = prefetcher_factory(make_client(stub, offline=True))
+    prefetcher.warm(["CHN", "USA"], CODES, START, END)
+    assert wait_for(lambda: prefetcher.stats()['offline'] == 1)
+    stats = prefetcher.stats()
+    assert (stats['done'], stats['errors']) == (0, 0)
+    assert stub.request_count == 0
+
+
+def test_recent_countries_order():
+    recent = RecentCountries(path=None)
+    now = 1_000 * DAY
+    recent.record(["CHN", "USA"], now=now - 120 * DAY)
+    recent.record(["CHN"], now=now - 120 * DAY)
+    recent.record(["JPN"], now=now)
+    recent.record(["USA", "USA"], now=now - DAY)
+    # USA 两次（重复的代码只算一次）、最后一次在昨天；CHN 也是两次但已是四个半衰期之前
+    assert recent.top(3, now=now) == ["USA", "JPN", "CHN"]
+    assert recent.top(1, now=now) == ["USA"]
+
+
+def test_recent_countries_limit():
+    recent = RecentCountries(path=None, limit=3)
+    for i, code in enumerate(["AAA", "BBB", "CCC", "DDD"]):
+        recent.record([code], now=i * DAY)
+    assert recent.top(10, now=4 * DAY) == ["DDD", "CCC", "BBB"]
+
+
+def test_recent_countries_persist_in_background(tmp_path):
+    path = str(tmp_path / "recent.json")
+    recent = RecentCountries(path=path, save_delay=0.05)
+    recent.record(["CHN", "USA"], now=DAY)
+    recent.record(["CHN"], now=2 * DAY)
+    # record 只更新内存，写入在后台延迟进行，两次记录合并为一次写入
+    assert not (tmp_path / "recent.json").exists()
+    assert wait_for(lambda: (tmp_path / "recent.json").exists())
+    assert json.loads((tmp_path / "recent.json").read_text()) == {"CHN": [2, 2 * DAY], "USA": [1, DAY]}
+    assert not (tmp_path / "recent.json.tmp").exists()
+    assert RecentCountries(path=path).top(2, now=2 * DAY) == ["CHN", "USA"]
+
+
+def test_recent_countries_flush(tmp_path):
+    path = str(tmp_path / "sub" / "recent.json")
+    recent = RecentCountries(path=path, save_delay=60)
+    recent.record(["JPN"], now=DAY)
+    recent.flush()
+    assert RecentCountries(path=path).top(5) == ["JPN"]
+    # 没有新的记录时不再写入
+    recent.flush()
+
+
+def test_recent_countries_ignore_corrupt_file(tmp_path):
+    path = tmp_path / "recent.json"
+    path.write_text("{not json")
+    assert RecentCountries(path=str(path)).top(5) == []
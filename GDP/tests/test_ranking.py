@@ -0,0 +1,184 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from api.cache import IndicatorCache
+from api.ranking import RankingIndex
+
+CODE = "NY.GDP.PCAP.CD"
+START, END = 2000, 2009
+
+
+def make_countries(n):
+    regions = ["East Asia", "Europe", "South Asia"]
+    incomes = ["High income", "Low income"]
+    countries = [{"id": f"C{i:02d}", "name": f"Country {i}",
+                  "region": {"value": regions[i % len(regions)]},
+                  "incomeLevel": {"value": incomes[i % len(incomes)]}} for i in range(n)]
+    # 汇总项不参与排名
+    countries.append({"id": "WLD", "name": "World", "region": {"value": "Aggregates"},
+                      "incomeLevel": {"value": "Aggregates"}})
+    return countries
+
+
+def make_values(n, seed=0):
+    rng = np.random.default_rng(seed)
+    # 取整数制造并列，再随机挖掉一些年份
+    values = rng.integers(0, 12, size=(n, END - START + 1)).astype(float)
+    values[rng.random(values.shape) < 0.15] = np.nan
+    return values
+
+
+def make_index(n=30, seed=0):
+    index = RankingIndex(make_countries(n), START, END)
+    index.set_indicator(CODE, make_values(n, seed))
+    return index
+
+
+def brute_force(values, row):
+    """名次 = 1 + 严格大于它的国家数；百分位 = 严格小于它的国家所占比例"""
+    column = values[~np.isnan(values)]
+    value = values[row]
+    if np.isnan(value):
+        return None
+    rank = 1 + int((column > value).sum())
+    percentile = (column < value).sum() / (len(column) - 1) * 100 if len(column) > 1 else 100.0
+    return rank, percentile
+
+
+def assert_matches_brute_force(index, values):
+    for column, year in enumerate(range(START, END + 1)):
+        assert index.count(CODE, year) == int((~np.isnan(values[:, column])).sum())
+        for row, country in enumerate(index.countries):
+            expected = brute_force(values[:, column], row)
+            actual = index.rank(country, CODE, year)
+            if expected is None:
+                assert actual is None
+            else:
+                assert (actual.rank, actual.value) == (expected[0], values[row, column])
+                assert actual.percentile == pytest.approx(expected[1])
+
+
+def test_ranks_and_percentiles_match_brute_force():
+    values = make_values(30)
+    index = make_index(30)
+    assert "WLD" not in index.countries
+    assert_matches_brute_force(index, values)
+
+
+def test_top_is_sorted_with_ties_in_country_order():
+    index = make_index()
+    rows = index.top(CODE, 2005, n=100)
+    assert len(rows) == index.count(CODE, 2005)
+    assert [row.value for row in rows] == sorted((row.value for row in rows), reverse=True)
+    for a, b in zip(rows, rows[1:]):
+        if a.value == b.value:
+            assert a.rank == b.rank
+            assert index.countries.index(a.country) < index.countries.index(b.country)
+    assert [row.country for row in index.top(CODE, 2005, n=5)] == [row.country for row in rows[:5]]
+    lowest = index.top(CODE, 2005, n=3, ascending=True)
+    assert [row.value for row in lowest] == sorted(row.value for row in rows)[:3]
+
+
+def test_top_within_group():
+    index = make_index()
+    rows = index.top(CODE, 2003, n=100, group=("region", "South Asia"))
+    assert rows
+    assert all(int(row.country[1:]) % 3 == 2 for row in rows)
+    # 名次仍是在全部国家中的
+    assert [row.rank for row in rows] == [index.rank(row.country, CODE, 2003).rank for row in rows]
+
+
+@pytest.mark.parametrize("group, message", [
+    (("region", "Atlantis"), "Atlantis"),
+    (("continent", "Europe"), "continent"),
+])
+def test_unknown_group_raises_key_error_with_choices(group, message):
+    index = make_index()
+    with pytest.raises(KeyError) as info:
+        index.top(CODE, 2003, group=group)
+    assert message in info.value.args[0]
+    assert "可用" in info.value.args[0]
+
+
+def test_unknown_indicator_and_year():
+    index = make_index()
+    with pytest.raises(KeyError):
+        index.top("FP.CPI.TOTL.ZG", 2003)
+    with pytest.raises(KeyError):
+        index.top(CODE, END + 1)
+    with pytest.raises(KeyError):
+        index.rollup(CODE, by="continent")
+
+
+def test_rollup_matches_brute_force():
+    values = make_values(30)
+    index = make_index(30)
+    rollup = index.rollup(CODE, by="region")
+    for offset, name in enumerate(["East Asia", "Europe", "South Asia"]):
+        rows = values[offset::3]
+        np.testing.assert_allclose(rollup[name]["sum"], np.nansum(rows, axis=0))
+        np.testing.assert_array_equal(rollup[name]["count"], (~np.isnan(rows)).sum(axis=0))
+    single = index.rollup(CODE, 2004, by="income")
+    assert single["High income"]["count"] == int((~np.isnan(values[0::2, 4])).sum())
+
+
+def test_incremental_update_equals_rebuild():
+    values = make_values(30)
+    index = make_index(30)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        row = int(rng.integers(30))
+        new = rng.integers(0, 12, size=END - START + 1).astype(float)
+        new[rng.random(new.shape) < 0.2] = np.nan
+        keep = ~np.isnan(new)
+        years = np.arange(START, END + 1)[keep]
+        index.update_series(index.countries[row], CODE, years, new[keep])
+        values[row] = new
+    assert_matches_brute_force(index, values)
+    rebuilt = RankingIndex(make_countries(30), START, END)
+    rebuilt.set_indicator(CODE, values)
+    for by in ("region", "income"):
+        for name, stats in rebuilt.rollup(CODE, by=by).items():
+            np.testing.assert_allclose(index.rollup(CODE, by=by)[name]["sum"], stats["sum"])
+
+
+def test_partial_range_update_keeps_other_years():
+    values = make_values(30)
+    index = make_index(30)
+    # 只覆盖 2003-2004：2003 有新值，2004 变为缺失，其余年份不变
+    assert index.update_series("C00", CODE, [2003], [100.0], start_year=2003, end_year=2004) > 0
+    values[0, 3], values[0, 4] = 100.0, np.nan
+    assert_matches_brute_force(index, values)
+    assert index.rank("C00", CODE, 2003).rank == 1
+
+
+def test_attach_updates_on_cache_put():
+    values = make_values(30)
+    index = make_index(30)
+    cache = IndicatorCache(":memory:")
+    index.attach(cache)
+    cache.put("C05", CODE, START, END, [(year, 1000.0) for year in range(START, END + 1)])
+    values[5] = 1000.0
+    assert_matches_brute_force(index, values)
+    # 不在索引中的国家被忽略
+    cache.put("XYZ", CODE, START, END, [(START, 1.0)])
+
+
+def test_latest_year():
+    index = make_index()
+    assert index.latest_year(CODE) == END
+    empty = RankingIndex(make_countries(3), START, END)
+    empty.set_indicator(CODE, np.full((3, END - START + 1), np.nan))
+    assert empty.latest_year(CODE) is None
+
+
+def test_pickle_round_trip():
+    index = make_index()
+    copy = pickle.loads(pickle.dumps(index))
+    assert [(r.country, r.rank) for r in copy.top(CODE, 2006)] == \
+        [(r.country, r.rank) for r in index.top(CODE, 2006)]
+    # 反序列化后的锁可用
+    copy.update_series("C01", CODE, [2006], [999.0], 2006, 2006)
+    assert copy.top(CODE, 2006, n=1)[0].country == "C01"
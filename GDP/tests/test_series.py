@@ -0,0 +1,138 @@
+import numpy as np
+import pytest
+
+from api.series import Panel, Series, year_range
+
+NAN = float("nan")
+
+
+def test_from_lists_fills_gaps_with_nan():
+    series = Series.from_lists([2003, 2000, 2001], [3.0, 0.0, 1.0])
+    assert (series.start_year, series.end_year) == (2000, 2003)
+    np.testing.assert_array_equal(series.values, [0.0, 1.0, NAN, 3.0])
+    assert series.count == 3 and len(series) == 4
+    assert series.to_lists() == ([2000, 2001, 2003], [0.0, 1.0, 3.0])
+
+
+def test_from_lists_with_range_drops_outside_years():
+    series = Series.from_lists([1999, 2000, 2005], [1.0, 2.0, 3.0], 2000, 2002)
+    np.testing.assert_array_equal(series.years, [2000, 2001, 2002])
+    np.testing.assert_array_equal(series.values, [2.0, NAN, NAN])
+
+
+def test_empty():
+    assert len(Series.from_lists([], [])) == 0
+    assert Series.empty().start_year is None
+    empty = Series.empty(2000, 2002)
+    assert len(empty) == 3 and not empty
+    assert empty.to_lists() == ([], [])
+
+
+def test_mismatched_lengths():
+    with pytest.raises(ValueError):
+        Series([2000, 2001], [1.0])
+
+
+def test_slice_and_reindex():
+    series = Series.from_lists([2000, 2001, 2002], [1.0, 2.0, 3.0])
+    np.testing.assert_array_equal(series.slice(2001, 2004).values, [2.0, 3.0, NAN, NAN])
+    np.testing.assert_array_equal(series.slice(1998, 2000).values, [NAN, NAN, 1.0])
+    # 完全不重叠
+    np.testing.assert_array_equal(series.slice(1990, 1992).values, [NAN] * 3)
+    np.testing.assert_array_equal(series.slice(2010, 2011).values, [NAN] * 2)
+    assert len(Series.empty().reindex(year_range(2000, 2001))) == 2
+
+
+def test_arithmetic_aligns_years():
+    a = Series.from_lists([2000, 2001, 2002], [1.0, 2.0, 3.0])
+    b = Series.from_lists([2001, 2002, 2003], [10.0, 20.0, 30.0])
+    total = a + b
+    np.testing.assert_array_equal(total.years, [2000, 2001, 2002, 2003])
+    np.testing.assert_array_equal(total.values, [NAN, 12.0, 23.0, NAN])
+    np.testing.assert_array_equal((b - a).values, [NAN, 8.0, 17.0, NAN])
+    np.testing.assert_array_equal((a * 2).values, [2.0, 4.0, 6.0])
+    np.testing.assert_array_equal((a / Series.from_lists([2000, 2001], [0.0, 4.0])).values,
+                                  [np.inf, 0.5, NAN])
+    left, right = Series.empty().align(a)
+    assert len(left) == 3 and left.count == 0
+
+
+def make_panel():
+    results = {
+        ("CHN", "GDP"): ([2000, 2001, 2003], [1.0, 2.0, 4.0]),
+        ("USA", "GDP"): ([2002], [30.0]),
+        ("CHN", "CPI"): ([1999, 2000, 2010], [9.0, 0.5, 9.0]),
+    }
+    return Panel.from_results(results, 2000, 2003)
+
+
+def test_from_results_layout():
+    panel = make_panel()
+    assert panel.countries == ["CHN", "USA"] and panel.indicators == ["GDP", "CPI"]
+    assert panel.data.shape == (2, 2, 4)
+    np.testing.assert_array_equal(panel.series("CHN", "GDP").values, [1.0, 2.0, NAN, 4.0])
+    # 区间外的年份被丢弃，没有结果的组合全为 NaN
+    np.testing.assert_array_equal(panel.series("CHN", "CPI").values, [0.5, NAN, NAN, NAN])
+    assert not panel.mask[1, 1].any()
+
+
+def test_from_results_with_explicit_axes():
+    panel = Panel.from_results({("CHN", "GDP"): ([2000], [1.0]), ("JPN", "GDP"): ([2000], [2.0])},
+                               2000, 2001, countries=["USA", "CHN"], indicators=["GDP", "CPI"])
+    assert panel.countries == ["USA", "CHN"]
+    assert np.isnan(panel.data[0]).all()
+    assert panel.data[1, 0, 0] == 1.0
+
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        Panel(["CHN"], ["GDP"], year_range(2000, 2001), np.zeros((1, 1, 3)))
+
+
+def test_series_shares_memory():
+    panel = make_panel()
+    panel.series("USA", "GDP").values[0] = 7.0
+    assert panel.data[1, 0, 0] == 7.0
+
+
+def test_indicator_and_year():
+    panel = make_panel()
+    np.testing.assert_array_equal(panel.indicator("GDP")[:, 2], [NAN, 30.0])
+    np.testing.assert_array_equal(panel.year(2003), [[4.0, NAN], [NAN, NAN]])
+    np.testing.assert_array_equal(panel.year(np.int16(2000)), panel.data[:, :, 0])
+
+
+@pytest.mark.parametrize("year", [1999, 1990, 2004, 2100])
+def test_year_out_of_range_raises(year):
+    # 负数下标不能悄悄回绕到年份轴的末尾
+    with pytest.raises(KeyError):
+        make_panel().year(year)
+
+
+def test_year_on_empty_panel_raises():
+    with pytest.raises(KeyError):
+        Panel([], [], year_range(2000, 1999)).year(2000)
+
+
+def test_slice():
+    panel = make_panel()
+    inner = panel.slice(2001, 2002)
+    np.testing.assert_array_equal(inner.years, [2001, 2002])
+    np.testing.assert_array_equal(inner.data, panel.data[:, :, 1:3])
+    assert (panel.slice(1990, 2100).start_year, panel.slice(1990, 2100).end_year) == (2000, 2003)
+    # 没有交集时为空面板，而不是回绕
+    for start, end in [(1990, 1995), (2010, 2012)]:
+        empty = panel.slice(start, end)
+        assert len(empty.years) == 0 and empty.data.shape == (2, 2, 0)
+
+
+def test_select():
+    panel = make_panel()
+    sub = panel.select(["USA"], ["GDP"])
+    assert sub.countries == ["USA"] and sub.indicators == ["GDP"]
+    np.testing.assert_array_equal(sub.data[0, 0], panel.data[1, 0])
+    assert panel.select(indicators=["CPI"]).countries == ["CHN", "USA"]
+    assert sub.has_country("USA") and not sub.has_country("CHN")
+    assert sub.has_indicator("GDP") and not sub.has_indicator("CPI")
+    with pytest.raises(KeyError):
+        panel.select(["JPN"])
@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from server import DataServer
+from stub_server import StubWorldBankServer
+
+
+@pytest.fixture
+def stub():
+    with StubWorldBankServer() as server:
+        yield server
+
+
+@pytest.fixture
+def data_server(stub):
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport())
+    client.base_url = stub.base_url
+    server = DataServer(client, workers=2)
+    yield server
+    client.close()
+
+
+def get(server, target):
+    response = asyncio.run(server._respond("GET", target, {}))
+    return response.status, json.loads(response.body) if response.body else None
+
+
+@pytest.mark.parametrize("target", [
+    "/v1/series/CHN/NOT.A.CODE",
+    "/v1/series/CHN/gdp",
+    "/v1/panel?countries=CHN,USA&indicators=GDP,NOT.A.CODE",
+])
+def test_unknown_indicator_is_404_without_upstream_request(data_server, stub, target):
+    status, body = get(data_server, target)
+    assert status == 404
+    assert "未知的指标" in body["error"]
+    # 只请求了国家列表，没有把未知指标转发给 World Bank
+    assert stub.request_count == 1
+    assert data_server.client.cache.get("CHN", "NOT.A.CODE") is None
+
+
+@pytest.mark.parametrize("indicator", ["GDP", "NY.GDP.MKTP.CD"])
+def test_registered_indicator_by_key_or_code(data_server, indicator):
+    status, body = get(data_server, f"/v1/series/CHN/{indicator}?start=2000&end=2010")
+    assert status == 200
+    assert body["indicator"] == "NY.GDP.MKTP.CD"
+    assert body["years"] == list(range(2000, 2011))
+
+
+def test_ranking_route(data_server):
+    status, body = get(data_server, "/v1/ranking/GDP_PER_CAPITA?year=2020&n=5&country=CHN")
+    assert status == 200
+    assert body["indicator"] == "NY.GDP.PCAP.CD"
+    assert len(body["rows"]) == 5
+    assert [row["rank"] for row in body["rows"]] == sorted(row["rank"] for row in body["rows"])
+    assert body["country"]["country"] == "CHN"
+    assert body["count"] >= body["country"]["rank"]
+
+    status, body = get(data_server, "/v1/ranking/GDP_PER_CAPITA?year=2019&n=300&group=region:South%20Asia")
+    assert status == 200
+    assert "IND" in [row["country"] for row in body["rows"]]
+
+
+@pytest.mark.parametrize("target, status", [
+    ("/v1/ranking/GDP?group=region:Atlantis", 404),
+    ("/v1/ranking/GDP?year=1800", 400),
+    ("/v1/ranking/NOT.A.CODE", 404),
+])
+def test_ranking_route_errors(data_server, target, status):
+    assert get(data_server, target)[0] == status
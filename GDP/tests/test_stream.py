@@ -0,0 +1,103 @@
+import json
+
+import pytest
+
+from api.stream import PageParser
+
+HEADER = {"page": 1, "pages": 3, "per_page": 50, "total": 120, "sourceid": "2", "lastupdated": "2024-06-28"}
+
+
+def row(iso3, iso2, year, value, name="China", indicator="NY.GDP.MKTP.CD"):
+    return {
+        "indicator": {"id": indicator, "value": "GDP (current US$)"},
+        "country": {"id": iso2, "value": name},
+        "countryiso3code": iso3,
+        "date": str(year),
+        "value": value,
+        "unit": "",
+        "obs_status": "",
+        "decimal": 0,
+    }
+
+
+ROWS = [
+    row("CHN", "CN", 2022, 17963170521079.7),
+    row("CHN", "CN", 2021, None),
+    row("CIV", "CI", 2020, 6.1e10, name="Côte d'Ivoire"),
+    row("TUR", "TR", 2019, -3.5, name="Türkiye \"quoted\" \\ name"),
+    row("", "1W", 2018, 12, name="World"),  # 汇总项没有 ISO3
+    row("USA", "US", 2017, 1.5e-3),
+]
+
+
+def chunked(text, size):
+    data = text.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def parse(text, size=64 * 1024, skip_null=True):
+    page = PageParser(chunked(text, size), skip_null=skip_null)
+    return page, [(r.indicator, r.country, r.iso3, r.date, r.value) for r in page]
+
+
+def expected(rows, skip_null=True):
+    return [(r["indicator"]["id"], r["country"]["id"], r["countryiso3code"], r["date"],
+             None if r["value"] is None else float(r["value"]))
+            for r in rows if r["value"] is not None or not skip_null]
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 100, 64 * 1024])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_matches_json_at_any_chunk_size(size, indent):
+    # 块边界会截断多字节字符、数字和转义序列
+    text = json.dumps([HEADER, ROWS], indent=indent, ensure_ascii=False)
+    page, rows = parse(text, size)
+    assert page.header == HEADER
+    assert rows == expected(ROWS)
+    assert page.rows_seen == len(ROWS)
+
+
+def test_keep_null_values():
+    _, rows = parse(json.dumps([HEADER, ROWS]), skip_null=False)
+    assert rows == expected(ROWS, skip_null=False)
+
+
+def test_rows_in_other_field_order_fall_back_to_json():
+    reordered = [dict(reversed(list(r.items()))) for r in ROWS]
+    # 缺少部分元数据字段的行
+    reordered.append({"date": "2016", "value": 7, "countryiso3code": "IND", "country": {"id": "IN"},
+                      "indicator": {"id": "NY.GDP.MKTP.CD"}})
+    mixed = ROWS[:2] + reordered + ROWS[2:]
+    for size in (5, 64 * 1024):
+        _, rows = parse(json.dumps([HEADER, mixed]), size)
+        assert rows == expected(mixed)
+
+
+def test_long_rows_spanning_many_chunks():
+    rows = [row("CHN", "CN", 2000 + i, float(i), name="X" * 10000) for i in range(5)]
+    _, parsed = parse(json.dumps([HEADER, rows]), 4096)
+    assert parsed == expected(rows)
+
+
+@pytest.mark.parametrize("text, header", [
+    (json.dumps([HEADER, []]), HEADER),
+    (json.dumps([HEADER, None]), HEADER),
+    # World Bank 的错误响应只有一个元素
+    (json.dumps([{"message": [{"id": "120", "value": "Invalid value"}]}]),
+     {"message": [{"id": "120", "value": "Invalid value"}]}),
+])
+def test_pages_without_rows(text, header):
+    page, rows = parse(text, 3)
+    assert page.header == header
+    assert rows == []
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "{}",
+    json.dumps([HEADER, ROWS])[:-40],   # 响应被截断
+    json.dumps([HEADER, ROWS]).replace("}, {", "} {", 1),  # 缺少分隔符
+])
+def test_malformed_responses_raise(text):
+    with pytest.raises(ValueError):
+        parse(text, 16)
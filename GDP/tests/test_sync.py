@@ -0,0 +1,128 @@
+from datetime import date
+
+import pytest
+
+import api.indicators
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.indicators import INDICATORS, Indicator
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer, synthetic_value
+from sync import DeltaSync
+
+COUNTRIES = ["CHN", "USA", "JPN"]
+START, END = 2010, 2024
+TODAY = date(2024, 12, 31)
+RECENT_YEARS = 3
+# 另一个数据源（Worldwide Governance Indicators）中的指标
+GOVERNANCE = Indicator("GE", "GE.EST", "政府效能", "", str, source=3)
+WDI_CODES = [INDICATORS["GDP"].code, INDICATORS["CPI"].code]
+
+
+@pytest.fixture(autouse=True)
+def governance_indicator(monkeypatch):
+    monkeypatch.setitem(api.indicators.INDICATORS, GOVERNANCE.key, GOVERNANCE)
+    monkeypatch.setitem(api.indicators._BY_CODE, GOVERNANCE.code, GOVERNANCE)
+
+
+@pytest.fixture
+def stub():
+    with StubWorldBankServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub):
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport(retries=0))
+    client.base_url = stub.base_url
+    client.get_panel(COUNTRIES, WDI_CODES, START, END)
+    client.get_panel(COUNTRIES, [GOVERNANCE.code], START, END)
+    return client
+
+
+@pytest.fixture
+def urls(client):
+    """记录客户端请求的每个URL"""
+    seen = []
+    get = client.transport.get
+
+    def recording_get(url, *args, **kwargs):
+        seen.append(url)
+        return get(url, *args, **kwargs)
+
+    client.transport.get = recording_get
+    return seen
+
+
+def series_urls(urls):
+    return [url for url in urls if "/indicator/" in url]
+
+
+def run(client):
+    return DeltaSync(client, RECENT_YEARS).run(today=TODAY)
+
+
+def test_first_sync_pulls_recent_years_of_every_source(client, urls):
+    report = run(client)
+    assert report.sources == {2: ('first', "2024-06-28"), 3: ('first', "2024-06-28")}
+    assert report.refreshed == len(COUNTRIES) * 3
+    assert report.errors == {}
+    # 每个数据源一个元数据请求和一个合并的数据请求，都只取最近几年
+    assert len(urls) == 4
+    assert all("date=2022:2024" in url for url in series_urls(urls))
+
+
+def test_unchanged_sources_send_no_series_requests(client, urls):
+    run(client)
+    del urls[:]
+    report = run(client)
+    assert report.sources == {2: ('unchanged', "2024-06-28"), 3: ('unchanged', "2024-06-28")}
+    assert report.revalidated == len(COUNTRIES) * 3
+    assert report.refreshed == 0
+    assert series_urls(urls) == []
+    assert report.requests == 2
+
+
+def test_only_updated_source_is_pulled(client, stub, urls):
+    run(client)
+    del urls[:]
+    stub.publish(3, "2099-01-01")
+    report = run(client)
+    assert report.sources == {2: ('unchanged', "2024-06-28"), 3: ('changed', "2099-01-01")}
+    assert report.refreshed == len(COUNTRIES)
+    assert report.revalidated == len(COUNTRIES) * 2
+    pulled = series_urls(urls)
+    assert len(pulled) == 1
+    assert "/indicator/GE.EST?" in pulled[0] and "date=2022:2024" in pulled[0]
+    # 只重新下载最近几年，区间外已缓存的年份保持不变
+    for country in COUNTRIES:
+        entry = client.cache.get(country, GOVERNANCE.code)
+        assert (entry.start_year, entry.end_year) == (START, END)
+        expected = [(year, synthetic_value(country, GOVERNANCE.code, year)) for year in range(START, END + 1)]
+        assert entry.slice(START, END) == ([y for y, v in expected if v is not None],
+                                           [v for _, v in expected if v is not None])
+
+    # 新版本同步过之后再次同步又是未变化
+    del urls[:]
+    assert run(client).sources[3] == ('unchanged', "2099-01-01")
+    assert series_urls(urls) == []
+
+
+def test_full_sync_pulls_whole_range(client, urls):
+    run(client)
+    del urls[:]
+    report = DeltaSync(client, RECENT_YEARS).run(indicators=["GDP"], full=True, today=TODAY)
+    assert report.sources == {2: ('full', "2024-06-28")}
+    assert report.refreshed == len(COUNTRIES)
+    pulled = series_urls(urls)
+    assert len(pulled) == 1
+    assert f"date={START}:{END}" in pulled[0] and "/indicator/NY.GDP.MKTP.CD?" in pulled[0]
+
+
+def test_failed_source_is_synced_again(client, stub):
+    stub.fail(100)
+    report = run(client)
+    assert set(report.errors) == {2, 3}
+    assert report.sources == {}
+    stub.fail(0)
+    assert {state for state, _ in run(client).sources.values()} == {'first'}
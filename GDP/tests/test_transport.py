@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from api.cache import IndicatorCache
+from api.gdp_client import GdpClient
+from api.transport import HttpTransport
+from stub_server import StubWorldBankServer, synthetic_value
+
+
+@pytest.fixture
+def stub():
+    with StubWorldBankServer() as server:
+        yield server
+
+
+def country_url(stub):
+    return stub.base_url + "country?format=json&per_page=5"
+
+
+@pytest.mark.parametrize("status", [429, 500, 502, 503, 504])
+def test_retries_transient_failures(stub, status):
+    transport = HttpTransport(retries=3, backoff_factor=0)
+    stub.fail(2, status)
+    response = transport.get(country_url(stub))
+    assert response.status_code == 200
+    assert len(response.json()[1]) == 5
+    assert stub.request_count == 3
+    stats = transport.stats()
+    # 重试计入实际发出的HTTP请求，但只算一次逻辑请求
+    assert (stats["requests"], stats["http_requests_sent"], stats["errors"]) == (1, 3, 0)
+
+
+def test_retry_count_is_bounded(stub):
+    transport = HttpTransport(retries=2, backoff_factor=0)
+    stub.fail(10)
+    response = transport.get(country_url(stub))
+    # 重试用完后返回最后一次的响应，由调用方决定如何处理
+    assert response.status_code == 503
+    assert stub.request_count == 3
+    with pytest.raises(requests.HTTPError):
+        transport.get_json(country_url(stub))
+    assert stub.request_count == 6
+
+
+def test_client_errors_are_not_retried(stub):
+    transport = HttpTransport(retries=3, backoff_factor=0)
+    response = transport.get(stub.base_url + "no/such/path")
+    assert response.status_code == 404
+    assert stub.request_count == 1
+
+
+def test_connections_are_reused(stub):
+    transport = HttpTransport()
+    for _ in range(5):
+        assert transport.get(country_url(stub)).status_code == 200
+    stats = transport.stats()
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["bytes_received"] > 0
+
+
+def test_connection_errors_are_counted():
+    with StubWorldBankServer() as stub:
+        url = country_url(stub)
+    transport = HttpTransport(retries=1, backoff_factor=0, timeout=(0.5, 0.5))
+    with pytest.raises(requests.RequestException):
+        transport.get(url)
+    assert transport.stats()["errors"] == 1
+
+
+def test_client_survives_rate_limiting(stub):
+    client = GdpClient(cache=IndicatorCache(":memory:"), transport=HttpTransport(backoff_factor=0))
+    client.base_url = stub.base_url
+    stub.fail(2, 429)
+    years, values = client.get_gdp_data("CHN", 2000, 2010)
+    assert list(zip(years, values)) == [(y, v) for y in range(2000, 2011)
+                                        if (v := synthetic_value("CHN", "NY.GDP.MKTP.CD", y)) is not None]
+    client.transport.close()